@@ -0,0 +1,157 @@
+# app/admin.py
+
+"""
+API администратора: запуск и наблюдение за фоновыми задачами (app.jobs).
+
+Маршруты только ставят задачи в очередь и читают их состояние; сама работа
+выполняется исполнителем задач, а не в потоке запроса. API доступно, только
+если задан токен RECOFILM_ADMIN_TOKEN; клиент передает его в заголовке
+X-Admin-Token.
+"""
+
+import hmac
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from . import jobs, models_api
+from .database import get_db_dependency
+
+# Токен администратора; пустой - API администратора отключено
+ADMIN_TOKEN = os.getenv("RECOFILM_ADMIN_TOKEN", "")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI-зависимость: проверяет токен администратора.
+
+    Args:
+        x_admin_token: Значение заголовка X-Admin-Token.
+
+    Raises:
+        HTTPException: 403, если API отключено, или 401, если токен неверный.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled: set RECOFILM_ADMIN_TOKEN")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/tasks", response_model=List[models_api.JobTaskAPI], summary="Доступные фоновые задачи")
+def api_list_tasks():
+    """
+    API-эндпоинт для получения доступных задач и их расписания.
+
+    Returns:
+        Список задач с расписанием этого процесса (RECOFILM_JOB_SCHEDULES).
+    """
+    schedules = jobs.parse_schedules(jobs.JOB_SCHEDULES)
+    return [
+        models_api.JobTaskAPI(
+            name=name,
+            description=jobs.describe_task(name),
+            schedule=schedules[name].expression if name in schedules else None
+        )
+        for name in sorted(jobs.TASKS)
+    ]
+
+
+@router.get("/jobs", response_model=List[models_api.JobAPI], summary="Последние фоновые задачи")
+def api_list_jobs(
+        status_filter: Optional[str] = Query(None, alias="status"),
+        name: Optional[str] = None,
+        limit: int = 50,
+        db: Session = Depends(get_db_dependency)
+):
+    """
+    API-эндпоинт для получения последних задач, начиная с новых.
+
+    Args:
+        status_filter: Только задачи с этим статусом (queued, running, succeeded, failed, cancelled).
+        name: Только задачи с этим именем.
+        limit: Максимальное количество задач.
+        db: Сессия базы данных.
+
+    Returns:
+        Список задач.
+    """
+    return [
+        models_api.JobAPI(**jobs.describe_job(job))
+        for job in jobs.list_jobs(db, status=status_filter, name=name, limit=limit)
+    ]
+
+
+@router.post("/jobs", response_model=models_api.JobAPI, status_code=status.HTTP_202_ACCEPTED,
+             summary="Поставить фоновую задачу")
+def api_enqueue_job(job: models_api.JobCreateAPI, db: Session = Depends(get_db_dependency)):
+    """
+    API-эндпоинт для постановки задачи в очередь.
+
+    Если задача с тем же именем уже стоит в очереди или выполняется,
+    возвращается она.
+
+    Args:
+        job: Имя и параметры задачи.
+        db: Сессия базы данных.
+
+    Raises:
+        HTTPException: Если задача неизвестна.
+
+    Returns:
+        Поставленная задача.
+    """
+    try:
+        queued = jobs.enqueue_job(db, job.name, job.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return models_api.JobAPI(**jobs.describe_job(queued))
+
+
+@router.get("/jobs/{job_id}", response_model=models_api.JobAPI, summary="Состояние фоновой задачи")
+def api_get_job(job_id: int, db: Session = Depends(get_db_dependency)):
+    """
+    API-эндпоинт для получения состояния и прогресса задачи.
+
+    Args:
+        job_id: ID задачи.
+        db: Сессия базы данных.
+
+    Raises:
+        HTTPException: Если задача не найдена.
+
+    Returns:
+        Задача.
+    """
+    job = jobs.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return models_api.JobAPI(**jobs.describe_job(job))
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=models_api.JobAPI, summary="Отменить фоновую задачу")
+def api_cancel_job(job_id: int, db: Session = Depends(get_db_dependency)):
+    """
+    API-эндпоинт для отмены задачи.
+
+    Задача из очереди отменяется сразу, выполняющаяся - при следующем
+    сообщении о прогрессе (cancel_requested=true до этого момента).
+
+    Args:
+        job_id: ID задачи.
+        db: Сессия базы данных.
+
+    Raises:
+        HTTPException: Если задача не найдена.
+
+    Returns:
+        Задача.
+    """
+    job = jobs.cancel_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return models_api.JobAPI(**jobs.describe_job(job))
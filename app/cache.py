@@ -0,0 +1,245 @@
+# app/cache.py
+
+"""
+Кэширование горячих чтений каталога фильмов.
+
+LRUCache - ограниченный по размеру кэш в памяти процесса с временем жизни
+записей и статистикой попаданий. Вторым уровнем может выступать общий
+Redis-совместимый кэш (SharedBackend), который задается переменной
+окружения RECOFILM_CACHE_URL:
+
+    redis://localhost:6379/0  - Redis (требуется пакет redis)
+    memory://                 - локальная замена Redis (InMemoryRedis) для тестов
+
+В кэше хранятся только неизменяемые записи (app.records), а не
+ORM-объекты, привязанные к сессии.
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Максимальное количество фильмов в кэше и время жизни записи (сек)
+MOVIE_CACHE_SIZE = 10000
+MOVIE_CACHE_TTL = 600.0
+# Кэш страниц списка популярных фильмов
+MOVIE_LIST_CACHE_SIZE = 256
+MOVIE_LIST_CACHE_TTL = 300.0
+
+_MISSING = object()
+
+
+class InMemoryRedis:
+    """
+    Локальная замена Redis с подмножеством команд, используемых SharedBackend.
+
+    Позволяет проверять работу общего кэша без внешнего сервера.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None) -> bool:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match: str):
+        prefix = match.rstrip("*")
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+        return iter(keys)
+
+
+class SharedBackend:
+    """Общий кэш поверх Redis-совместимого клиента; значения сериализуются pickle."""
+
+    def __init__(self, client, namespace: str, ttl: float):
+        self.client = client
+        self.prefix = f"recofilm:{namespace}:"
+        self.ttl = ttl
+
+    def get(self, key: Hashable) -> Any:
+        raw = self.client.get(self.prefix + repr(key))
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.client.set(self.prefix + repr(key), pickle.dumps(value), ex=int(self.ttl) or None)
+
+    def delete(self, key: Hashable) -> None:
+        self.client.delete(self.prefix + repr(key))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением размера и временем жизни записей.
+
+    Args:
+        name: Имя кэша (используется в статистике и в ключах общего кэша).
+        maxsize: Максимальное количество записей в памяти процесса.
+        ttl: Время жизни записи в секундах.
+        shared_client: Redis-совместимый клиент для общего кэша второго уровня.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 300.0, shared_client=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = SharedBackend(shared_client, name, ttl) if shared_client is not None else None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _registry[name] = self
+
+    def _get_local(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def _set_local(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение по ключу или default, если его нет в кэше."""
+        value = self._get_local(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not _MISSING:
+                self.shared_hits += 1
+                self._set_local(key, value)
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Записывает значение в кэш процесса и в общий кэш."""
+        self._set_local(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Возвращает значение из кэша, а при промахе вызывает loader и кэширует результат.
+
+        Результат None не кэшируется.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def delete(self, key: Hashable) -> None:
+        """Удаляет запись из кэша процесса и из общего кэша."""
+        with self._lock:
+            self._data.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self) -> None:
+        """Очищает кэш процесса и общий кэш."""
+        with self._lock:
+            self._data.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> dict:
+        """Возвращает статистику попаданий и размер кэша."""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+_registry: Dict[str, LRUCache] = {}
+
+
+def create_shared_client(url: Optional[str]):
+    """
+    Создает клиент общего кэша по URL.
+
+    Args:
+        url: 'memory://' для локальной замены, 'redis://...' для Redis, None - без общего кэша.
+
+    Returns:
+        Redis-совместимый клиент или None.
+    """
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemoryRedis()
+    try:
+        import redis
+    except ImportError as e:
+        raise ImportError("RECOFILM_CACHE_URL requires the 'redis' package") from e
+    return redis.Redis.from_url(url)
+
+
+def all_cache_stats() -> Dict[str, dict]:
+    """Возвращает статистику всех созданных кэшей по именам."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+_shared_client = create_shared_client(os.getenv("RECOFILM_CACHE_URL"))
+
+# Кэш записей фильмов по ID
+movie_cache = LRUCache("movies", maxsize=MOVIE_CACHE_SIZE, ttl=MOVIE_CACHE_TTL, shared_client=_shared_client)
+# Кэш страниц списка популярных фильмов по (skip, limit)
+movie_list_cache = LRUCache(
+    "movie_lists", maxsize=MOVIE_LIST_CACHE_SIZE, ttl=MOVIE_LIST_CACHE_TTL, shared_client=_shared_client
+)
+
+
+def invalidate_movie_caches() -> None:
+    """Сбрасывает кэши каталога (после массовой загрузки фильмов)."""
+    movie_cache.clear()
+    movie_list_cache.clear()
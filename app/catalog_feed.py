@@ -0,0 +1,286 @@
+# app/catalog_feed.py
+
+"""
+Лента изменений каталога фильмов для согласования кэшей процессов.
+
+Каждое изменение фильмов записывается в журнал movie_changes и
+увеличивает версию каталога в catalog_state в той же транзакции
+(record_movie_changes). Процессы приложения не реже раза в
+CATALOG_POLL_SECONDS сравнивают версию со своей (один запрос по первичному
+ключу) и при изменении читают из журнала только новые ID фильмов.
+Изменение рассылается подписчикам процесса (subscribe): кэш фильмов
+удаляет измененные записи, рекомендательная система дочитывает их в
+снимок каталога.
+
+Пересчет рейтинга популярности не меняет данные фильмов, поэтому не
+увеличивает версию каталога (от нее зависят ETag и кэш страниц), а
+увеличивает отдельную версию рейтинга в той же строке catalog_state
+(record_popularity_change). Опрос читает обе версии одним запросом;
+подписчики получают изменение с признаком popularity и перечитывают рейтинг.
+
+Старые записи журнала удаляются командой (например, по cron):
+
+    python -m app.catalog_feed prune --days 7
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from . import models_db
+
+logger = logging.getLogger(__name__)
+
+# Как часто процесс проверяет версию каталога (сек)
+CATALOG_POLL_SECONDS = float(os.getenv("RECOFILM_CATALOG_POLL_SECONDS", "2"))
+# Если изменений больше, подписчики перезагружают данные целиком, а не по ID
+MAX_DELTA_MOVIES = 10000
+
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+# Полная перезагрузка данных каталога во всех процессах (movie_id не используется)
+CHANGE_RELOAD = "reload"
+
+
+class CatalogChange(NamedTuple):
+    """Изменение каталога между двумя версиями."""
+    from_version: int
+    to_version: int
+    # ID измененных фильмов; None - изменений слишком много, нужна полная перезагрузка
+    movie_ids: Optional[FrozenSet[int]]
+    # Пересчитан рейтинг популярности (версия каталога при этом могла не измениться)
+    popularity: bool = False
+
+
+def get_catalog_version(db: Session) -> int:
+    """Читает текущую версию каталога (0, если версия еще не записывалась)."""
+    version = db.query(models_db.CatalogState.version).filter(models_db.CatalogState.id == 1).scalar()
+    return version or 0
+
+
+def get_catalog_state(db: Session) -> Tuple[int, int]:
+    """Читает версию каталога и версию рейтинга популярности одним запросом."""
+    state = models_db.CatalogState
+    row = db.query(state.version, state.popularity_version).filter(state.id == 1).first()
+    return (row.version or 0, row.popularity_version or 0) if row is not None else (0, 0)
+
+
+def _bump_catalog_state(db: Session, column) -> None:
+    """Увеличивает счетчик строки catalog_state (создает строку, если ее нет)."""
+    state = models_db.CatalogState
+    updated = db.query(state).filter(state.id == 1).update({column: column + 1}, synchronize_session=False)
+    if not updated:
+        db.add(state(id=1, version=0, popularity_version=0))
+        db.flush()
+        db.query(state).filter(state.id == 1).update({column: column + 1}, synchronize_session=False)
+
+
+def record_movie_changes(db: Session, movie_ids: Iterable[int], op: str = CHANGE_UPSERT) -> int:
+    """
+    Записывает изменения фильмов в журнал и увеличивает версию каталога.
+
+    Изменение не фиксируется: вызывающая функция должна выполнить commit в
+    той же транзакции, что и само изменение фильмов. Строка версии
+    блокируется до конца транзакции, поэтому версии не повторяются.
+
+    Args:
+        db: Сессия базы данных.
+        movie_ids: ID измененных фильмов (может быть пустым: только новая версия).
+        op: Вид изменения: CHANGE_UPSERT или CHANGE_DELETE.
+
+    Returns:
+        Новая версия каталога.
+    """
+    _bump_catalog_state(db, models_db.CatalogState.version)
+    version = get_catalog_version(db)
+
+    changed_at = datetime.now()
+    rows = [
+        {"version": version, "movie_id": int(movie_id), "op": op, "changed_at": changed_at}
+        for movie_id in movie_ids
+    ]
+    if rows:
+        db.execute(insert(models_db.MovieChange), rows)
+    feed.mark_stale()
+    return version
+
+
+def record_catalog_reload(db: Session) -> int:
+    """
+    Требует от всех процессов перезагрузить данные каталога целиком.
+
+    Подписчики получают изменение без ID фильмов (movie_ids=None), как при
+    слишком большом количестве изменений: кэши очищаются, снимок каталога
+    рекомендаций перестраивается заново (с уплотнением массивов). Изменение
+    не фиксируется, как и в record_movie_changes.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Новая версия каталога.
+    """
+    return record_movie_changes(db, [0], op=CHANGE_RELOAD)
+
+
+def record_popularity_change(db: Session) -> int:
+    """
+    Сообщает всем процессам о пересчете рейтинга популярности.
+
+    Версия каталога не меняется: ETag рекомендаций, кэш страниц и
+    предрассчитанные рекомендации остаются действительными. Изменение не
+    фиксируется, как и в record_movie_changes.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Новая версия рейтинга популярности.
+    """
+    _bump_catalog_state(db, models_db.CatalogState.popularity_version)
+    feed.mark_stale()
+    return get_catalog_state(db)[1]
+
+
+def prune_movie_changes(db: Session, older_than: datetime) -> int:
+    """Удаляет записи журнала старше older_than и возвращает их количество."""
+    deleted = db.query(models_db.MovieChange).filter(
+        models_db.MovieChange.changed_at < older_than
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+class CatalogChangeFeed:
+    """
+    Опрос версии каталога и рассылка изменений подписчикам процесса.
+
+    Первый опрос только запоминает версию: данные, загруженные после него,
+    уже актуальны. Опросы выполняются не чаще раза в poll_interval секунд;
+    одновременно опрашивает только один поток.
+    """
+
+    def __init__(self, poll_interval: float = CATALOG_POLL_SECONDS):
+        self.poll_interval = poll_interval
+        self.version: Optional[int] = None
+        self.popularity_version: Optional[int] = None
+        self._next_poll = 0.0
+        self._subscribers: List[Callable[[CatalogChange], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[CatalogChange], None]) -> None:
+        """Регистрирует функцию, вызываемую при каждом изменении каталога."""
+        self._subscribers.append(callback)
+
+    def mark_stale(self) -> None:
+        """Требует проверить версию при следующем опросе (после записи в этом процессе)."""
+        self._next_poll = 0.0
+
+    def publish(self, change: CatalogChange) -> None:
+        """Передает изменение всем подписчикам; ошибка подписчика не останавливает остальных."""
+        for callback in self._subscribers:
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("Catalog change subscriber failed", extra={"version": change.to_version})
+
+    def poll(self, db: Session) -> int:
+        """
+        Проверяет версии каталога и рейтинга и рассылает изменения, если они выросли.
+
+        Args:
+            db: Сессия базы данных.
+
+        Returns:
+            Версия каталога, известная процессу.
+        """
+        if self.version is not None and time.monotonic() < self._next_poll:
+            return self.version
+        # Другой поток уже опрашивает: его результат появится через мгновение
+        if not self._lock.acquire(blocking=self.version is None):
+            return self.version
+        try:
+            self._next_poll = time.monotonic() + self.poll_interval
+            version, popularity_version = get_catalog_state(db)
+            if self.version is None:
+                self.version, self.popularity_version = version, popularity_version
+                return version
+            popularity = popularity_version != self.popularity_version
+            if version <= self.version and not popularity:
+                return self.version
+
+            movie_ids = frozenset()
+            if version > self.version:
+                movie_ids = self._read_changes(db, version)
+            change = CatalogChange(self.version, max(version, self.version), movie_ids, popularity)
+            self.version, self.popularity_version = change.to_version, popularity_version
+        finally:
+            self._lock.release()
+
+        logger.info(
+            "Catalog changed",
+            extra={
+                "version": change.to_version, "popularity": popularity,
+                "movies": len(movie_ids) if movie_ids is not None else "all",
+            }
+        )
+        self.publish(change)
+        return change.to_version
+
+    def _read_changes(self, db: Session, version: int) -> Optional[FrozenSet[int]]:
+        """
+        Читает из журнала ID фильмов, измененных после self.version до version.
+
+        Возвращает None (полная перезагрузка), если изменений слишком много,
+        среди них есть CHANGE_RELOAD или часть записей уже удалена из журнала
+        (prune_movie_changes): самая старая оставшаяся запись новее следующей
+        после self.version версии.
+        """
+        oldest = db.query(func.min(models_db.MovieChange.version)).scalar()
+        if oldest is None or oldest > self.version + 1:
+            return None
+        change_rows = (
+            db.query(models_db.MovieChange.movie_id, models_db.MovieChange.op)
+            .filter(models_db.MovieChange.version > self.version, models_db.MovieChange.version <= version)
+            .limit(MAX_DELTA_MOVIES + 1)
+            .all()
+        )
+        if len(change_rows) > MAX_DELTA_MOVIES or any(row.op == CHANGE_RELOAD for row in change_rows):
+            return None
+        return frozenset(row.movie_id for row in change_rows)
+
+
+# Лента процесса: общая для всех модулей, которые держат данные каталога в памяти
+feed = CatalogChangeFeed()
+
+
+def main():
+    from .database import get_db_session
+
+    parser = argparse.ArgumentParser(description="Журнал изменений каталога")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune_parser = subparsers.add_parser("prune", help="Удалить старые записи журнала")
+    prune_parser.add_argument("--days", type=float, default=7.0, help="Хранить записи за столько дней")
+    subparsers.add_parser("status", help="Показать версию каталога")
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        if args.command == "prune":
+            deleted = prune_movie_changes(session, datetime.now() - timedelta(days=args.days))
+            print(f"Deleted {deleted} catalog change records")
+        else:
+            print(f"Catalog version: {get_catalog_version(session)}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# app/cold_start.py
+
+"""
+Рекомендации для новых пользователей (холодный старт).
+
+У пользователя без взаимодействий нет профиля жанров, поэтому
+рекомендательная система не может ничего предложить. Такие запросы
+обслуживаются без нее: список строится из рейтинга популярности
+(app.popularity) с чередованием жанров, чтобы первые позиции не
+заполнялись фильмами одного жанра. Пользователь может выбрать любимые
+жанры при знакомстве с сервисом (параметр genres) - тогда в список
+попадают только фильмы этих жанров.
+
+Готовые списки кэшируются в памяти процесса и сбрасываются вместе с
+рейтингом популярности. Количество взаимодействий пользователя кэшируется
+по версии его библиотеки (users.interactions_version), поэтому проверка
+"новый ли пользователь" обычно не требует запроса к user_movie.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import catalog_feed, crud, models_db
+from .cache import LRUCache
+from .popularity import RANKING_TTL
+
+# Сколько фильмов рейтинга популярности рассматривается при построении списка
+COLD_START_POOL = 1000
+# Длина списка, если количество не задано
+COLD_START_SIZE = 100
+# Пользователь с меньшим числом взаимодействий получает список холодного старта
+MIN_INTERACTIONS = 1
+
+# Количество взаимодействий по (user_id, версия библиотеки): новая версия - новый ключ;
+# TTL ограничивает устаревание после записей в обход crud (без увеличения версии)
+_interaction_counts = LRUCache("interaction_counts", maxsize=100000, ttl=300.0)
+# Готовые списки по (жанры, количество)
+_cold_start_lists = LRUCache("cold_start", maxsize=256, ttl=RANKING_TTL)
+
+
+def get_interaction_count(db: Session, user_id: int, user_version: int) -> int:
+    """
+    Возвращает количество взаимодействий пользователя с кэшированием по версии библиотеки.
+
+    Args:
+        db: Сессия базы данных.
+        user_id: ID пользователя.
+        user_version: Версия библиотеки пользователя (crud.get_user_interactions_version).
+
+    Returns:
+        Количество взаимодействий.
+    """
+    def load() -> int:
+        return db.query(func.count(models_db.UserMovie.id)).filter(
+            models_db.UserMovie.user_id == user_id
+        ).scalar()
+
+    return _interaction_counts.get_or_load((user_id, user_version), load)
+
+
+def is_cold_start(db: Session, user_id: int, user_version: int) -> bool:
+    """Проверяет, обслуживается ли пользователь списком холодного старта."""
+    return get_interaction_count(db, user_id, user_version) < MIN_INTERACTIONS
+
+
+def parse_genres(genres: Optional[str]) -> tuple:
+    """Разбирает жанры из параметра запроса 'Drama,Comedy' в отсортированный кортеж."""
+    if not genres:
+        return ()
+    return tuple(sorted({genre.strip() for genre in genres.split(",") if genre.strip()}))
+
+
+def diversify_by_genre(movies: Sequence, count: int) -> List[int]:
+    """
+    Выбирает count фильмов, чередуя основные жанры.
+
+    Фильмы группируются по первому жанру с сохранением порядка популярности;
+    список собирается по кругу: самый популярный фильм каждого жанра, затем
+    второй и так далее. Жанры упорядочены по позиции своего лучшего фильма.
+
+    Args:
+        movies: Записи фильмов в порядке популярности.
+        count: Количество фильмов.
+
+    Returns:
+        ID выбранных фильмов.
+    """
+    buckets: Dict[str, List[int]] = {}
+    for movie in movies:
+        genres = movie.genres
+        buckets.setdefault(genres[0] if genres else "", []).append(movie.id)
+
+    result: List[int] = []
+    depth = 0
+    while len(result) < count:
+        added = False
+        for movie_ids in buckets.values():
+            if depth < len(movie_ids):
+                result.append(movie_ids[depth])
+                added = True
+                if len(result) == count:
+                    break
+        if not added:
+            break
+        depth += 1
+    return result
+
+
+def get_cold_start_movie_ids(db: Session, count: Optional[int] = None, genres: Sequence[str] = ()) -> List[int]:
+    """
+    Возвращает ID фильмов для пользователя без истории.
+
+    Args:
+        db: Сессия базы данных.
+        count: Количество фильмов (по умолчанию COLD_START_SIZE).
+        genres: Жанры, выбранные пользователем; пусто - все жанры.
+
+    Returns:
+        ID фильмов в порядке показа.
+    """
+    count = count or COLD_START_SIZE
+    genres = tuple(sorted(genres))
+
+    def load() -> List[int]:
+        # Страница рейтинга популярности (или лучших по оценке, пока рейтинг не рассчитан)
+        movies = crud.get_movies(db, skip=0, limit=max(COLD_START_POOL, count))
+        if genres:
+            picked = set(genres)
+            movies = [movie for movie in movies if picked.intersection(movie.genres)]
+        return diversify_by_genre(movies, count)
+
+    return _cold_start_lists.get_or_load((genres, count), load)
+
+
+def invalidate_cold_start() -> None:
+    """Сбрасывает готовые списки холодного старта."""
+    _cold_start_lists.clear()
+
+
+def _apply_catalog_change(change: catalog_feed.CatalogChange) -> None:
+    """Сбрасывает списки вместе с рейтингом популярности (пересчет рейтинга или полная перезагрузка)."""
+    if change.popularity or change.movie_ids is None:
+        invalidate_cold_start()
+
+
+catalog_feed.feed.subscribe(_apply_catalog_change)
@@ -4,14 +4,37 @@
 Содержит функции для взаимодействия с моделями User, Movie и UserMovie.
 """
 
-from typing import List, Optional, Set, Type, Any
+from typing import Dict, Iterator, List, Optional, Set, Type
 
-from sqlalchemy import desc
+from sqlalchemy import desc, exists, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session, joinedload
 
-from app.models_db import Movie, UserMovie
-from . import models_db, schemas_db
+from app.models_db import UserMovie
+from . import catalog_feed, models_db, popularity, schemas_db
+from .cache import movie_cache, movie_list_cache
+from .database import track_user_write
 from .models_db import InteractionStatusEnum
+from .records import MovieRecord
+
+# Страницы списка фильмов длиннее этого значения не кэшируются
+MOVIE_LIST_CACHE_MAX_LIMIT = 500
+# Размер пакета строк при потоковом чтении списка фильмов
+MOVIE_STREAM_BATCH_SIZE = 1000
+# Фильмов каждого статуса на одной странице библиотеки
+LIBRARY_PAGE_SIZE = 50
+
+# Колонки фильма в порядке полей MovieRecord: запрос возвращает кортежи без ORM-объектов
+MOVIE_RECORD_COLUMNS = (
+    models_db.Movie.id,
+    models_db.Movie.title,
+    models_db.Movie.year,
+    models_db.Movie.genres_str,
+    models_db.Movie.description,
+    models_db.Movie.rating_imdb,
+)
 
 
 # --- CRUD операции для Пользователей (User) ---
@@ -68,25 +91,124 @@ def create_user(db: Session, user: schemas_db.UserCreate) -> models_db.User:
     return db_user
 
 
+def get_user_interactions_version(db: Session, user_id: int) -> Optional[int]:
+    """
+    Получает версию библиотеки пользователя.
+
+    Версия увеличивается при каждом добавлении, изменении или удалении
+    взаимодействия и используется для построения ETag рекомендаций.
+
+    Args:
+        db: Сессия базы данных.
+        user_id: Идентификатор пользователя.
+
+    Returns:
+        Номер версии или None, если пользователь не найден.
+    """
+    row = (
+        db.query(models_db.User.interactions_version)
+        .filter(models_db.User.id == user_id)
+        .first()
+    )
+    return row.interactions_version if row else None
+
+
+def bump_user_interactions_version(db: Session, user_id: int) -> None:
+    """
+    Увеличивает версию библиотеки пользователя на единицу.
+
+    Изменение не фиксируется: вызывающая функция должна выполнить commit
+    в той же транзакции, что и само изменение взаимодействия.
+
+    Args:
+        db: Сессия базы данных.
+        user_id: Идентификатор пользователя.
+    """
+    db.query(models_db.User).filter(models_db.User.id == user_id).update(
+        {models_db.User.interactions_version: models_db.User.interactions_version + 1},
+        synchronize_session=False
+    )
+    # После commit чтения пользователя на время уходят в основную базу, а не на реплики
+    track_user_write(db, user_id)
+
+
 # --- CRUD операции для Фильмов (Movie) ---
 
-def get_movie(db: Session, movie_id: int) -> Optional[models_db.Movie]:
+def get_movie(db: Session, movie_id: int) -> Optional[MovieRecord]:
     """
-    Получает фильм из БД по его ID.
+    Получает фильм по его ID через кэш каталога.
 
     Args:
         db: Сессия базы данных.
         movie_id: Идентификатор фильма.
 
     Returns:
-        Объект фильма или None, если фильм не найден.
+        Запись фильма или None, если фильм не найден.
     """
-    return db.query(models_db.Movie).filter(models_db.Movie.id == movie_id).first()
+    def load() -> Optional[MovieRecord]:
+        row = db.query(*MOVIE_RECORD_COLUMNS).filter(models_db.Movie.id == movie_id).first()
+        return MovieRecord._make(row) if row else None
+
+    return movie_cache.get_or_load(movie_id, load)
 
 
-def get_movies(db: Session, skip: int = 0, limit: int = 100) -> list[Type[Movie]]:
+def get_movie_records(db: Session, movie_ids: List[int]) -> list[MovieRecord]:
     """
-    Получает список фильмов с пагинацией.
+    Получает записи фильмов по списку ID с сохранением порядка.
+
+    Записи берутся из кэша каталога; недостающие загружаются одним запросом.
+
+    Args:
+        db: Сессия базы данных.
+        movie_ids: Список идентификаторов фильмов.
+
+    Returns:
+        Список записей фильмов в порядке movie_ids (ненайденные пропускаются).
+    """
+    found = {}
+    missing = []
+    for movie_id in movie_ids:
+        record = movie_cache.get(movie_id)
+        if record is None:
+            missing.append(movie_id)
+        else:
+            found[movie_id] = record
+
+    if missing:
+        for row in db.query(*MOVIE_RECORD_COLUMNS).filter(models_db.Movie.id.in_(missing)):
+            record = MovieRecord._make(row)
+            movie_cache.set(record.id, record)
+            found[record.id] = record
+
+    return [found[movie_id] for movie_id in movie_ids if movie_id in found]
+
+
+def _unranked_movies_query(db: Session, ranked: bool):
+    """
+    Запрос фильмов, следующих в списке популярных после рейтинга популярности.
+
+    Args:
+        db: Сессия базы данных.
+        ranked: Рейтинг рассчитан: исключить фильмы, вошедшие в него.
+
+    Returns:
+        Запрос записей фильмов по убыванию rating_imdb (при равенстве - по ID).
+    """
+    query = db.query(*MOVIE_RECORD_COLUMNS)
+    if ranked:
+        query = query.filter(~exists().where(models_db.MoviePopularity.movie_id == models_db.Movie.id))
+    return query.order_by(desc(models_db.Movie.rating_imdb), models_db.Movie.id)
+
+
+def get_movies(db: Session, skip: int = 0, limit: int = 100) -> list[MovieRecord]:
+    """
+    Получает список популярных фильмов с пагинацией.
+
+    Страница - срез рейтинга популярности (app.popularity), поэтому работа
+    пропорциональна limit, а не размеру каталога. За материализованной
+    частью рейтинга список продолжается фильмами вне рейтинга по rating_imdb,
+    поэтому порядок не меняется на границе и фильмы не повторяются. Пока
+    рейтинг не рассчитан, все фильмы сортируются по rating_imdb.
 
     Args:
         db: Сессия базы данных.
@@ -94,22 +216,63 @@ def get_movies(db: Session, skip: int = 0, limit: int = 100) -> list[Type[Movie]
         limit: Максимальное количество записей для возврата.
 
     Returns:
-        Список объектов фильмов.
+        Список записей фильмов.
     """
-    # Запрос с пропуском (offset) и ограничением (limit)
-    query = db.query(models_db.Movie)
+    popular_ids = popularity.get_popular_movie_ids(db, skip=skip, limit=limit)
+    if popular_ids is not None:
+        return get_movie_records(db, popular_ids)
 
-    # Применяем сортировку
-    query = query.order_by(desc(models_db.Movie.rating_imdb))
+    def load() -> list[MovieRecord]:
+        ranking = popularity.get_ranking(db)
+        # Часть страницы из рейтинга (если страница пересекает его границу)
+        ranked_ids = list(ranking[skip:skip + limit] if limit is not None else ranking[skip:])
+        records = get_movie_records(db, ranked_ids) if ranked_ids else []
 
-    # Применяем пагинацию
-    query = query.offset(skip)
+        # Остаток страницы - фильмы вне рейтинга, с пропуском уже показанных на прошлых страницах
+        query = _unranked_movies_query(db, bool(ranking)).offset(max(0, skip - len(ranking)))
+        if limit is not None:
+            if len(ranked_ids) >= limit:
+                return records
+            query = query.limit(limit - len(ranked_ids))
 
-    # Применяем лимит, только если он задан
-    if limit is not None:
-        query = query.limit(limit)
+        return records + [MovieRecord._make(row) for row in query.all()]
 
-    return query.all()
+    if limit is None or limit > MOVIE_LIST_CACHE_MAX_LIMIT:
+        return load()
+    return movie_list_cache.get_or_load((skip, limit), load)
+
+
+def iter_movies(
+        db: Session, skip: int = 0, limit: Optional[int] = None, batch_size: int = MOVIE_STREAM_BATCH_SIZE
+) -> Iterator[MovieRecord]:
+    """
+    Последовательно выдает популярные фильмы в порядке get_movies, не загружая весь список.
+
+    Срез рейтинга популярности читается пакетами по batch_size ID, фильмы
+    вне рейтинга (и все фильмы, пока рейтинг не рассчитан) - серверным
+    курсором (yield_per).
+
+    Args:
+        db: Сессия базы данных; должна оставаться открытой до конца итерации.
+        skip: Количество записей, которое нужно пропустить.
+        limit: Максимальное количество записей (None - до конца каталога).
+        batch_size: Размер пакета.
+
+    Yields:
+        Записи фильмов.
+    """
+    ranking = popularity.get_ranking(db)
+    ranked_ids = ranking[skip:skip + limit] if limit is not None else ranking[skip:]
+    for start in range(0, len(ranked_ids), batch_size):
+        yield from get_movie_records(db, list(ranked_ids[start:start + batch_size]))
+    if limit is not None and len(ranked_ids) >= limit:
+        return
+
+    query = _unranked_movies_query(db, bool(ranking)).offset(max(0, skip - len(ranking)))
+    if limit is not None:
+        query = query.limit(limit - len(ranked_ids))
+    for row in query.yield_per(batch_size):
+        yield MovieRecord._make(row)
 
 
 def search_movies(
@@ -118,7 +281,7 @@ def search_movies(
         limit: int = 100,
         name: Optional[str] = None,
         year: Optional[int] = None
-) -> list[Type[Movie]]:
+) -> list[MovieRecord]:
     """
     Ищет фильмы по названию и/или году выпуска.
 
@@ -130,10 +293,10 @@ def search_movies(
         year: Год выпуска фильма.
 
     Returns:
-        Список найденных фильмов.
+        Список записей найденных фильмов.
     """
-    # Создаем базовый запрос
-    query = db.query(models_db.Movie)
+    # Создаем базовый запрос: только столбцы записи, без ORM-объектов
+    query = db.query(*MOVIE_RECORD_COLUMNS)
 
     # Если указано имя, добавляем фильтр по названию (поиск подстроки)
     if name is not None:
@@ -144,7 +307,7 @@ def search_movies(
         query = query.filter(models_db.Movie.year == year)
 
     # Применяем пагинацию и возвращаем результат
-    return query.offset(skip).limit(limit).all()
+    return [MovieRecord._make(row) for row in query.offset(skip).limit(limit)]
 
 
 def create_movie(db: Session, movie: schemas_db.MovieCreate) -> models_db.Movie:
@@ -167,12 +330,19 @@ def create_movie(db: Session, movie: schemas_db.MovieCreate) -> models_db.Movie:
         genres=movie.genres
     )
     db.add(db_movie)
+    db.flush()
+    # Запись в журнал изменений в той же транзакции: другие процессы узнают о фильме из ленты
+    catalog_feed.record_movie_changes(db, [db_movie.id])
     db.commit()
     db.refresh(db_movie)
+
+    # Сквозная запись: новый фильм сразу попадает в кэш, списки сбрасываются
+    movie_cache.set(db_movie.id, MovieRecord.from_orm(db_movie))
+    movie_list_cache.clear()
     return db_movie
 
 
-def get_movies_by_ids(db: Session, movie_ids: List[int]) -> list[Any] | list[Type[Movie]]:
+def get_movies_by_ids(db: Session, movie_ids: List[int]) -> list[MovieRecord]:
     """
     Получает список фильмов по списку их ID.
 
@@ -181,12 +351,75 @@ def get_movies_by_ids(db: Session, movie_ids: List[int]) -> list[Any] | list[Typ
         movie_ids: Список идентификаторов фильмов.
 
     Returns:
-        Список объектов фильмов.
+        Список записей фильмов.
     """
     if not movie_ids:
         return []
     # Используем оператор `in_` для эффективного поиска по списку ID
-    return db.query(models_db.Movie).filter(models_db.Movie.id.in_(movie_ids)).all()
+    rows = db.query(*MOVIE_RECORD_COLUMNS).filter(models_db.Movie.id.in_(movie_ids))
+    return [MovieRecord._make(row) for row in rows]
+
+
+def get_all_movie_ids(db: Session) -> Set[int]:
+    """
+    Получает множество ID всех фильмов каталога.
+
+    Читается только первичный ключ, поэтому запрос обслуживается индексом.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Множество (set) ID фильмов.
+    """
+    return {row.id for row in db.query(models_db.Movie.id).all()}
+
+
+def get_catalog_version(db: Session) -> str:
+    """
+    Получает версию каталога фильмов.
+
+    Версия берется из ленты изменений каталога (app.catalog_feed), которая
+    перечитывает ее из БД не чаще раза в несколько секунд и при изменении
+    обновляет кэши процесса.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Строковое представление версии каталога.
+    """
+    return str(catalog_feed.feed.poll(db))
+
+
+def get_popularity_version(db: Session) -> str:
+    """
+    Получает версию рейтинга популярности.
+
+    От нее, в отличие от версии каталога, зависят только списки в порядке
+    рейтинга: главная страница и рекомендации холодного старта.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Строковое представление версии рейтинга.
+    """
+    catalog_feed.feed.poll(db)
+    return str(catalog_feed.feed.popularity_version)
+
+
+def _apply_catalog_change(change: catalog_feed.CatalogChange) -> None:
+    """Удаляет из кэшей процесса фильмы, измененные в этом или другом процессе."""
+    if change.movie_ids is None:
+        movie_cache.clear()
+    else:
+        for movie_id in change.movie_ids:
+            movie_cache.delete(movie_id)
+    movie_list_cache.clear()
+
+
+catalog_feed.feed.subscribe(_apply_catalog_change)
 
 
 # --- CRUD операции для Взаимодействий (UserMovie) ---
@@ -212,14 +445,71 @@ def get_user_movie_interaction(
     ).first()
 
 
+def _upsert_user_movies(db: Session, rows: List[dict], update_columns: List[str]) -> Optional[int]:
+    """
+    Вставляет строки user_movie или обновляет существующие по ключу (user_id, movie_id).
+
+    Используется одна команда upsert своей СУБД: INSERT ... ON DUPLICATE KEY
+    UPDATE в MySQL, INSERT ... ON CONFLICT DO UPDATE в SQLite и PostgreSQL.
+    Для остальных СУБД строки записываются по одной (поиск и вставка или
+    обновление).
+
+    Args:
+        db: Сессия базы данных.
+        rows: Значения строк (user_id, movie_id и обновляемые столбцы).
+        update_columns: Столбцы, обновляемые у существующих строк.
+
+    Returns:
+        ID записи, если передана одна строка, иначе None.
+    """
+    table = models_db.UserMovie.__table__
+    dialect = db.get_bind().dialect.name
+    single = len(rows) == 1
+
+    if dialect == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        updates = {column: stmt.inserted[column] for column in update_columns}
+        if single:
+            # LAST_INSERT_ID(id) возвращает через lastrowid id уже существующей записи
+            updates["id"] = func.last_insert_id(table.c.id)
+        stmt = stmt.on_duplicate_key_update(updated_at=func.now(), **updates)
+        result = db.execute(stmt)
+        return result.lastrowid if single else None
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "movie_id"],
+            set_={**{column: stmt.excluded[column] for column in update_columns}, "updated_at": func.now()}
+        )
+        if single:
+            return db.execute(stmt.returning(table.c.id)).scalar_one()
+        db.execute(stmt)
+        return None
+
+    row_id = None
+    for row in rows:
+        existing = get_user_movie_interaction(db, user_id=row["user_id"], movie_id=row["movie_id"])
+        if existing is None:
+            existing = models_db.UserMovie(**row)
+            db.add(existing)
+        else:
+            for column in update_columns:
+                setattr(existing, column, row[column])
+        db.flush()
+        row_id = existing.id
+    return row_id if single else None
+
+
 def update_user_movie_interaction(
         db: Session, user_id: int, interaction: schemas_db.UserMovieCreate
 ) -> models_db.UserMovie:
     """
     Создает или обновляет взаимодействие пользователя с фильмом.
 
-    Если взаимодействие уже существует, обновляет его статус.
-    Если нет - создает новое.
+    Выполняется одной командой upsert по уникальному ключу (user_id, movie_id),
+    поэтому параллельные запросы не создают дубликатов.
 
     Args:
         db: Сессия базы данных.
@@ -229,29 +519,56 @@ def update_user_movie_interaction(
     Returns:
         Созданный или обновленный объект взаимодействия.
     """
-    # Проверяем, существует ли уже такое взаимодействиеAdd commentMore actions
-    db_interaction = get_user_movie_interaction(
-        db, user_id=user_id, movie_id=interaction.movie_id
+    interaction_id = _upsert_user_movies(
+        db,
+        [{"user_id": user_id, "movie_id": interaction.movie_id, "status": interaction.status}],
+        update_columns=["status"]
     )
+    bump_user_interactions_version(db, user_id)
+    db.commit()
 
-    if db_interaction:
-        # Если да, обновляем его статус
-        db_interaction.status = interaction.status.value
-        db.commit()
-        db.refresh(db_interaction)
-    else:
-        # Если нет, создаем новую запись
-        db_interaction = models_db.UserMovie(
-            user_id=user_id,
-            movie_id=interaction.movie_id,
-            status=interaction.status.value
-        )
-        db.add(db_interaction)
+    # Объект строится из известных значений, без повторного чтения из БД
+    return models_db.UserMovie(
+        id=interaction_id,
+        user_id=user_id,
+        movie_id=interaction.movie_id,
+        status=interaction.status
+    )
+
+
+def bulk_upsert_user_movie_interactions(
+        db: Session, user_id: int, interactions: List[schemas_db.UserMovieImport]
+) -> int:
+    """
+    Создает или обновляет пачку взаимодействий пользователя одной транзакцией.
+
+    Вся пачка записывается одной многострочной командой upsert (см.
+    _upsert_user_movies). Версия библиотеки пользователя увеличивается
+    один раз на всю пачку.
+
+    Args:
+        db: Сессия базы данных.
+        user_id: ID пользователя.
+        interactions: Взаимодействия пачки (movie_id внутри пачки уникальны).
+
+    Returns:
+        Количество записанных взаимодействий.
+    """
+    if not interactions:
+        return 0
+
+    _upsert_user_movies(
+        db,
+        [
+            {"user_id": user_id, "movie_id": item.movie_id, "status": item.status, "rate": item.rate}
+            for item in interactions
+        ],
+        update_columns=["status", "rate"]
+    )
 
-    # Сохраняем изменения и обновляем объект
+    bump_user_interactions_version(db, user_id)
     db.commit()
-    db.refresh(db_interaction)
-    return db_interaction
+    return len(interactions)
 
 
 def delete_user_movie_interaction(
@@ -272,6 +589,7 @@ def delete_user_movie_interaction(
 
     if db_interaction:
         db.delete(db_interaction)
+        bump_user_interactions_version(db, user_id)
         db.commit()
 
     return db_interaction
@@ -312,7 +630,103 @@ def get_user_interactions(
     return query.all()
 
 
-def get_user_liked_movies(db: Session, user_id: int) -> list[Type[Movie]]:
+def get_user_library(
+        db: Session,
+        user_id: int,
+        limit: int = LIBRARY_PAGE_SIZE,
+        status: Optional[str] = None,
+        after: Optional[int] = None,
+        include_description: bool = False
+) -> Dict[str, schemas_db.LibraryGroup]:
+    """
+    Получает библиотеку пользователя, сгруппированную по статусам, одним запросом.
+
+    Взаимодействия нумеруются оконными функциями внутри каждого статуса
+    (новые первыми) по индексу (user_id, status), там же считается их
+    количество. С таблицей фильмов соединяются только строки страницы, и
+    выбираются только поля для отображения (описание - по запросу).
+
+    Следующая страница статуса запрашивается курсором: status и after
+    (next_after предыдущей страницы).
+
+    Args:
+        db: Сессия базы данных.
+        user_id: ID пользователя.
+        limit: Количество фильмов каждого статуса на странице.
+        status: Вернуть только этот статус.
+        after: interaction_id, после которого начинается страница (нужен status).
+        include_description: Включить описания фильмов.
+
+    Raises:
+        ValueError: Если after передан без status.
+
+    Returns:
+        Словарь статус -> страница фильмов (все статусы, если status не задан).
+    """
+    if after is not None and status is None:
+        raise ValueError("after requires status")
+
+    ranked = db.query(
+        models_db.UserMovie.id.label("interaction_id"),
+        models_db.UserMovie.movie_id,
+        models_db.UserMovie.status,
+        models_db.UserMovie.rate,
+        func.row_number().over(
+            partition_by=models_db.UserMovie.status, order_by=models_db.UserMovie.id.desc()
+        ).label("position"),
+        func.count().over(partition_by=models_db.UserMovie.status).label("status_count")
+    ).filter(models_db.UserMovie.user_id == user_id)
+    if status:
+        ranked = ranked.filter(models_db.UserMovie.status == status)
+    ranked = ranked.subquery()
+
+    columns = [
+        ranked.c.interaction_id, ranked.c.status, ranked.c.rate, ranked.c.status_count,
+        models_db.Movie.id, models_db.Movie.title, models_db.Movie.year,
+        models_db.Movie.genres_str, models_db.Movie.rating_imdb
+    ]
+    if include_description:
+        columns.append(models_db.Movie.description)
+    query = (
+        db.query(*columns)
+        .join(models_db.Movie, models_db.Movie.id == ranked.c.movie_id)
+        .order_by(ranked.c.status, ranked.c.interaction_id.desc())
+    )
+    # Лишняя строка на статус показывает, что есть следующая страница
+    if after is not None:
+        query = query.filter(ranked.c.interaction_id < after).limit(limit + 1)
+    else:
+        query = query.filter(ranked.c.position <= limit + 1)
+    rows = query.all()
+
+    statuses = [InteractionStatusEnum(status)] if status else list(InteractionStatusEnum)
+    groups = {item.value: schemas_db.LibraryGroup() for item in statuses}
+    for row in rows:
+        group = groups[row.status.value]
+        group.count = row.status_count
+        if len(group.items) == limit:
+            group.next_after = group.items[-1].interaction_id
+            continue
+        group.items.append(schemas_db.LibraryItem(
+            interaction_id=row.interaction_id,
+            movie_id=row.id,
+            title=row.title,
+            year=row.year,
+            genres=row.genres_str.split(",") if row.genres_str else [],
+            rating_imdb=row.rating_imdb,
+            rate=row.rate,
+            description=row.description if include_description else None
+        ))
+
+    # За последней страницей строк нет, и количество не пришло вместе с ними
+    if after is not None and not rows:
+        groups[statuses[0].value].count = db.query(func.count(models_db.UserMovie.id)).filter(
+            models_db.UserMovie.user_id == user_id, models_db.UserMovie.status == status
+        ).scalar()
+    return groups
+
+
+def get_user_liked_movies(db: Session, user_id: int) -> list[MovieRecord]:
     """
     Получает список фильмов, которые пользователь отметил как 'liked'.
 
@@ -321,31 +735,90 @@ def get_user_liked_movies(db: Session, user_id: int) -> list[Type[Movie]]:
         user_id: ID пользователя.
 
     Returns:
-        Список понравившихся фильмов.
+        Список записей понравившихся фильмов.
     """
-    # Выполняем JOIN между таблицами Movie и UserMovie
-    return (
-        db.query(models_db.Movie)
+    # Выполняем JOIN между таблицами Movie и UserMovie; читаем только столбцы записи
+    rows = (
+        db.query(*MOVIE_RECORD_COLUMNS)
         .join(models_db.UserMovie, models_db.Movie.id == models_db.UserMovie.movie_id)
         .filter(models_db.UserMovie.user_id == user_id)
         .filter(models_db.UserMovie.status == InteractionStatusEnum.LIKED)
         .all()
     )
+    return [MovieRecord._make(row) for row in rows]
 
 
-def get_user_recommendations_movies(db: Session, movie_ids: list[int]) -> list[Type[Movie]]:
+def get_user_recommendations_movies(db: Session, movie_ids: list[int]) -> list[MovieRecord]:
     """
-    Получает список фильмов, которые пользователь отметил как 'liked'.
+    Получает записи рекомендованных фильмов в порядке рекомендательной системы.
 
     Args:
         db: Сессия базы данных.
         movie_ids: ID фильмов.
 
     Returns:
-        Список рекомендованных фильмов.
+        Список записей рекомендованных фильмов.
     """
+    return get_movie_records(db, movie_ids)
 
-    return db.query(models_db.Movie).filter(models_db.Movie.id.in_(movie_ids)).all()
+
+def get_precomputed_recommendations(
+        db: Session, user_id: int, user_version: int, count: Optional[int]
+) -> Optional[List[int]]:
+    """
+    Получает рекомендации, предрассчитанные фоновой задачей (app.jobs).
+
+    Список действителен, только если с момента расчета не менялись ни
+    библиотека пользователя, ни каталог, и рассчитан для того же количества
+    (переранжирование по разнообразию зависит от длины списка).
+
+    Args:
+        db: Сессия базы данных.
+        user_id: ID пользователя.
+        user_version: Текущая версия библиотеки пользователя.
+        count: Количество рекомендаций.
+
+    Returns:
+        ID фильмов или None, если действительного списка нет.
+    """
+    row = (
+        db.query(
+            models_db.UserRecommendation.interactions_version,
+            models_db.UserRecommendation.catalog_version,
+            models_db.UserRecommendation.count,
+            models_db.UserRecommendation.movie_ids
+        )
+        .filter(models_db.UserRecommendation.user_id == user_id)
+        .first()
+    )
+    if (
+            row is None or row.count != count or row.interactions_version != user_version
+            or str(row.catalog_version) != get_catalog_version(db)
+    ):
+        return None
+    return [int(movie_id) for movie_id in row.movie_ids.split(",") if movie_id]
+
+
+def save_precomputed_recommendations(db: Session, rows: List[dict]) -> None:
+    """
+    Заменяет предрассчитанные рекомендации пользователей.
+
+    Изменение не фиксируется: commit выполняет вызывающая функция.
+
+    Args:
+        db: Сессия базы данных.
+        rows: Словари с ключами user_id, interactions_version, catalog_version,
+            count и movie_ids (список ID).
+    """
+    if not rows:
+        return
+    db.query(models_db.UserRecommendation).filter(
+        models_db.UserRecommendation.user_id.in_([row["user_id"] for row in rows])
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(models_db.UserRecommendation, [
+        {**row, "movie_ids": ",".join(str(movie_id) for movie_id in row["movie_ids"])}
+        for row in rows
+    ])
 
 
 def get_user_interacted_movie_ids(db: Session, user_id: int) -> Set[int]:
@@ -359,11 +832,11 @@ def get_user_interacted_movie_ids(db: Session, user_id: int) -> Set[int]:
     Returns:
         Множество (set) ID фильмов.
     """
-    # Выбираем только уникальные movie_id для указанного пользователя
+    # Пара (user_id, movie_id) уникальна, поэтому DISTINCT не нужен:
+    # запрос читается целиком из индекса uq_user_movie_user_movie
     interactions = (
         db.query(models_db.UserMovie.movie_id)
         .filter(models_db.UserMovie.user_id == user_id)
-        .distinct()
         .all()
     )
     # Преобразуем список кортежей в множество для быстрого доступа
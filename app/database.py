@@ -1,15 +1,23 @@
+import itertools
+import logging
 import os
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
+from starlette.requests import HTTPConnection, Request
 
 load_dotenv()
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
-os.makedirs(DATA_DIR, exist_ok=True)
 
 # MySQL database configuration
 MYSQL_USER = os.getenv("MYSQL_USER")
@@ -17,19 +25,254 @@ MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_HOST = os.getenv("MYSQL_HOST", "localhost")
 MYSQL_PORT = os.getenv("MYSQL_PORT", "3306")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
-DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
+MYSQL_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}"
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Встроенная база SQLite для локального запуска, тестов и бенчмарков
+SQLITE_URL = f"sqlite:///{os.path.join(DATA_DIR, 'recofilm.db')}"
+
+# DATABASE_URL переопределяет MySQL из переменных MYSQL_*; значение "sqlite" - файл в DATA_DIR
+DATABASE_URL = os.getenv("DATABASE_URL") or MYSQL_URL
+if DATABASE_URL == "sqlite":
+    DATABASE_URL = SQLITE_URL
+
+# Реплики только для чтения (URL через запятую); без них все запросы идут в основную базу
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Сколько секунд после записи чтения пользователя выполняются в основной базе (отставание реплик)
+REPLICA_STICKY_SECONDS = float(os.getenv("RECOFILM_REPLICA_STICKY_SECONDS", "5"))
+# Через сколько секунд недоступная реплика проверяется снова
+REPLICA_RETRY_SECONDS = float(os.getenv("RECOFILM_REPLICA_RETRY_SECONDS", "30"))
+# Cookie клиента, недавно выполнившего запись: его чтения идут в основную базу
+PRIMARY_COOKIE = "recofilm_primary"
+
+logger = logging.getLogger(__name__)
+
+# Логировать SQL-команды (RECOFILM_SQL_ECHO=0 - выключить)
+SQL_ECHO = os.getenv("RECOFILM_SQL_ECHO", "1") == "1"
+
+# Настройки SQLite: WAL позволяет читать во время записи, NORMAL - без fsync на каждую транзакцию
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def create_db_engine(url: str = None, **kwargs) -> Engine:
+    """
+    Создает движок SQLAlchemy с настройками для выбранной СУБД.
+
+    Для SQLite включаются WAL и PRAGMA из SQLITE_PRAGMAS, каталог файла
+    базы создается при первом подключении, а база в памяти использует одно
+    общее соединение.
+
+    Args:
+        url: URL базы данных (по умолчанию DATABASE_URL).
+        **kwargs: Дополнительные аргументы create_engine.
+
+    Returns:
+        Движок базы данных.
+    """
+    url = make_url(url or DATABASE_URL)
+    kwargs.setdefault("echo", SQL_ECHO)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url, **kwargs)
+
+    in_memory = url.database in (None, "", ":memory:")
+    kwargs.setdefault("connect_args", {"check_same_thread": False})
+    if in_memory:
+        kwargs.setdefault("poolclass", StaticPool)
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "do_connect")
+    def _create_data_dir(dialect, conn_rec, cargs, cparams):
+        if not in_memory:
+            os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            if in_memory and "journal_mode" in pragma:
+                continue
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+class ReplicaSet:
+    """
+    Реплики только для чтения с проверкой доступности.
+
+    Реплики выбираются по кругу. Реплика, на которой не удалось выполнить
+    запрос, исключается на retry_seconds, после чего перед возвращением в
+    работу проверяется запросом SELECT 1. Если доступных реплик нет, чтение
+    выполняется в основной базе.
+    """
+
+    def __init__(self, engines: List[Engine], retry_seconds: float = REPLICA_RETRY_SECONDS):
+        self.engines = list(engines)
+        self.retry_seconds = retry_seconds
+        self._down_until: Dict[Engine, float] = {}
+        self._counter = itertools.count()
+
+    def choose(self) -> Optional[Engine]:
+        """Возвращает следующую доступную реплику или None."""
+        count = len(self.engines)
+        if not count:
+            return None
+        start = next(self._counter)
+        now = time.monotonic()
+        for offset in range(count):
+            replica = self.engines[(start + offset) % count]
+            down_until = self._down_until.get(replica)
+            if down_until is None or (down_until <= now and self.check(replica)):
+                return replica
+        return None
+
+    def check(self, replica: Engine) -> bool:
+        """Проверяет реплику запросом SELECT 1 и обновляет ее состояние."""
+        try:
+            with replica.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except DBAPIError:
+            self.mark_down(replica)
+            return False
+        if self._down_until.pop(replica, None) is not None:
+            logger.info("replica_up url=%s", replica.url.render_as_string(hide_password=True))
+        return True
+
+    def mark_down(self, replica: Engine) -> None:
+        """Исключает реплику из выбора на retry_seconds."""
+        self._down_until[replica] = time.monotonic() + self.retry_seconds
+        logger.warning(
+            "replica_down url=%s retry_seconds=%s",
+            replica.url.render_as_string(hide_password=True), self.retry_seconds
+        )
+
+    def healthy(self) -> List[Engine]:
+        """Возвращает реплики, не исключенные из выбора."""
+        now = time.monotonic()
+        return [replica for replica in self.engines if self._down_until.get(replica, 0) <= now]
+
+    def dispose(self) -> None:
+        """Закрывает соединения пулов всех реплик."""
+        for replica in self.engines:
+            replica.dispose()
+
+
+replicas = ReplicaSet([create_db_engine(url, pool_pre_ping=True) for url in DATABASE_REPLICA_URLS])
+
+# Чтения текущего HTTP-запроса выполняются в основной базе (клиент недавно выполнил запись)
+_read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+# Срок (time.monotonic), до которого чтения пользователя идут в основную базу
+_user_primary_until: Dict[int, float] = {}
+
+
+def track_user_write(db: Session, user_id: int) -> None:
+    """
+    Отмечает изменение данных пользователя в сессии.
+
+    После фиксации транзакции чтения этого пользователя в течение
+    REPLICA_STICKY_SECONDS выполняются в основной базе, чтобы он сразу видел
+    свои изменения, даже если реплики отстают.
+    """
+    db.info.setdefault("written_user_ids", set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_written_users(session: Session) -> None:
+    user_ids = session.info.pop("written_user_ids", None)
+    if not user_ids or not replicas.engines:
+        return
+    now = time.monotonic()
+    if len(_user_primary_until) > 10000:
+        for user_id, until in list(_user_primary_until.items()):
+            if until <= now:
+                _user_primary_until.pop(user_id, None)
+    for user_id in user_ids:
+        _user_primary_until[user_id] = now + REPLICA_STICKY_SECONDS
+
+
+def reads_pinned_to_primary(user_id: Optional[int] = None) -> bool:
+    """Проверяет, должны ли чтения (пользователя) выполняться в основной базе."""
+    if _read_from_primary.get():
+        return True
+    return user_id is not None and _user_primary_until.get(user_id, 0) > time.monotonic()
+
+
+def _is_replica_failure(error: DBAPIError) -> bool:
+    """Проверяет, что ошибка вызвана недоступностью базы, а не самим запросом."""
+    return error.connection_invalidated or isinstance(error, OperationalError)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _retry_read_on_primary(orm_execute_state) -> Optional[object]:
+    """
+    Повторяет в основной базе запрос, не выполненный на реплике.
+
+    Реплика исключается из выбора, а сессия до закрытия переключается на
+    основную базу, чтобы следующие запросы не ждали недоступную реплику.
+    Сессии только читают, поэтому повтор безопасен.
+    """
+    session = orm_execute_state.session
+    replica = session.info.get("replica")
+    if replica is None:
+        return None
+    try:
+        return orm_execute_state.invoke_statement()
+    except DBAPIError as e:
+        if not _is_replica_failure(e):
+            raise
+        replicas.mark_down(replica)
+        logger.warning("replica_failover error=%s", type(e.orig).__name__)
+    del session.info["replica"]
+    session.bind = engine
+    return orm_execute_state.invoke_statement(bind_arguments={"bind": engine})
+
+
+def get_read_session(user_id: Optional[int] = None) -> Session:
+    """
+    Создает сессию для чтения: на реплике, если она доступна.
+
+    Основная база используется, если реплики не настроены или недоступны,
+    а также для чтений пользователя (или клиента), недавно изменившего
+    данные. Если запрос на реплике завершился ошибкой соединения, реплика
+    исключается из выбора, а запрос повторяется в основной базе. Вызывающий
+    должен закрыть сессию.
+
+    Args:
+        user_id: ID пользователя, чьи данные читаются (для чтения своих записей).
+
+    Returns:
+        Сессия базы данных.
+    """
+    if not reads_pinned_to_primary(user_id):
+        replica = replicas.choose()
+        if replica is not None:
+            db = SessionLocal(bind=replica)
+            db.info["replica"] = replica
+            return db
+    return SessionLocal()
+
+
 def get_db_session():
+    """Создает и возвращает сессию БД. Вызывающий должен закрыть её."""
     return SessionLocal()
 
 
 def get_db_dependency():
+    """FastAPI-зависимость для получения сессии базы данных."""
     db = SessionLocal()
     try:
         yield db
@@ -37,5 +280,51 @@ def get_db_dependency():
         db.close()
 
 
-def create_db_and_tables():
-    Base.metadata.create_all(bind=engine)
+def get_read_db_dependency(request: Request):
+    """
+    FastAPI-зависимость для получения сессии только для чтения (GET-маршруты).
+
+    Сессия открывается на реплике (см. get_read_session); ID пользователя
+    берется из параметра пути user_id. Если запрос на реплике завершился
+    ошибкой соединения, он повторяется в основной базе, и маршрут отвечает
+    без ошибки.
+    """
+    user_id = request.path_params.get("user_id")
+    db = get_read_session(int(user_id) if str(user_id).isdigit() else None)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware для чтения своих записей при работе с репликами.
+
+    Успешный изменяющий запрос (POST, PUT, PATCH, DELETE) ставит клиенту
+    cookie PRIMARY_COOKIE на REPLICA_STICKY_SECONDS; пока она есть, чтения
+    его запросов выполняются в основной базе. Cookie действует во всех
+    процессах сервера, в отличие от отметок track_user_write.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _read_from_primary.set(PRIMARY_COOKIE in HTTPConnection(scope).cookies)
+        is_write = scope["method"] not in ("GET", "HEAD", "OPTIONS")
+
+        async def send_wrapper(message):
+            if is_write and message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = f"{PRIMARY_COOKIE}=1; Max-Age={int(REPLICA_STICKY_SECONDS)}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _read_from_primary.reset(token)
@@ -0,0 +1,336 @@
+# app/export.py
+
+"""
+Потоковая выгрузка каталога фильмов и взаимодействий пользователей.
+
+Строки читаются серверным курсором (yield_per) в виде кортежей столбцов,
+без ORM-объектов и без OFFSET, и сразу кодируются в NDJSON, CSV или
+Parquet (требуется пакет pyarrow), поэтому память не зависит от размера
+таблицы. Фильтр modified_since выгружает только строки, изменённые
+начиная с указанного времени (столбец updated_at).
+
+HTTP: GET /export/movies и GET /export/interactions.
+Командная строка (статистика пропускной способности выводится в stderr):
+
+    python -m app.export movies --format csv -o movies.csv
+    python -m app.export interactions --modified-since 2025-01-01T00:00:00
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal
+from sqlalchemy.orm import Session
+
+from . import models_db
+from .json_stream import NDJSON_MEDIA_TYPE, iter_ndjson
+
+# Строк в пакете серверного курсора и в одной группе строк Parquet
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+MEDIA_TYPES = {
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportColumn(NamedTuple):
+    """Столбец выгрузки: имя в файле, столбец модели и тип (int, float, str, datetime)."""
+    name: str
+    column: object
+    kind: str
+
+
+EXPORT_TABLES: Dict[str, List[ExportColumn]] = {
+    "movies": [
+        ExportColumn("id", models_db.Movie.id, "int"),
+        ExportColumn("title", models_db.Movie.title, "str"),
+        ExportColumn("year", models_db.Movie.year, "int"),
+        ExportColumn("genres", models_db.Movie.genres_str, "str"),
+        ExportColumn("description", models_db.Movie.description, "str"),
+        ExportColumn("rating_imdb", models_db.Movie.rating_imdb, "float"),
+        ExportColumn("vote_count", models_db.Movie.vote_count, "int"),
+        ExportColumn("updated_at", models_db.Movie.updated_at, "datetime"),
+    ],
+    "interactions": [
+        ExportColumn("id", models_db.UserMovie.id, "int"),
+        ExportColumn("user_id", models_db.UserMovie.user_id, "int"),
+        ExportColumn("movie_id", models_db.UserMovie.movie_id, "int"),
+        ExportColumn("status", models_db.UserMovie.status, "str"),
+        ExportColumn("rate", models_db.UserMovie.rate, "float"),
+        ExportColumn("updated_at", models_db.UserMovie.updated_at, "datetime"),
+    ],
+}
+
+router = APIRouter()
+
+
+def _plain(value):
+    """Приводит значение столбца к типу, одинаково кодируемому во всех форматах."""
+    if isinstance(value, models_db.InteractionStatusEnum):
+        return value.value
+    return value
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Приводит время со смещением часового пояса к UTC без смещения.
+
+    updated_at хранится без часового пояса в UTC (CURRENT_TIMESTAMP), поэтому
+    смещение нужно не отбросить, а перевести: 03:00+03:00 - это 00:00.
+    Время без смещения считается уже заданным в UTC.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def iter_export_rows(
+        db: Session,
+        table: str,
+        modified_since: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[tuple]:
+    """
+    Читает строки таблицы серверным курсором в порядке первичного ключа.
+
+    Args:
+        db: Сессия базы данных; должна оставаться открытой до конца итерации.
+        table: Имя выгрузки из EXPORT_TABLES.
+        modified_since: Выгружать только строки с updated_at >= modified_since
+            (время со смещением переводится в UTC).
+        batch_size: Количество строк, получаемых из курсора за раз.
+
+    Yields:
+        Кортежи значений в порядке столбцов EXPORT_TABLES[table].
+    """
+    columns = EXPORT_TABLES[table]
+    query = db.query(*(col.column for col in columns))
+    if modified_since is not None:
+        updated_at = next(col.column for col in columns if col.name == "updated_at")
+        since = to_naive_utc(modified_since)
+        if db.get_bind().dialect.name == "sqlite":
+            # SQLite сравнивает время как строки: CURRENT_TIMESTAMP пишется без долей секунды,
+            # а параметр DateTime - с ".000000", и строка, измененная в ту же секунду, была бы пропущена
+            since = literal(since.isoformat(sep=" ", timespec="microseconds" if since.microsecond else "seconds"))
+        query = query.filter(updated_at >= since)
+    query = query.order_by(columns[0].column)
+    for row in query.yield_per(batch_size):
+        yield tuple(_plain(value) for value in row)
+
+
+def _iter_ndjson(rows: Iterable[tuple], columns: List[ExportColumn], batch_size: int) -> Iterator[bytes]:
+    names = [col.name for col in columns]
+    items = (
+        {name: value.isoformat() if isinstance(value, datetime) else value for name, value in zip(names, row)}
+        for row in rows
+    )
+    return iter_ndjson(items, chunk_size=min(batch_size, 1000))
+
+
+def _iter_csv(rows: Iterable[tuple], columns: List[ExportColumn], batch_size: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([col.name for col in columns])
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % 1000 == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """Файлоподобный приемник, отдающий записанные байты порциями (для ParquetWriter)."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _iter_parquet(rows: Iterable[tuple], columns: List[ExportColumn], batch_size: int) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires the 'pyarrow' package") from e
+
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "datetime": pa.timestamp("us")}
+    schema = pa.schema([(col.name, types[col.kind]) for col in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+
+    def write_batch(batch: List[tuple]) -> bytes:
+        arrays = [pa.array([row[i] for row in batch], type=schema.field(i).type) for i in range(len(columns))]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        return sink.take()
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield write_batch(batch)
+            batch = []
+    if batch:
+        yield write_batch(batch)
+    writer.close()
+    yield sink.take()
+
+
+_WRITERS: Dict[str, Callable[[Iterable[tuple], List[ExportColumn], int], Iterator[bytes]]] = {
+    "ndjson": _iter_ndjson,
+    "csv": _iter_csv,
+    "parquet": _iter_parquet,
+}
+
+
+def iter_export(
+        db: Session,
+        table: str,
+        fmt: str = "ndjson",
+        modified_since: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Кодирует выгрузку таблицы в выбранный формат.
+
+    Args:
+        db: Сессия базы данных.
+        table: Имя выгрузки: 'movies' или 'interactions'.
+        fmt: Формат: 'ndjson', 'csv' или 'parquet'.
+        modified_since: Выгружать только строки, изменённые начиная с этого времени.
+        batch_size: Размер пакета чтения (и группы строк Parquet).
+
+    Yields:
+        Байтовые фрагменты файла выгрузки.
+    """
+    rows = iter_export_rows(db, table, modified_since=modified_since, batch_size=batch_size)
+    return _WRITERS[fmt](rows, EXPORT_TABLES[table], batch_size)
+
+
+def _stream_export(table: str, fmt: str, modified_since: Optional[datetime]) -> Iterator[bytes]:
+    """Выдает фрагменты выгрузки; поток читается после выхода из обработчика, поэтому сессия своя."""
+    from .database import get_read_session
+
+    db = get_read_session()
+    try:
+        yield from iter_export(db, table, fmt=fmt, modified_since=modified_since)
+    finally:
+        db.close()
+
+
+@router.get("/{table}", summary="Потоковая выгрузка фильмов или взаимодействий")
+def api_export(
+        table: str,
+        format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+        modified_since: Optional[datetime] = Query(None, description="Только строки, изменённые с этого времени"),
+):
+    """
+    API-эндпоинт потоковой выгрузки таблицы.
+
+    Args:
+        table: 'movies' или 'interactions'.
+        format: Формат выгрузки: ndjson, csv или parquet.
+        modified_since: Выгружать только строки с updated_at не раньше указанного времени.
+
+    Raises:
+        HTTPException: 404 для неизвестной таблицы, 501 если для Parquet не установлен pyarrow.
+
+    Returns:
+        Потоковый ответ с файлом выгрузки.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export table: {table}")
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    extension = "jsonl" if format == "ndjson" else format
+    return StreamingResponse(
+        _stream_export(table, format, modified_since),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'}
+    )
+
+
+class _CountingRows:
+    """Обертка над итератором строк, считающая их количество."""
+
+    def __init__(self, rows: Iterator[tuple]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def main():
+    from .database import get_db_session
+
+    parser = argparse.ArgumentParser(description="Потоковая выгрузка фильмов или взаимодействий")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES), help="Что выгружать")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson", help="Формат выгрузки")
+    parser.add_argument("--modified-since", type=datetime.fromisoformat, default=None,
+                        help="Только строки, изменённые с этого времени (ISO 8601)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Размер пакета чтения")
+    parser.add_argument("-o", "--output", default=None, help="Файл результата (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    session = get_db_session()
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        start_time = time.time()
+        rows = _CountingRows(iter_export_rows(session, args.table, args.modified_since, args.batch_size))
+        size = 0
+        for chunk in _WRITERS[args.format](rows, EXPORT_TABLES[args.table], args.batch_size):
+            output.write(chunk)
+            size += len(chunk)
+        elapsed = max(time.time() - start_time, 1e-9)
+        print(
+            f"Exported {rows.count} rows ({size / 1024 / 1024:.1f} MB) in {elapsed:.2f} sec: "
+            f"{rows.count / elapsed:.0f} rows/sec, {size / 1024 / 1024 / elapsed:.1f} MB/sec",
+            file=sys.stderr
+        )
+    finally:
+        if args.output:
+            output.close()
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# app/interactions_import.py
+
+"""
+Массовый импорт взаимодействий пользователя из JSON Lines или CSV.
+
+Каждая строка описывает одно взаимодействие: movie_id, status и
+необязательную оценку rate. Строки проверяются по кэшированному множеству
+ID фильмов и записываются пачками через crud.bulk_upsert_user_movie_interactions.
+
+Используется эндпоинтом POST /users/{user_id}/interactions/bulk и как
+утилита командной строки:
+
+    python -m app.interactions_import --user-id 1 library.csv
+"""
+
+import argparse
+import csv
+import io
+import time
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from . import crud, schemas_db
+
+IMPORT_FORMATS = ("jsonl", "csv")
+DEFAULT_BATCH_SIZE = 1000
+# Сколько ошибок возвращать клиенту; остальные только учитываются в skipped
+MAX_REPORTED_ERRORS = 100
+# Время жизни кэша ID фильмов в секундах
+MOVIE_IDS_TTL = 300.0
+
+_movie_ids_cache: Optional[Set[int]] = None
+_movie_ids_loaded_at = 0.0
+
+
+def get_known_movie_ids(db: Session, force_reload: bool = False) -> Set[int]:
+    """
+    Возвращает кэшированное множество ID фильмов каталога.
+
+    Args:
+        db: Сессия базы данных.
+        force_reload: Перечитать множество из БД, даже если кэш не устарел.
+
+    Returns:
+        Множество (set) ID фильмов.
+    """
+    global _movie_ids_cache, _movie_ids_loaded_at
+    now = time.monotonic()
+    if force_reload or _movie_ids_cache is None or now - _movie_ids_loaded_at > MOVIE_IDS_TTL:
+        _movie_ids_cache = crud.get_all_movie_ids(db)
+        _movie_ids_loaded_at = now
+    return _movie_ids_cache
+
+
+def invalidate_known_movie_ids() -> None:
+    """Сбрасывает кэш ID фильмов (например, после загрузки каталога)."""
+    global _movie_ids_cache
+    _movie_ids_cache = None
+
+
+def detect_format(content_type: Optional[str]) -> str:
+    """
+    Определяет формат импорта по заголовку Content-Type.
+
+    Args:
+        content_type: Значение заголовка Content-Type.
+
+    Returns:
+        'csv' для text/csv, иначе 'jsonl'.
+    """
+    if content_type and content_type.split(";")[0].strip().lower() == "text/csv":
+        return "csv"
+    return "jsonl"
+
+
+def iter_import_rows(text: str, fmt: str) -> Iterator[Tuple[int, schemas_db.UserMovieImport | str]]:
+    """
+    Разбирает текст импорта и проверяет каждую строку.
+
+    Args:
+        text: Содержимое файла импорта.
+        fmt: Формат ('jsonl' или 'csv'). CSV должен содержать заголовок
+            movie_id,status,rate.
+
+    Yields:
+        Пары (номер строки, схема взаимодействия) или (номер строки, текст ошибки).
+    """
+    if fmt == "jsonl":
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, schemas_db.UserMovieImport.model_validate_json(line)
+            except ValidationError as e:
+                yield line_no, f"line {line_no}: {e.errors()[0]['msg']}"
+    elif fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        # Первая строка файла - заголовок
+        for line_no, row in enumerate(reader, start=2):
+            if row.get("rate") == "":
+                row["rate"] = None
+            try:
+                yield line_no, schemas_db.UserMovieImport.model_validate(row)
+            except ValidationError as e:
+                yield line_no, f"line {line_no}: {e.errors()[0]['msg']}"
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def import_user_interactions(
+        db: Session,
+        user_id: int,
+        text: str,
+        fmt: str = "jsonl",
+        batch_size: int = DEFAULT_BATCH_SIZE
+) -> schemas_db.InteractionsImportResult:
+    """
+    Импортирует взаимодействия пользователя пачками.
+
+    Повторы одного фильма внутри пачки схлопываются (побеждает последняя
+    строка). Существование пользователя должен проверить вызывающий код.
+
+    Args:
+        db: Сессия базы данных.
+        user_id: ID пользователя.
+        text: Содержимое файла импорта.
+        fmt: Формат ('jsonl' или 'csv').
+        batch_size: Количество взаимодействий в одной пачке.
+
+    Returns:
+        Итог импорта: количество записанных и пропущенных строк и ошибки.
+    """
+    result = schemas_db.InteractionsImportResult()
+    known_ids = get_known_movie_ids(db)
+    reloaded = False
+    batch: Dict[int, schemas_db.UserMovieImport] = {}
+
+    def skip(message: str) -> None:
+        result.skipped += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(message)
+
+    for line_no, item in iter_import_rows(text, fmt):
+        if isinstance(item, str):
+            skip(item)
+            continue
+
+        if item.movie_id not in known_ids and not reloaded:
+            # Фильм мог быть добавлен после заполнения кэша: перечитываем один раз
+            known_ids = get_known_movie_ids(db, force_reload=True)
+            reloaded = True
+        if item.movie_id not in known_ids:
+            skip(f"line {line_no}: movie {item.movie_id} not found")
+            continue
+
+        batch[item.movie_id] = item
+        if len(batch) >= batch_size:
+            result.imported += crud.bulk_upsert_user_movie_interactions(db, user_id, list(batch.values()))
+            batch.clear()
+
+    if batch:
+        result.imported += crud.bulk_upsert_user_movie_interactions(db, user_id, list(batch.values()))
+
+    return result
+
+
+def main():
+    from .database import get_db_session
+
+    parser = argparse.ArgumentParser(description="Массовый импорт взаимодействий пользователя")
+    parser.add_argument("path", help="Файл JSON Lines или CSV (movie_id,status,rate)")
+    parser.add_argument("--user-id", type=int, required=True, help="ID пользователя")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Формат файла (по умолчанию по расширению)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Размер пачки")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    with open(args.path, encoding="utf-8") as f:
+        text = f.read()
+
+    session = get_db_session()
+    try:
+        if not crud.get_user(session, user_id=args.user_id):
+            raise SystemExit(f"User {args.user_id} not found")
+        start_time = time.time()
+        result = import_user_interactions(session, args.user_id, text, fmt, args.batch_size)
+        print(f"Imported: {result.imported}, skipped: {result.skipped} "
+              f"in {time.time() - start_time:.2f} sec")
+        for error in result.errors:
+            print(f"  {error}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
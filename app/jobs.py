@@ -0,0 +1,701 @@
+# app/jobs.py
+
+"""
+Фоновые задачи обслуживания: загрузка каталога, перестроение индекса,
+пересчет популярности, предрасчет рекомендаций, очистка журнала изменений.
+
+Состояние задач хранится в таблице jobs, поэтому поставить задачу может
+любой процесс (API администратора app.admin, командная строка, расписание),
+а выполнить - любой процесс с запущенным JobRunner:
+
+    - отдельный процесс:  python -m app.jobs worker --workers 2
+    - процесс приложения: RECOFILM_JOB_WORKERS=1 (потоки пула задач, не потоки запросов)
+
+Задача захватывается условным UPDATE по статусу, поэтому несколько
+исполнителей не выполняют одну задачу дважды. Исполнитель выполняет не
+больше workers задач одновременно и периодически отмечает их признаком
+жизни (heartbeat_at); задача, исполнитель которой пропал, помечается
+failed. Задача сообщает прогресс через JobContext.progress, там же
+проверяется запрошенная отмена.
+
+Расписание задается в формате cron (минута час день месяц день_недели)
+переменной RECOFILM_JOB_SCHEDULES: "popularity=0 * * * *;prune_catalog_changes=30 3 * * *".
+
+    python -m app.jobs enqueue precompute_recommendations --param count=10
+    python -m app.jobs list
+    python -m app.jobs cancel 42
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+from sqlalchemy import exists, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import catalog_feed, crud, models_db, popularity
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# Потоков пула задач в процессе приложения (0 - задачи выполняет только python -m app.jobs worker)
+JOB_WORKERS = int(os.getenv("RECOFILM_JOB_WORKERS", "0"))
+# Как часто исполнитель ищет новые задачи и проверяет расписание (сек)
+JOB_POLL_SECONDS = float(os.getenv("RECOFILM_JOB_POLL_SECONDS", "5"))
+# Как часто исполнитель отмечает признак жизни своих задач (сек)
+HEARTBEAT_SECONDS = 15.0
+# Задача без признака жизни дольше этого считается потерянной (сек)
+STALE_SECONDS = float(os.getenv("RECOFILM_JOB_STALE_SECONDS", "120"))
+# Не чаще чем раз в столько секунд прогресс записывается в базу
+PROGRESS_INTERVAL = 1.0
+# Расписание по умолчанию: имя задачи=выражение cron через ';'. Пересчет популярности
+# не меняет версию каталога, поэтому не отменяет предрасчет рекомендаций
+DEFAULT_SCHEDULES = "popularity=0 * * * *;precompute_recommendations=30 * * * *;prune_catalog_changes=30 3 * * *"
+JOB_SCHEDULES = os.getenv("RECOFILM_JOB_SCHEDULES", DEFAULT_SCHEDULES)
+
+# Длина предрассчитанного списка (совпадает с количеством по умолчанию в маршрутах рекомендаций)
+PRECOMPUTED_COUNT = 10
+# Пользователей в одной транзакции предрасчета
+PRECOMPUTE_BATCH = 500
+
+
+class JobCancelled(BaseException):
+    """
+    Задача отменена администратором.
+
+    Наследуется от BaseException (как asyncio.CancelledError), чтобы
+    обработчики except Exception внутри задач не поглощали отмену.
+    """
+
+
+# --- Расписание ---
+
+CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+
+def _parse_cron_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    """Разбирает поле cron ('*', '5', '1-5', '*/15', '0,30') в множество значений."""
+    values = set()
+    for item in text.split(","):
+        base, _, step_text = item.partition("/")
+        step = int(step_text) if step_text else 1
+        if base == "*":
+            start, stop = low, high
+        elif "-" in base:
+            start, stop = (int(value) for value in base.split("-", 1))
+        else:
+            start = int(base)
+            stop = high if step_text else start
+        if step < 1 or start < low or stop > high or start > stop:
+            raise ValueError(f"Invalid cron field '{text}': values must be within {low}-{high}")
+        values.update(range(start, stop + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    Расписание в формате cron: минута, час, день месяца, месяц, день недели (0 и 7 - воскресенье).
+
+    Как и в cron, если ограничены и день месяца, и день недели, достаточно
+    совпадения любого из них.
+    """
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != len(CRON_FIELDS):
+            raise ValueError(f"Cron expression '{expression}' must have {len(CRON_FIELDS)} fields")
+        self.expression = " ".join(parts)
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(part, low, high) for part, (_, low, high) in zip(parts, CRON_FIELDS)
+        )
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def matches(self, moment: datetime) -> bool:
+        """Проверяет, приходится ли запуск на минуту moment."""
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        day_matches = moment.day in self.days
+        weekday_matches = moment.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+
+def parse_schedules(text: str) -> Dict[str, CronSchedule]:
+    """
+    Разбирает расписание задач вида "popularity=0 * * * *;prune_catalog_changes=30 3 * * *".
+
+    Args:
+        text: Пары имя задачи=выражение cron через ';'.
+
+    Raises:
+        ValueError: Если задача неизвестна или выражение cron некорректно.
+
+    Returns:
+        Словарь имя задачи -> расписание.
+    """
+    schedules = {}
+    for item in text.split(";"):
+        if not item.strip():
+            continue
+        name, separator, expression = item.partition("=")
+        name = name.strip()
+        if not separator or name not in TASKS:
+            raise ValueError(f"Invalid job schedule '{item.strip()}': unknown task '{name}'")
+        schedules[name] = CronSchedule(expression)
+    return schedules
+
+
+# --- Состояние задач ---
+
+def enqueue_job(
+        db: Session, name: str, params: Optional[Dict[str, Any]] = None, dedupe_key: Optional[str] = None
+) -> models_db.Job:
+    """
+    Ставит задачу в очередь.
+
+    Одновременно выполняется не больше одной задачи с данным именем: если
+    такая задача уже стоит в очереди или выполняется, возвращается она.
+
+    Args:
+        db: Сессия базы данных.
+        name: Имя задачи (ключ TASKS).
+        params: Именованные параметры функции задачи (JSON).
+        dedupe_key: Уникальный ключ запуска (задачи расписания); повторная
+            постановка с тем же ключом возвращает уже созданную задачу.
+
+    Raises:
+        ValueError: Если задача неизвестна.
+
+    Returns:
+        Задача.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown job '{name}'. Available: {', '.join(sorted(TASKS))}")
+
+    active = (
+        db.query(models_db.Job)
+        .filter(models_db.Job.name == name, models_db.Job.status.in_(ACTIVE_STATUSES))
+        .order_by(models_db.Job.id)
+        .first()
+    )
+    if active is not None:
+        return active
+
+    job = models_db.Job(
+        name=name, status=JOB_QUEUED, params=json.dumps(params or {}), progress=0.0,
+        cancel_requested=False, dedupe_key=dedupe_key, created_at=datetime.now()
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Другой процесс уже поставил задачу этого запуска расписания
+        db.rollback()
+        return db.query(models_db.Job).filter(models_db.Job.dedupe_key == dedupe_key).one()
+    db.refresh(job)
+    logger.info("Job queued", extra={"job_id": job.id, "job": name})
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[models_db.Job]:
+    """Получает задачу по ID."""
+    return db.query(models_db.Job).filter(models_db.Job.id == job_id).first()
+
+
+def list_jobs(
+        db: Session, status: Optional[str] = None, name: Optional[str] = None, limit: int = 50
+) -> List[models_db.Job]:
+    """
+    Получает последние задачи, начиная с новых.
+
+    Args:
+        db: Сессия базы данных.
+        status: Только задачи с этим статусом.
+        name: Только задачи с этим именем.
+        limit: Максимальное количество задач.
+
+    Returns:
+        Список задач.
+    """
+    query = db.query(models_db.Job)
+    if status:
+        query = query.filter(models_db.Job.status == status)
+    if name:
+        query = query.filter(models_db.Job.name == name)
+    return query.order_by(models_db.Job.id.desc()).limit(limit).all()
+
+
+def cancel_job(db: Session, job_id: int) -> Optional[models_db.Job]:
+    """
+    Отменяет задачу.
+
+    Задача из очереди отменяется сразу; выполняющаяся задача получает
+    запрос отмены и останавливается при следующем сообщении о прогрессе.
+    Завершенная задача не изменяется.
+
+    Args:
+        db: Сессия базы данных.
+        job_id: ID задачи.
+
+    Returns:
+        Задача или None, если она не найдена.
+    """
+    job = models_db.Job
+    db.query(job).filter(job.id == job_id, job.status == JOB_QUEUED).update(
+        {job.status: JOB_CANCELLED, job.finished_at: datetime.now()}, synchronize_session=False
+    )
+    db.query(job).filter(job.id == job_id, job.status == JOB_RUNNING).update(
+        {job.cancel_requested: True}, synchronize_session=False
+    )
+    db.commit()
+    return get_job(db, job_id)
+
+
+def claim_job(db: Session, worker: str) -> Optional[int]:
+    """
+    Захватывает самую старую задачу из очереди.
+
+    Захват - UPDATE с условием status='queued': из нескольких исполнителей
+    задачу получает тот, чье обновление изменило строку.
+
+    Args:
+        db: Сессия базы данных.
+        worker: Идентификатор исполнителя.
+
+    Returns:
+        ID захваченной задачи или None, если очередь пуста.
+    """
+    job = models_db.Job
+    candidates = db.query(job.id).filter(job.status == JOB_QUEUED).order_by(job.id).limit(10).all()
+    for (job_id,) in candidates:
+        now = datetime.now()
+        claimed = db.query(job).filter(job.id == job_id, job.status == JOB_QUEUED).update(
+            {job.status: JOB_RUNNING, job.started_at: now, job.heartbeat_at: now, job.worker: worker},
+            synchronize_session=False
+        )
+        db.commit()
+        if claimed:
+            return job_id
+    return None
+
+
+def fail_stale_jobs(db: Session, older_than: datetime) -> int:
+    """Помечает failed выполняющиеся задачи без признака жизни с момента older_than."""
+    job = models_db.Job
+    failed = db.query(job).filter(job.status == JOB_RUNNING, job.heartbeat_at < older_than).update(
+        {job.status: JOB_FAILED, job.finished_at: datetime.now(), job.error: "Job worker stopped responding"},
+        synchronize_session=False
+    )
+    db.commit()
+    if failed:
+        logger.warning("Stale jobs marked as failed", extra={"jobs": failed})
+    return failed
+
+
+def finish_job(db: Session, job_id: int, status: str, result: Any = None, error: Optional[str] = None) -> None:
+    """Записывает итог выполнения задачи."""
+    job = models_db.Job
+    values = {job.status: status, job.finished_at: datetime.now(), job.error: error}
+    if status == JOB_SUCCEEDED:
+        values[job.progress] = 1.0
+        values[job.result] = json.dumps(result, default=str) if result is not None else None
+    db.query(job).filter(job.id == job_id).update(values, synchronize_session=False)
+    db.commit()
+
+
+def describe_job(job: models_db.Job) -> dict:
+    """Преобразует задачу в словарь для ответа API (параметры и результат - из JSON)."""
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status,
+        "params": json.loads(job.params) if job.params else {},
+        "progress": job.progress or 0.0,
+        "message": job.message,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "cancel_requested": bool(job.cancel_requested),
+        "worker": job.worker,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# --- Выполнение ---
+
+class JobContext:
+    """Связь выполняющейся задачи с ее строкой в jobs: прогресс и отмена."""
+
+    def __init__(self, job_id: int, session_factory: Callable[[], Session] = SessionLocal):
+        self.job_id = job_id
+        self._session_factory = session_factory
+        self._next_update = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Сообщает прогресс задачи и проверяет, не запрошена ли отмена.
+
+        Запись выполняется в отдельной сессии (не фиксирует транзакцию задачи)
+        и не чаще раза в PROGRESS_INTERVAL секунд, если не задан force.
+
+        Args:
+            fraction: Доля выполненной работы от 0 до 1.
+            message: Описание текущего шага.
+            force: Записать прогресс независимо от интервала.
+
+        Raises:
+            JobCancelled: Если задача отменена.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_update:
+            return
+        self._next_update = now + PROGRESS_INTERVAL
+
+        job = models_db.Job
+        values = {job.progress: min(max(fraction, 0.0), 1.0), job.heartbeat_at: datetime.now()}
+        if message is not None:
+            values[job.message] = message[:255]
+        session = self._session_factory()
+        try:
+            session.query(job).filter(job.id == self.job_id).update(values, synchronize_session=False)
+            cancel_requested = session.query(job.cancel_requested).filter(job.id == self.job_id).scalar()
+            session.commit()
+        finally:
+            session.close()
+        if cancel_requested:
+            raise JobCancelled(f"Job {self.job_id} cancelled")
+
+
+class JobRunner:
+    """
+    Исполнитель задач с ограниченным пулом потоков.
+
+    Поток-диспетчер раз в poll_interval секунд ставит задачи расписания,
+    отмечает признак жизни своих задач, помечает потерянные задачи других
+    исполнителей и захватывает задачи из очереди, пока в пуле есть
+    свободные потоки.
+    """
+
+    def __init__(
+            self,
+            workers: int = 1,
+            schedules: Optional[Dict[str, CronSchedule]] = None,
+            session_factory: Callable[[], Session] = SessionLocal,
+            poll_interval: float = JOB_POLL_SECONDS
+    ):
+        self.workers = max(1, workers)
+        self.schedules = parse_schedules(JOB_SCHEDULES) if schedules is None else schedules
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recofilm-job")
+        self._running: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_schedule_minute: Optional[datetime] = None
+        self._next_heartbeat = 0.0
+
+    def start(self) -> "JobRunner":
+        """Запускает поток-диспетчер."""
+        self._thread = threading.Thread(target=self._loop, name="recofilm-jobs", daemon=True)
+        self._thread.start()
+        logger.info("Job runner started", extra={"worker": self.worker_id, "workers": self.workers})
+        return self
+
+    def stop(self, wait: bool = False) -> None:
+        """
+        Останавливает диспетчер и запрашивает отмену выполняющихся задач.
+
+        Args:
+            wait: Дождаться завершения выполняющихся задач.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            running = list(self._running)
+        if running:
+            session = self._session_factory()
+            try:
+                for job_id in running:
+                    cancel_job(session, job_id)
+            finally:
+                session.close()
+        self._executor.shutdown(wait=wait)
+
+    def run_pending(self) -> int:
+        """
+        Выполняет один шаг диспетчера.
+
+        Returns:
+            Количество захваченных задач.
+        """
+        session = self._session_factory()
+        try:
+            self._enqueue_scheduled(session)
+            self._heartbeat(session)
+            claimed = 0
+            while not self._stop.is_set():
+                with self._lock:
+                    if len(self._running) >= self.workers:
+                        break
+                job_id = claim_job(session, self.worker_id)
+                if job_id is None:
+                    break
+                with self._lock:
+                    self._running.add(job_id)
+                self._executor.submit(self._execute, job_id)
+                claimed += 1
+            return claimed
+        finally:
+            session.close()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Job dispatcher step failed")
+            self._stop.wait(self.poll_interval)
+
+    def _enqueue_scheduled(self, db: Session) -> None:
+        """Ставит задачи, время запуска которых пришлось на текущую минуту."""
+        minute = datetime.now().replace(second=0, microsecond=0)
+        if minute == self._last_schedule_minute:
+            return
+        self._last_schedule_minute = minute
+        for name, schedule in self.schedules.items():
+            if schedule.matches(minute):
+                enqueue_job(db, name, dedupe_key=f"{name}@{minute:%Y-%m-%dT%H:%M}")
+
+    def _heartbeat(self, db: Session) -> None:
+        """Отмечает признак жизни своих задач и помечает потерянные задачи."""
+        now = time.monotonic()
+        if now < self._next_heartbeat:
+            return
+        self._next_heartbeat = now + HEARTBEAT_SECONDS
+        with self._lock:
+            running = list(self._running)
+        if running:
+            db.query(models_db.Job).filter(models_db.Job.id.in_(running)).update(
+                {models_db.Job.heartbeat_at: datetime.now()}, synchronize_session=False
+            )
+            db.commit()
+        fail_stale_jobs(db, datetime.now() - timedelta(seconds=STALE_SECONDS))
+
+    def _execute(self, job_id: int) -> None:
+        """Выполняет задачу в потоке пула и записывает итог."""
+        session = self._session_factory()
+        status, result, error = JOB_FAILED, None, None
+        try:
+            job = get_job(session, job_id)
+            params = json.loads(job.params) if job.params else {}
+            logger.info("Job started", extra={"job_id": job_id, "job": job.name})
+            start_time = time.time()
+            result = TASKS[job.name](session, JobContext(job_id, self._session_factory), **params)
+            status = JOB_SUCCEEDED
+            logger.info(
+                "Job finished",
+                extra={"job_id": job_id, "job": job.name, "elapsed_sec": round(time.time() - start_time, 2)}
+            )
+        except JobCancelled:
+            session.rollback()
+            status = JOB_CANCELLED
+            logger.info("Job cancelled", extra={"job_id": job_id})
+        except Exception:
+            session.rollback()
+            error = traceback.format_exc()
+            logger.exception("Job failed", extra={"job_id": job_id})
+        finally:
+            session.close()
+            finish_session = self._session_factory()
+            try:
+                finish_job(finish_session, job_id, status, result, error)
+            finally:
+                finish_session.close()
+            with self._lock:
+                self._running.discard(job_id)
+
+
+# --- Задачи ---
+
+# Имя задачи -> функция (db, context, **params), возвращающая результат в JSON-совместимом виде
+TASKS: Dict[str, Callable[..., Any]] = {}
+
+
+def task(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def register(func: Callable[..., Any]) -> Callable[..., Any]:
+        TASKS[name] = func
+        return func
+    return register
+
+
+def describe_task(name: str) -> str:
+    """Возвращает первую строку docstring задачи как её описание."""
+    return (TASKS[name].__doc__ or name).strip().splitlines()[0]
+
+
+@task("load_movies")
+def load_movies_job(db: Session, context: JobContext) -> dict:
+    """Загрузка датасета фильмов в каталог (film_advisor_lib.load_all_movies)."""
+    from film_advisor_lib.load_all_movies import ingest_movies, read_movies_dataset
+
+    context.progress(0.0, "Downloading dataset", force=True)
+    movies_to_load = read_movies_dataset()
+    context.progress(0.05, f"Movies to ingest: {len(movies_to_load)}", force=True)
+    ingest_movies(
+        db, movies_to_load, progress=lambda fraction, message: context.progress(0.05 + 0.9 * fraction, message)
+    )
+    return {"movies": db.query(func.count(models_db.Movie.id)).scalar()}
+
+
+@task("popularity")
+def popularity_job(db: Session, context: JobContext, size: int = popularity.POPULARITY_SIZE) -> dict:
+    """Пересчет рейтинга популярности (app.popularity)."""
+    return {"movies": popularity.recompute_popularity(db, size=size)}
+
+
+@task("catalog_rebuild")
+def catalog_rebuild_job(db: Session, context: JobContext) -> dict:
+    """Перестроение кэшей и индекса каталога рекомендаций во всех процессах."""
+    version = catalog_feed.record_catalog_reload(db)
+    db.commit()
+    return {"catalog_version": version}
+
+
+@task("precompute_recommendations")
+def precompute_recommendations_job(
+        db: Session, context: JobContext, count: int = PRECOMPUTED_COUNT, batch_size: int = PRECOMPUTE_BATCH
+) -> dict:
+    """Предрасчет рекомендаций пользователей с историей для текущей версии каталога."""
+    from film_advisor_lib.recommendation_service import get_recommended_movies, load_catalog_snapshot
+
+    # Метка - версия снимка, по которому считаются рекомендации, а не версия в базе:
+    # изменение каталога во время загрузки снимка сделает строки устаревшими, а не ошибочными
+    catalog_version = int(load_catalog_snapshot(db).version)
+    users = (
+        db.query(models_db.User.id, models_db.User.interactions_version)
+        .filter(exists().where(models_db.UserMovie.user_id == models_db.User.id))
+        .order_by(models_db.User.id)
+        .all()
+    )
+    rows, precomputed = [], 0
+    for position, user in enumerate(users, start=1):
+        movie_ids = get_recommended_movies(db, user.id, n=count)
+        if movie_ids:
+            rows.append({
+                "user_id": user.id, "interactions_version": user.interactions_version,
+                "catalog_version": catalog_version, "count": count, "movie_ids": movie_ids,
+                "computed_at": datetime.now(),
+            })
+        if len(rows) >= batch_size or position == len(users):
+            crud.save_precomputed_recommendations(db, rows)
+            db.commit()
+            precomputed += len(rows)
+            rows = []
+            context.progress(position / len(users), f"Users: {position}/{len(users)}", force=position == len(users))
+    return {"users": len(users), "precomputed": precomputed, "catalog_version": catalog_version}
+
+
+@task("prune_catalog_changes")
+def prune_catalog_changes_job(db: Session, context: JobContext, days: float = 7.0) -> dict:
+    """Удаление старых записей журнала изменений каталога (app.catalog_feed)."""
+    return {"deleted": catalog_feed.prune_movie_changes(db, datetime.now() - timedelta(days=days))}
+
+
+def _parse_param(text: str) -> tuple:
+    """Разбирает параметр командной строки key=value (значение - JSON или строка)."""
+    key, separator, value = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Parameter '{text}' must be key=value")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main():
+    from .database import get_db_session
+    from .metrics import configure_logging
+
+    parser = argparse.ArgumentParser(description="Фоновые задачи RecoFilm")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="Запустить исполнитель задач")
+    worker_parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="Задач одновременно")
+    worker_parser.add_argument("--no-schedule", action="store_true", help="Не ставить задачи по расписанию")
+    enqueue_parser = subparsers.add_parser("enqueue", help="Поставить задачу в очередь")
+    enqueue_parser.add_argument("name", choices=sorted(TASKS), help="Имя задачи")
+    enqueue_parser.add_argument("--param", type=_parse_param, action="append", default=[],
+                                help="Параметр задачи key=value")
+    list_parser = subparsers.add_parser("list", help="Показать последние задачи")
+    list_parser.add_argument("--status", default=None, help="Только задачи с этим статусом")
+    list_parser.add_argument("--limit", type=int, default=20, help="Количество задач")
+    cancel_parser = subparsers.add_parser("cancel", help="Отменить задачу")
+    cancel_parser.add_argument("job_id", type=int, help="ID задачи")
+    subparsers.add_parser("tasks", help="Показать доступные задачи и расписание")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        configure_logging()
+        runner = JobRunner(args.workers, schedules={} if args.no_schedule else None).start()
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+        print(f"Job worker {runner.worker_id} started with {runner.workers} workers")
+        try:
+            stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        runner.stop(wait=True)
+        return
+
+    if args.command == "tasks":
+        schedules = parse_schedules(JOB_SCHEDULES)
+        for name in sorted(TASKS):
+            schedule = schedules[name].expression if name in schedules else "-"
+            print(f"{name:<28} {schedule:<16} {describe_task(name)}")
+        return
+
+    session = get_db_session()
+    try:
+        if args.command == "enqueue":
+            job = enqueue_job(session, args.name, dict(args.param))
+            print(f"Job {job.id} ({job.name}): {job.status}")
+        elif args.command == "cancel":
+            job = cancel_job(session, args.job_id)
+            print(f"Job {args.job_id} not found" if job is None else f"Job {job.id} ({job.name}): {job.status}")
+        else:
+            for job in list_jobs(session, status=args.status, limit=args.limit):
+                print(f"{job.id:>6} {job.name:<28} {job.status:<10} {job.progress or 0.0:>6.1%} "
+                      f"{job.created_at:%Y-%m-%d %H:%M:%S}  {job.message or ''}")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
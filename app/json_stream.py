@@ -0,0 +1,85 @@
+# app/json_stream.py
+
+"""
+Быстрая сериализация списков в JSON для эндпоинтов, возвращающих много строк.
+
+Ответ собирается из готовых словарей без валидации Pydantic и кодируется
+orjson (если пакет установлен, иначе - стандартным json). Большие выборки
+отдаются потоком - JSON-массивом или NDJSON (одна запись на строку), -
+без построения всего ответа в памяти.
+"""
+
+import json
+from typing import Any, Iterable, Iterator
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Сколько записей объединяется в один фрагмент потокового ответа
+STREAM_CHUNK_SIZE = 500
+
+
+def dumps(obj: Any) -> bytes:
+    """Кодирует объект в компактный JSON (UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON-ответ, кодируемый через dumps() без jsonable_encoder."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def iter_json_array(items: Iterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Кодирует последовательность как JSON-массив, фрагментами по chunk_size записей.
+
+    Args:
+        items: Сериализуемые объекты (обычно словари).
+        chunk_size: Количество записей в одном фрагменте.
+
+    Yields:
+        Байтовые фрагменты, которые вместе образуют JSON-массив.
+    """
+    yield b"["
+    first = True
+    chunk = []
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield (b"" if first else b",") + b",".join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + b",".join(chunk)
+    yield b"]"
+
+
+def iter_ndjson(items: Iterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Кодирует последовательность как NDJSON, фрагментами по chunk_size записей.
+
+    Args:
+        items: Сериализуемые объекты (обычно словари).
+        chunk_size: Количество записей в одном фрагменте.
+
+    Yields:
+        Байтовые фрагменты; каждая запись занимает одну строку.
+    """
+    chunk = []
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
@@ -3,50 +3,167 @@
 """
 Основной файл приложения FastAPI.
 
-Определяет экземпляр FastAPI, настраивает маршрутизаторы, шаблоны,
-статические файлы и основные маршруты приложения.
+Определяет фабрику приложения create_app, настраивает маршрутизаторы,
+шаблоны, статические файлы и основные маршруты приложения.
+
+Импорт модуля не обращается к базе данных и не загружает рекомендательную
+систему: эта работа выполняется хуками запуска (lifespan) или при первом
+запросе. Запуск через фабрику:
+
+    uvicorn --factory app.main:create_app
 """
 
+import gc
 import os
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Callable, Optional, Sequence
 
-from fastapi import FastAPI, Depends, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import APIRouter, FastAPI, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from app import crud, users, movies
-from app.database import create_db_and_tables, get_db_dependency
-
-# --- Инициализация приложения FastAPI ---
-app = FastAPI(
-    title="RecoFilm",
-    description="Система рекомендаций фильмов",
-    version="2.0.0"
-)
+from app import admin, crud, export, jobs, metrics, query_audit, users, movies
+from app.database import engine, get_read_db_dependency, get_read_session, replicas, ReadYourWritesMiddleware
+from app.page_cache import VersionedStaticFiles, render_page, static_url
 
-# Создаем таблицы в БД при запуске приложения (если их нет)
-create_db_and_tables()
+# Применять миграции схемы при запуске приложения
+AUTO_MIGRATE = os.getenv("RECOFILM_AUTO_MIGRATE", "0") == "1"
+# Загружать рекомендательную систему (и pandas) при запуске, а не при первом запросе
+PRELOAD_RECOMMENDER = os.getenv("RECOFILM_PRELOAD_RECOMMENDER", "0") == "1"
 
-# --- Настройка шаблонов и статических файлов ---
+# --- Настройка шаблонов ---
 # Указываем директорию для шаблонов Jinja2
 templates = Jinja2Templates(directory="app/templates")
-# Подключаем директорию static для раздачи статических файлов (CSS, JS)
-app.mount(
-    "/static",
-    StaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")),
-    name="static"
-)
+templates.env.globals["static_url"] = static_url
+
+# Маршруты главной страницы и поиска
+router = APIRouter()
+
+
+# --- Хуки запуска ---
+
+def apply_migrations() -> None:
+    """Хук запуска: применяет неприменённые миграции схемы."""
+    from app.migrations import upgrade
+    upgrade(engine)
+
+
+def preload_recommender() -> None:
+    """Хук запуска: импортирует рекомендательную систему и загружает снимок каталога."""
+    users.load_recommender()
+    from film_advisor_lib.recommendation_service import load_catalog_snapshot
+
+    db = get_read_session()
+    try:
+        load_catalog_snapshot(db)
+    finally:
+        db.close()
+
+
+def preload_shared_state() -> None:
+    """
+    Загружает общее состояние в главном процессе до запуска рабочих (gunicorn.conf.py).
+
+    Рекомендательная система и снимок каталога загружаются один раз, после
+    чего объекты переводятся в постоянное поколение сборщика мусора
+    (gc.freeze): сборщик в рабочих процессах не обходит их и не копирует
+    разделяемые страницы памяти. Соединения, открытые при загрузке,
+    закрываются, чтобы рабочие процессы не унаследовали их.
+    """
+    preload_recommender()
+    engine.dispose()
+    replicas.dispose()
+    gc.freeze()
+
+
+def default_startup_hooks() -> list[Callable[[], None]]:
+    """Возвращает хуки запуска, включенные переменными окружения."""
+    hooks = []
+    if AUTO_MIGRATE:
+        hooks.append(apply_migrations)
+    if PRELOAD_RECOMMENDER:
+        hooks.append(preload_recommender)
+    return hooks
+
+
+def create_app(
+        startup_hooks: Optional[Sequence[Callable[[], None]]] = None, job_workers: Optional[int] = None
+) -> FastAPI:
+    """
+    Создает и настраивает экземпляр приложения FastAPI.
+
+    Args:
+        startup_hooks: Синхронные функции, выполняемые при запуске приложения
+            (в пуле потоков, по порядку). По умолчанию - хуки из переменных
+            окружения RECOFILM_AUTO_MIGRATE и RECOFILM_PRELOAD_RECOMMENDER.
+        job_workers: Потоков исполнителя фоновых задач в процессе приложения
+            (app.jobs); 0 - задачи выполняет отдельный процесс. По умолчанию
+            из RECOFILM_JOB_WORKERS.
+
+    Returns:
+        Настроенное приложение.
+    """
+    hooks = list(default_startup_hooks() if startup_hooks is None else startup_hooks)
+    job_workers = jobs.JOB_WORKERS if job_workers is None else job_workers
+    metrics.configure_logging()
+    metrics.install_sqlalchemy_hooks()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        for hook in hooks:
+            await run_in_threadpool(hook)
+        # Исполнитель задач запускается в каждом процессе после fork, а не в главном процессе gunicorn
+        runner = jobs.JobRunner(job_workers).start() if job_workers > 0 else None
+        yield
+        if runner is not None:
+            runner.stop()
+        # Закрываем соединения пула при остановке процесса
+        engine.dispose()
+        replicas.dispose()
+
+    application = FastAPI(
+        title="RecoFilm",
+        description="Система рекомендаций фильмов",
+        version="2.0.0",
+        lifespan=lifespan
+    )
+
+    # Длительность запросов и SQL-запросы в них (GET /metrics)
+    application.add_middleware(metrics.MetricsMiddleware)
+    # Поиск N+1 при разработке (RECOFILM_QUERY_AUDIT=1): заголовок X-Query-Count и предупреждения в логе
+    if query_audit.AUDIT_ENABLED:
+        application.add_middleware(query_audit.QueryAuditMiddleware)
+    # Реплики для чтения (DATABASE_REPLICA_URLS): после записи клиент читает из основной базы
+    if replicas.engines:
+        application.add_middleware(ReadYourWritesMiddleware)
+
+    # Подключаем директорию static для раздачи статических файлов (CSS, JS);
+    # URL с хэшем содержимого (static_url) кэшируются браузером бессрочно
+    application.mount(
+        "/static",
+        VersionedStaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")),
+        name="static"
+    )
+
+    # --- Подключение маршрутизаторов ---
+    # Подключаем роутеры из других модулей для лучшей организации кода
+    application.include_router(router)
+    application.include_router(users.router, tags=["users"], prefix="/users")
+    application.include_router(movies.router, tags=["movies"], prefix="/movies")
+    application.include_router(export.router, tags=["export"], prefix="/export")
+    application.include_router(admin.router, tags=["admin"], prefix="/admin")
+    return application
 
 
 # --- Основные маршруты ---
 
-@app.get("/", response_class=HTMLResponse)
+@router.get("/", response_class=HTMLResponse)
 def index(
         request: Request,
         limit: Optional[int] = 10,
-        db: Session = Depends(get_db_dependency)
+        db: Session = Depends(get_read_db_dependency)
 ):
     """
     Отображает главную страницу со списком популярных фильмов.
@@ -57,21 +174,22 @@ def index(
         db: Сессия базы данных.
 
     Returns:
-        HTML-ответ с отрендеренным шаблоном.
+        HTML-ответ с отрендеренным шаблоном (из кэша страниц, если данные не менялись).
     """
-    movies_list = crud.get_movies(db, skip=0, limit=limit)
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "movies": movies_list}
+    return render_page(
+        request, templates, "index.html",
+        lambda: {"movies": crud.get_movies(db, skip=0, limit=limit)},
+        version=(crud.get_catalog_version(db), crud.get_popularity_version(db))
     )
 
 
-@app.get("/search", response_class=HTMLResponse)
+@router.get("/search", response_class=HTMLResponse)
 def search(
         request: Request,
         name: Optional[str] = None,
         year: Optional[int] = None,
         limit: Optional[int] = 10,
-        db: Session = Depends(get_db_dependency)
+        db: Session = Depends(get_read_db_dependency)
 ):
     """
     Выполняет поиск фильмов по названию и/или году и отображает результаты.
@@ -84,15 +202,25 @@ def search(
         db: Сессия базы данных.
 
     Returns:
-        HTML-ответ с отрендеренным шаблоном.
+        HTML-ответ с отрендеренным шаблоном (из кэша страниц, если данные не менялись).
     """
-    movies_list = crud.search_movies(db, limit=limit, name=name, year=year)
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "movies": movies_list}
+    return render_page(
+        request, templates, "index.html",
+        lambda: {"movies": crud.search_movies(db, limit=limit, name=name, year=year)},
+        version=crud.get_catalog_version(db)
     )
 
 
-# --- Подключение маршрутизаторов ---
-# Подключаем роутеры из других модулей для лучшей организации кода
-app.include_router(users.router, tags=["users"], prefix="/users")
-app.include_router(movies.router, tags=["movies"], prefix="/movies")
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """
+    Отдает метрики приложения в текстовом формате Prometheus.
+
+    Returns:
+        Текстовый ответ с метриками.
+    """
+    return PlainTextResponse(metrics.render_latest(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+
+# Экземпляр для запуска `uvicorn app.main:app`; создание не выполняет ввода-вывода
+app = create_app()
@@ -0,0 +1,301 @@
+# app/metrics.py
+
+"""
+Метрики приложения в текстовом формате Prometheus и настройка логирования.
+
+Собираются:
+    - гистограмма длительности HTTP-запросов по маршрутам (MetricsMiddleware);
+    - количество и длительность SQL-запросов, в том числе на один HTTP-запрос
+      (события SQLAlchemy before/after_cursor_execute);
+    - длительность этапов рекомендательной системы (stage);
+    - статистика кэшей (app.cache.all_cache_stats) на момент опроса.
+
+Метрики отдаются эндпоинтом GET /metrics. Модуль не зависит от
+prometheus_client и не импортирует тяжелых библиотек.
+
+Логирование настраивается configure_logging() по переменной окружения
+RECOFILM_LOG_LEVEL (DEBUG, INFO, WARNING, ...; OFF - выключить полностью).
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .cache import all_cache_stats
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы корзин (сек) для задержек HTTP и этапов рекомендаций
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Границы корзин для SQL-запросов: они заметно короче HTTP-запросов
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# Границы корзин для количества SQL-запросов на HTTP-запрос
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками."""
+    type_name = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # метки -> [счетчики корзин..., сумма, количество]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(data)) for key, data in self._values.items()]
+        lines = []
+        for key, data in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += data[i]
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(data[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(data[-1])}")
+        return lines
+
+
+_registry: List = []
+# Функции, добавляющие метрики, вычисляемые в момент опроса
+_collectors: List[Callable[[], List[str]]] = []
+
+http_request_duration = Histogram(
+    "recofilm_http_request_duration_seconds", "Длительность HTTP-запросов",
+    ["method", "route", "status"]
+)
+db_query_duration = Histogram(
+    "recofilm_db_query_duration_seconds", "Длительность SQL-запросов", ["operation"],
+    buckets=QUERY_BUCKETS
+)
+db_queries_per_request = Histogram(
+    "recofilm_db_queries_per_request", "Количество SQL-запросов на один HTTP-запрос", ["route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+db_time_per_request = Histogram(
+    "recofilm_db_time_per_request_seconds", "Суммарное время SQL-запросов на один HTTP-запрос", ["route"]
+)
+recommender_stage_duration = Histogram(
+    "recofilm_recommender_stage_duration_seconds", "Длительность этапов рекомендательной системы",
+    ["stage"]
+)
+
+
+def _cache_samples() -> List[str]:
+    lines = []
+    names = {
+        "hits": ("recofilm_cache_hits_total", "counter", "Попадания в кэш процесса"),
+        "shared_hits": ("recofilm_cache_shared_hits_total", "counter", "Попадания в общий кэш"),
+        "misses": ("recofilm_cache_misses_total", "counter", "Промахи кэша"),
+        "evictions": ("recofilm_cache_evictions_total", "counter", "Вытеснения из кэша"),
+        "size": ("recofilm_cache_size", "gauge", "Количество записей в кэше процесса"),
+        "hit_rate": ("recofilm_cache_hit_ratio", "gauge", "Доля попаданий в кэш"),
+    }
+    stats = all_cache_stats()
+    for field, (metric, kind, documentation) in names.items():
+        lines.append(f"# HELP {metric} {documentation}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for cache_name, values in sorted(stats.items()):
+            lines.append(f'{metric}{{cache="{_escape(cache_name)}"}} {_format_value(values[field])}')
+    return lines
+
+
+_collectors.append(_cache_samples)
+
+
+def render_latest() -> str:
+    """Возвращает все метрики в текстовом формате Prometheus."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.samples())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+# --- SQL-запросы ---
+
+class RequestQueryStats:
+    """Количество и суммарная длительность SQL-запросов текущего HTTP-запроса."""
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar(
+    "recofilm_request_query_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("recofilm_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("recofilm_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    db_query_duration.observe(elapsed, operation=operation)
+    stats = _request_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+
+def install_sqlalchemy_hooks() -> None:
+    """Подключает учет SQL-запросов ко всем движкам SQLAlchemy (повторный вызов безопасен)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- HTTP-запросы ---
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, измеряющее длительность HTTP-запросов и SQL-запросы в них.
+
+    Маршрут берется из шаблона пути FastAPI (/users/{user_id}), а не из
+    фактического URL, чтобы количество рядов метрики оставалось ограниченным.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _request_query_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_query_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            http_request_duration.observe(
+                elapsed, method=scope["method"], route=route, status=str(status_code)
+            )
+            db_queries_per_request.observe(stats.count, route=route)
+            db_time_per_request.observe(stats.duration, route=route)
+
+
+# --- Рекомендательная система ---
+
+@contextmanager
+def stage(name: str):
+    """
+    Измеряет длительность этапа рекомендательной системы.
+
+    Пример:
+        with stage("catalog"):
+            movies_df = get_movies_data(session)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        recommender_stage_duration.observe(elapsed, stage=name)
+        logger.debug("recommender stage finished", extra={"stage": name, "elapsed_sec": round(elapsed, 4)})
+
+
+# --- Логирование ---
+
+logger = logging.getLogger(__name__)
+
+# Стандартные атрибуты LogRecord; всё остальное пришло через extra
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Форматирует запись как 'время уровень логгер: сообщение key=value ...' (поля из extra)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [f"{key}={value}" for key, value in vars(record).items() if key not in _RECORD_ATTRS]
+        return line + (" " + " ".join(fields) if fields else "")
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Настраивает логгеры приложения и рекомендательной системы.
+
+    Args:
+        level: Уровень логирования; по умолчанию из RECOFILM_LOG_LEVEL (WARNING).
+            Значение OFF отключает логирование этих логгеров.
+    """
+    level = (level or os.getenv("RECOFILM_LOG_LEVEL", "WARNING")).upper()
+    handler = logging.StreamHandler()
+    handler.setFormatter(KeyValueFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    for name in ("app", "film_advisor_lib"):
+        target = logging.getLogger(name)
+        target.handlers = [handler]
+        target.propagate = False
+        # Дочерние логгеры (app.users, ...) наследуют уровень родителя
+        target.setLevel(logging.CRITICAL + 1 if level == "OFF" else level)
@@ -0,0 +1,122 @@
+"""
+Миграции схемы базы данных.
+
+Каждая миграция - модуль этого пакета с именем вида m0001_<описание>.py,
+в котором определены строка revision и функция upgrade(conn). Применённые
+ревизии записываются в таблицу schema_migrations, поэтому повторный запуск
+выполняет только новые миграции. Помощники для построения индексов без
+блокировки таблицы находятся в модуле ops.
+
+Запуск из командной строки:
+
+    python -m app.migrations upgrade
+    python -m app.migrations status
+"""
+
+import importlib
+import pkgutil
+from datetime import datetime
+from types import ModuleType
+from typing import List, Optional, Set
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+_history_table = Table(
+    MIGRATIONS_TABLE,
+    MetaData(),
+    Column("revision", String(32), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def load_migrations() -> List[ModuleType]:
+    """
+    Находит все модули миграций пакета.
+
+    Returns:
+        Список модулей миграций, упорядоченный по ревизии.
+    """
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name.startswith("m") and info.name[1:5].isdigit():
+            modules.append(importlib.import_module(f"{__name__}.{info.name}"))
+    return sorted(modules, key=lambda module: module.revision)
+
+
+def describe(module: ModuleType) -> str:
+    """Возвращает первую строку docstring миграции как её описание."""
+    return (module.__doc__ or module.__name__).strip().splitlines()[0]
+
+
+def get_applied_revisions(conn: Connection) -> Set[str]:
+    """
+    Получает множество уже применённых ревизий.
+
+    Args:
+        conn: Соединение с базой данных.
+
+    Returns:
+        Множество (set) ревизий.
+    """
+    _history_table.create(conn, checkfirst=True)
+    return {row.revision for row in conn.execute(_history_table.select())}
+
+
+def upgrade(engine: Optional[Engine] = None, target: Optional[str] = None) -> List[str]:
+    """
+    Применяет все неприменённые миграции до ревизии target включительно.
+
+    Каждая миграция выполняется в собственной транзакции вместе с записью
+    в schema_migrations.
+
+    Args:
+        engine: Движок базы данных (по умолчанию app.database.engine).
+        target: Последняя применяемая ревизия; None - все доступные.
+
+    Returns:
+        Список применённых ревизий.
+    """
+    if engine is None:
+        from app.database import engine
+
+    with engine.begin() as conn:
+        applied = get_applied_revisions(conn)
+
+    done = []
+    for module in load_migrations():
+        if target is not None and module.revision > target:
+            break
+        if module.revision in applied:
+            continue
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(_history_table.insert().values(
+                revision=module.revision,
+                description=describe(module)[:255],
+                applied_at=datetime.utcnow()
+            ))
+        print(f"Applied migration {module.revision}: {describe(module)}")
+        done.append(module.revision)
+    return done
+
+
+def pending(engine: Optional[Engine] = None) -> List[ModuleType]:
+    """
+    Возвращает миграции, которые ещё не применены.
+
+    Args:
+        engine: Движок базы данных (по умолчанию app.database.engine).
+
+    Returns:
+        Список модулей миграций.
+    """
+    if engine is None:
+        from app.database import engine
+
+    with engine.begin() as conn:
+        applied = get_applied_revisions(conn)
+    return [module for module in load_migrations() if module.revision not in applied]
@@ -0,0 +1,27 @@
+"""Утилита командной строки для применения миграций схемы."""
+
+import argparse
+
+from . import describe, load_migrations, pending, upgrade
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы базы данных RecoFilm")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Применить неприменённые миграции")
+    upgrade_parser.add_argument("--to", dest="target", help="Последняя применяемая ревизия")
+    subparsers.add_parser("status", help="Показать состояние миграций")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        if not upgrade(target=args.target):
+            print("Schema is up to date.")
+    else:
+        not_applied = {module.revision for module in pending()}
+        for module in load_migrations():
+            state = "pending" if module.revision in not_applied else "applied"
+            print(f"{module.revision}  {state:<8} {describe(module)}")
+
+
+if __name__ == "__main__":
+    main()
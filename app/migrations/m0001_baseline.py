@@ -0,0 +1,47 @@
+"""Базовая схема: таблицы users, movies и user_movie.
+
+Таблицы описаны здесь заново, а не берутся из app.models_db, чтобы
+миграция всегда создавала одну и ту же схему, независимо от последующих
+изменений моделей. На уже заполненной базе миграция ничего не меняет.
+"""
+
+from sqlalchemy import Column, Enum, Float, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.engine import Connection
+
+from app.models_db import InteractionStatusEnum
+
+revision = "0001"
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(255), unique=True, index=True, nullable=False),
+)
+
+Table(
+    "movies",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String(255), index=True, nullable=False),
+    Column("year", Integer, nullable=True),
+    Column("genres", String(255), nullable=True),
+    Column("description", Text, nullable=True),
+    Column("rating_imdb", Float, nullable=True),
+)
+
+Table(
+    "user_movie",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False),
+    Column("status", Enum(InteractionStatusEnum), nullable=False),
+    Column("rate", Float),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,11 @@
+"""Столбец users.interactions_version для ETag рекомендаций."""
+
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0002"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "users", "interactions_version", "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,30 @@
+"""Уникальный ключ (user_id, movie_id) и индекс (user_id, status) в user_movie.
+
+Перед построением уникального индекса удаляются дубликаты пар
+(user_id, movie_id); остаётся самая свежая запись (с максимальным id).
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0003"
+
+
+def upgrade(conn: Connection) -> None:
+    if not ops.has_index(conn, "user_movie", "uq_user_movie_user_movie"):
+        if conn.dialect.name == "mysql":
+            conn.execute(text(
+                "DELETE older FROM user_movie AS older "
+                "JOIN user_movie AS newer "
+                "ON newer.user_id = older.user_id AND newer.movie_id = older.movie_id "
+                "AND newer.id > older.id"
+            ))
+        else:
+            conn.execute(text(
+                "DELETE FROM user_movie WHERE id NOT IN "
+                "(SELECT MAX(id) FROM user_movie GROUP BY user_id, movie_id)"
+            ))
+    ops.create_index(conn, "uq_user_movie_user_movie", "user_movie", ["user_id", "movie_id"], unique=True)
+    ops.create_index(conn, "ix_user_movie_user_status", "user_movie", ["user_id", "status"])
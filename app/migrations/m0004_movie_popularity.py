@@ -0,0 +1,26 @@
+"""Столбец movies.vote_count и таблица рейтинга популярности movie_popularity."""
+
+from sqlalchemy import Column, Float, ForeignKey, Integer, MetaData, Table
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0004"
+
+metadata = MetaData()
+
+# Ссылка на movies нужна только для внешнего ключа
+Table("movies", metadata, Column("id", Integer, primary_key=True))
+
+movie_popularity = Table(
+    "movie_popularity",
+    metadata,
+    Column("rank", Integer, primary_key=True, autoincrement=False),
+    Column("movie_id", Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False, unique=True),
+    Column("score", Float, nullable=False),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "movies", "vote_count", "INTEGER NULL")
+    movie_popularity.create(conn, checkfirst=True)
@@ -0,0 +1,28 @@
+"""Столбцы updated_at в movies и user_movie для выгрузки изменений (modified-since).
+
+В MySQL значение поддерживается самой СУБД (ON UPDATE CURRENT_TIMESTAMP),
+в остальных СУБД - приложением; существующие строки получают время миграции.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0005"
+
+TABLES = ("movies", "user_movie")
+
+
+def upgrade(conn: Connection) -> None:
+    for table in TABLES:
+        if conn.dialect.name == "mysql":
+            ops.add_column(
+                conn, table, "updated_at",
+                "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+            )
+        elif not ops.has_column(conn, table, "updated_at"):
+            # SQLite не допускает ADD COLUMN с непостоянным значением по умолчанию
+            ops.add_column(conn, table, "updated_at", "DATETIME NULL")
+            conn.execute(text(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP"))
+        ops.create_index(conn, f"ix_{table}_updated_at", table, ["updated_at"])
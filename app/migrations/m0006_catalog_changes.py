@@ -0,0 +1,39 @@
+"""Версия каталога catalog_state и журнал изменений фильмов movie_changes.
+
+Журнал пишется в той же транзакции, что и изменения фильмов; процессы
+приложения опрашивают версию и читают из журнала только новые изменения.
+"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, func, select
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0006"
+
+metadata = MetaData()
+
+catalog_state = Table(
+    "catalog_state",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("version", BigInteger, nullable=False),
+)
+
+movie_changes = Table(
+    "movie_changes",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", BigInteger, nullable=False),
+    Column("movie_id", Integer, nullable=False),
+    Column("op", String(16), nullable=False),
+    Column("changed_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    catalog_state.create(conn, checkfirst=True)
+    movie_changes.create(conn, checkfirst=True)
+    ops.create_index(conn, "ix_movie_changes_version", "movie_changes", ["version"])
+    if conn.execute(select(catalog_state.c.id)).first() is None:
+        conn.execute(catalog_state.insert().values(id=1, version=0))
@@ -0,0 +1,59 @@
+"""Таблица фоновых задач jobs и предрассчитанных рекомендаций user_recommendations.
+
+Состояние задач хранится в базе, поэтому задачи может выполнять любой
+процесс (app.jobs): захват задачи - условный UPDATE по статусу, а
+уникальный dedupe_key не дает двум процессам поставить одну и ту же
+задачу расписания.
+"""
+
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text, func
+)
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0007"
+
+metadata = MetaData()
+
+# Ссылка на users нужна только для внешнего ключа
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+jobs = Table(
+    "jobs",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(64), nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("params", Text, nullable=True),
+    Column("progress", Float, nullable=False, server_default="0"),
+    Column("message", String(255), nullable=True),
+    Column("result", Text, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("cancel_requested", Boolean, nullable=False, server_default="0"),
+    Column("dedupe_key", String(128), nullable=True, unique=True),
+    Column("worker", String(128), nullable=True),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Column("started_at", DateTime, nullable=True),
+    Column("finished_at", DateTime, nullable=True),
+    Column("heartbeat_at", DateTime, nullable=True),
+)
+
+user_recommendations = Table(
+    "user_recommendations",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, autoincrement=False),
+    Column("interactions_version", Integer, nullable=False),
+    Column("catalog_version", BigInteger, nullable=False),
+    Column("count", Integer, nullable=False),
+    Column("movie_ids", Text, nullable=False),
+    Column("computed_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def upgrade(conn: Connection) -> None:
+    jobs.create(conn, checkfirst=True)
+    user_recommendations.create(conn, checkfirst=True)
+    ops.create_index(conn, "ix_jobs_status", "jobs", ["status", "id"])
+    ops.create_index(conn, "ix_jobs_name_status", "jobs", ["name", "status"])
@@ -0,0 +1,15 @@
+"""Столбец catalog_state.popularity_version: версия рейтинга популярности.
+
+Пересчет рейтинга больше не увеличивает версию каталога, от которой зависят
+ETag и кэш страниц; процессы узнают о нем по этой версии.
+"""
+
+from sqlalchemy.engine import Connection
+
+from . import ops
+
+revision = "0008"
+
+
+def upgrade(conn: Connection) -> None:
+    ops.add_column(conn, "catalog_state", "popularity_version", "BIGINT NOT NULL DEFAULT 0")
@@ -0,0 +1,92 @@
+"""
+Операции над схемой для использования в миграциях.
+
+Все операции идемпотентны: если индекс или столбец уже существует,
+операция ничего не делает. Это позволяет применять базовую миграцию к уже
+заполненной базе. В MySQL индексы и столбцы добавляются через
+ALTER TABLE ... ALGORITHM=INPLACE, LOCK=NONE, то есть без блокировки
+таблицы на запись на время построения.
+"""
+
+from typing import Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+ONLINE_DDL_MYSQL = "ALGORITHM=INPLACE, LOCK=NONE"
+
+
+def has_table(conn: Connection, table: str) -> bool:
+    """Проверяет, существует ли таблица."""
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    """Проверяет, существует ли столбец в таблице."""
+    return any(info["name"] == column for info in inspect(conn).get_columns(table))
+
+
+def has_index(conn: Connection, table: str, name: str) -> bool:
+    """Проверяет, существует ли индекс или ограничение уникальности с таким именем."""
+    inspector = inspect(conn)
+    names = {info["name"] for info in inspector.get_indexes(table)}
+    names.update(info["name"] for info in inspector.get_unique_constraints(table))
+    return name in names
+
+
+def create_index(
+        conn: Connection, name: str, table: str, columns: Sequence[str], unique: bool = False
+) -> None:
+    """
+    Создает индекс, не блокируя запись в таблицу (в MySQL).
+
+    Args:
+        conn: Соединение с базой данных.
+        name: Имя индекса.
+        table: Имя таблицы.
+        columns: Столбцы индекса в порядке следования.
+        unique: Создать уникальный индекс.
+    """
+    if has_index(conn, table, name):
+        return
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    cols = ", ".join(columns)
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"ALTER TABLE {table} ADD {kind} {name} ({cols}), {ONLINE_DDL_MYSQL}"))
+    else:
+        conn.execute(text(f"CREATE {kind} {name} ON {table} ({cols})"))
+
+
+def drop_index(conn: Connection, name: str, table: str) -> None:
+    """
+    Удаляет индекс, не блокируя запись в таблицу (в MySQL).
+
+    Args:
+        conn: Соединение с базой данных.
+        name: Имя индекса.
+        table: Имя таблицы.
+    """
+    if not has_index(conn, table, name):
+        return
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"ALTER TABLE {table} DROP INDEX {name}, {ONLINE_DDL_MYSQL}"))
+    else:
+        conn.execute(text(f"DROP INDEX {name}"))
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """
+    Добавляет столбец, не блокируя запись в таблицу (в MySQL).
+
+    Args:
+        conn: Соединение с базой данных.
+        table: Имя таблицы.
+        column: Имя столбца.
+        ddl: Определение столбца, например "INTEGER NOT NULL DEFAULT 0".
+    """
+    if has_column(conn, table, column):
+        return
+    statement = f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"
+    if conn.dialect.name == "mysql":
+        statement += f", {ONLINE_DDL_MYSQL}"
+    conn.execute(text(statement))
@@ -7,7 +7,8 @@
 и для формирования исходящих ответов. Суффикс 'API' используется для
 отличия от внутренних схем и моделей БД.
 """
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -79,3 +80,77 @@ class UserMovieAPI(UserMovieBaseAPI):
 
     class Config:
         from_attributes = True
+
+
+class InteractionsImportResultAPI(BaseModel):
+    """Модель ответа на массовый импорт взаимодействий."""
+    imported: int
+    skipped: int
+    errors: List[str] = Field(default_factory=list)
+
+
+class LibraryItemAPI(BaseModel):
+    """Модель фильма в библиотеке пользователя."""
+    interaction_id: int
+    movie_id: int
+    title: str
+    year: Optional[int] = None
+    genres: List[str] = Field(default_factory=list)
+    rating_imdb: Optional[float] = None
+    rate: Optional[float] = None
+    description: Optional[str] = None
+
+
+class LibraryGroupAPI(BaseModel):
+    """Модель страницы фильмов одного статуса: всего фильмов, фильмы и курсор следующей страницы."""
+    count: int
+    items: List[LibraryItemAPI] = Field(default_factory=list)
+    next_after: Optional[int] = None
+
+
+class UserLibraryAPI(BaseModel):
+    """Модель ответа с библиотекой пользователя, сгруппированной по статусам."""
+    user_id: int
+    groups: Dict[str, LibraryGroupAPI] = Field(default_factory=dict)
+
+
+# --- Модели для рекомендаций ---
+
+class RecommendationsAPI(BaseModel):
+    """Модель ответа со списком рекомендованных фильмов в порядке убывания релевантности."""
+    user_id: int
+    items: List[MovieAPI] = Field(default_factory=list)
+    # Список для пользователя без истории: популярные фильмы, а не персональные рекомендации
+    cold_start: bool = False
+
+
+# --- Модели для фоновых задач ---
+
+class JobCreateAPI(BaseModel):
+    """Модель для постановки фоновой задачи через API администратора."""
+    name: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobAPI(BaseModel):
+    """Модель фоновой задачи: состояние, прогресс и результат."""
+    id: int
+    name: str
+    status: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    worker: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobTaskAPI(BaseModel):
+    """Модель доступной фоновой задачи и ее расписания (выражение cron)."""
+    name: str
+    description: str
+    schedule: Optional[str] = None
@@ -1,6 +1,9 @@
 import enum
 
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, CheckConstraint, Enum
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Integer, String, Float, Text, DateTime, ForeignKey, CheckConstraint, Enum, Index,
+    UniqueConstraint, func
+)
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -18,6 +21,8 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(255), unique=True, index=True, nullable=False)
+    # Увеличивается при каждом изменении библиотеки пользователя (для ETag рекомендаций)
+    interactions_version = Column(Integer, nullable=False, default=0, server_default="0")
     interactions = relationship("UserMovie", back_populates="user")
 
 
@@ -29,6 +34,10 @@ class Movie(Base):
     genres_str = Column("genres", String(255), nullable=True)
     description = Column(Text, nullable=True)
     rating_imdb = Column(Float, nullable=True)
+    # Количество голосов, по которым рассчитан rating_imdb (для байесовского среднего)
+    vote_count = Column(Integer, nullable=True)
+    # Время последнего изменения строки (для выгрузки изменений)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), index=True)
     interactions = relationship("UserMovie", back_populates="movie")
 
     @property
@@ -44,10 +53,83 @@ class Movie(Base):
 
 class UserMovie(Base):
     __tablename__ = "user_movie"
+    __table_args__ = (
+        # Одна запись на пару (пользователь, фильм); индекс также обслуживает поиск по user_id
+        UniqueConstraint("user_id", "movie_id", name="uq_user_movie_user_movie"),
+        Index("ix_user_movie_user_status", "user_id", "status"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False)
     status = Column(Enum(InteractionStatusEnum), nullable=False)
     rate = Column(Float)
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now(), index=True)
     user = relationship("User", back_populates="interactions")
     movie = relationship("Movie", back_populates="interactions")
+
+
+class CatalogState(Base):
+    """Версия каталога: единственная строка (id=1), увеличивается при каждом изменении фильмов."""
+    __tablename__ = "catalog_state"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    # Увеличивается при пересчете рейтинга популярности, не меняя версию каталога
+    popularity_version = Column(BigInteger, nullable=False, default=0)
+
+
+class MovieChange(Base):
+    """Журнал изменений каталога: какой фильм изменился в какой версии."""
+    __tablename__ = "movie_changes"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, index=True)
+    movie_id = Column(Integer, nullable=False)
+    op = Column(String(16), nullable=False)
+    changed_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+
+
+class MoviePopularity(Base):
+    """Материализованный рейтинг популярности: позиция -> фильм."""
+    __tablename__ = "movie_popularity"
+    rank = Column(Integer, primary_key=True, autoincrement=False)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False, unique=True)
+    score = Column(Float, nullable=False)
+
+
+class Job(Base):
+    """Фоновая задача (app.jobs): состояние, прогресс и результат выполнения."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status", "status", "id"),
+        Index("ix_jobs_name_status", "name", "status"),
+    )
+    id = Column(Integer, primary_key=True)
+    name = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False)
+    # Параметры и результат задачи в JSON
+    params = Column(Text, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0, server_default="0")
+    message = Column(String(255), nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default="0")
+    # Ключ задачи расписания (имя и минута запуска): одна задача на запуск при нескольких процессах
+    dedupe_key = Column(String(128), nullable=True, unique=True)
+    # Процесс, выполняющий задачу (host:pid)
+    worker = Column(String(128), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Последний признак жизни выполняющего процесса; устаревший - задача считается потерянной
+    heartbeat_at = Column(DateTime, nullable=True)
+
+
+class UserRecommendation(Base):
+    """Предрассчитанные рекомендации пользователя, действительные для версии библиотеки и каталога."""
+    __tablename__ = "user_recommendations"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    interactions_version = Column(Integer, nullable=False)
+    catalog_version = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False)
+    # ID фильмов через запятую в порядке показа
+    movie_ids = Column(Text, nullable=False)
+    computed_at = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
@@ -6,13 +6,18 @@
 Предоставляет API-эндпоинты для создания и получения информации о фильмах.
 """
 
-from typing import List
+from typing import Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from . import crud, models_api, schemas_db
-from .database import get_db_dependency
+from .database import get_db_dependency, get_read_db_dependency, get_read_session
+from .json_stream import NDJSON_MEDIA_TYPE, FastJSONResponse, iter_json_array, iter_ndjson
+
+# Списки длиннее этого значения отдаются потоком, а не одним телом ответа
+MOVIE_LIST_STREAM_THRESHOLD = 1000
 
 # Создаем новый роутер для эндпоинтов, связанных с фильмами
 router = APIRouter()
@@ -37,27 +42,55 @@ def api_create_movie(
     return crud.create_movie(db=db, movie=movie_core_create)
 
 
+def _stream_movies(skip: int, limit: int) -> Iterator[dict]:
+    """
+    Выдает словари фильмов для потокового ответа.
+
+    Поток читается после выхода из обработчика, когда сессия из зависимости
+    уже закрыта, поэтому генератор открывает собственную сессию.
+    """
+    db = get_read_session()
+    try:
+        for record in crud.iter_movies(db, skip=skip, limit=limit):
+            yield record.to_api_dict()
+    finally:
+        db.close()
+
+
 @router.get("/", response_model=List[models_api.MovieAPI], summary="Получить список фильмов")
 def api_read_movies(
-        skip: int = 0, limit: int = 10, db: Session = Depends(get_db_dependency)
-):
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=0),
+        format: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="json или ndjson"),
+        db: Session = Depends(get_read_db_dependency)
+) -> Response:
     """
     API-эндпоинт для получения списка фильмов с пагинацией.
 
+    Ответ строится из записей фильмов без валидации Pydantic. Списки длиннее
+    MOVIE_LIST_STREAM_THRESHOLD и формат ndjson отдаются потоком.
+
     Args:
         skip: Количество пропускаемых фильмов.
         limit: Максимальное количество возвращаемых фильмов.
+        format: Формат ответа: JSON-массив (по умолчанию) или NDJSON.
         db: Сессия базы данных (зависимость).
 
     Returns:
         Список фильмов.
     """
+    if format == "ndjson":
+        return StreamingResponse(iter_ndjson(_stream_movies(skip, limit)), media_type=NDJSON_MEDIA_TYPE)
+    if limit > MOVIE_LIST_STREAM_THRESHOLD:
+        return StreamingResponse(
+            iter_json_array(_stream_movies(skip, limit)), media_type=FastJSONResponse.media_type
+        )
     movies_list = crud.get_movies(db, skip=skip, limit=limit)
-    return movies_list
+    return FastJSONResponse([movie.to_api_dict() for movie in movies_list])
 
 
 @router.get("/{movie_id}", response_model=models_api.MovieAPI, summary="Получить фильм по ID")
-def api_read_movie(movie_id: int, db: Session = Depends(get_db_dependency)):
+def api_read_movie(movie_id: int, db: Session = Depends(get_read_db_dependency)):
     """
     API-эндпоинт для получения одного фильма по его ID.
 
@@ -0,0 +1,224 @@
+# app/page_cache.py
+
+"""
+Кэш отрендеренных HTML-страниц и долгоживущие URL статических файлов.
+
+Страница кэшируется в виде готовых байтов вместе со сжатыми вариантами
+(gzip и, если установлен пакет brotli, br). Ключ кэша - путь, параметры
+запроса и версия данных, от которых зависит страница (версия каталога,
+версия библиотеки пользователя). Ответ снабжается ETag и Last-Modified,
+условные запросы получают 304 без рендеринга шаблона.
+
+Статические файлы подключаются через static_url() с хэшем содержимого в
+параметре v; такие URL отдаются с Cache-Control: immutable на год.
+
+Кэш страниц отключается переменной окружения RECOFILM_PAGE_CACHE=0.
+"""
+
+import functools
+import gzip
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+
+from .cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+PAGE_CACHE_ENABLED = os.getenv("RECOFILM_PAGE_CACHE", "1") != "0"
+PAGE_CACHE_SIZE = 512
+PAGE_CACHE_TTL = 60.0
+# Страницы проверяются клиентом при каждом показе (If-None-Match / If-Modified-Since)
+PAGE_CACHE_CONTROL = "no-cache"
+# Статические файлы с хэшем в URL не меняются никогда
+STATIC_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_REVALIDATE_CACHE_CONTROL = "no-cache"
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class CachedPage(NamedTuple):
+    """Отрендеренная страница и её сжатые варианты."""
+    body: bytes
+    gzip_body: bytes
+    br_body: Optional[bytes]
+    etag: str
+    last_modified: float
+
+
+_pages = LRUCache("pages", maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверяет, совпадает ли ETag с одним из значений заголовка If-None-Match."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """
+    Разбирает заголовок Accept-Encoding в словарь {кодировка: q}.
+
+    Кодировки сравниваются без учета регистра; некорректное значение q
+    считается равным 1. Кодировка с q=0 явно запрещена клиентом.
+    """
+    encodings: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    pass
+        encodings[name] = quality
+    return encodings
+
+
+def _accepts(encodings: Dict[str, float], encoding: str) -> bool:
+    """Проверяет, принимает ли клиент кодировку (явно или через '*')."""
+    return encodings.get(encoding, encodings.get("*", 0.0)) > 0
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: float) -> bool:
+    """Проверяет заголовок If-Modified-Since (точность HTTP-даты - секунда)."""
+    if not if_modified_since:
+        return False
+    try:
+        return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _build_page(body: bytes) -> CachedPage:
+    return CachedPage(
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=GZIP_LEVEL),
+        br_body=brotli.compress(body, quality=BROTLI_QUALITY) if brotli is not None else None,
+        etag='"' + hashlib.sha1(body).hexdigest() + '"',
+        last_modified=time.time()
+    )
+
+
+def _page_response(request: Request, page: CachedPage) -> Response:
+    headers = {
+        "ETag": page.etag,
+        "Last-Modified": formatdate(page.last_modified, usegmt=True),
+        "Cache-Control": PAGE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, page.etag) or (
+            if_none_match is None
+            and _not_modified_since(request.headers.get("if-modified-since"), page.last_modified)
+    ):
+        return Response(status_code=304, headers=headers)
+
+    encodings = _accepted_encodings(request.headers.get("accept-encoding"))
+    body = page.body
+    if page.br_body is not None and _accepts(encodings, "br"):
+        body = page.br_body
+        headers["Content-Encoding"] = "br"
+    elif _accepts(encodings, "gzip"):
+        body = page.gzip_body
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="text/html", headers=headers)
+
+
+def render_page(
+        request: Request,
+        templates: Jinja2Templates,
+        template_name: str,
+        context_factory: Callable[[], dict],
+        version: Hashable = None
+) -> Response:
+    """
+    Отдает страницу из кэша или рендерит шаблон и кэширует результат.
+
+    Args:
+        request: Объект запроса.
+        templates: Окружение шаблонов Jinja2.
+        template_name: Имя шаблона.
+        context_factory: Функция, возвращающая контекст шаблона (без request).
+            Вызывается только при промахе кэша.
+        version: Версия данных страницы; её изменение делает старые записи недостижимыми.
+
+    Returns:
+        HTML-ответ (возможно, сжатый) или 304.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())), version)
+
+    def render() -> CachedPage:
+        context: dict[str, Any] = {"request": request, **context_factory()}
+        body = templates.get_template(template_name).render(context).encode("utf-8")
+        return _build_page(body)
+
+    page = _pages.get_or_load(key, render) if PAGE_CACHE_ENABLED else render()
+    return _page_response(request, page)
+
+
+def clear_page_cache() -> None:
+    """Очищает кэш страниц."""
+    _pages.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def _file_hash(path: str) -> str:
+    with open(os.path.join(STATIC_DIR, path), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def static_url(path: str) -> str:
+    """
+    Возвращает URL статического файла с хэшем содержимого.
+
+    Хэш вычисляется один раз на процесс, поэтому после изменения файла URL
+    меняется при перезапуске, а браузеры могут кэшировать файл бессрочно.
+
+    Args:
+        path: Путь относительно каталога static, например 'css/main.css'.
+
+    Returns:
+        URL вида /static/css/main.css?v=<хэш>.
+    """
+    try:
+        return f"/static/{path}?v={_file_hash(path)}"
+    except OSError:
+        return f"/static/{path}"
+
+
+class VersionedStaticFiles(StaticFiles):
+    """StaticFiles, выставляющий долгий Cache-Control для URL с хэшем (параметр v)."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            versioned = any(part.startswith(b"v=") for part in scope.get("query_string", b"").split(b"&"))
+            response.headers["Cache-Control"] = (
+                STATIC_IMMUTABLE_CACHE_CONTROL if versioned else STATIC_REVALIDATE_CACHE_CONTROL
+            )
+        return response
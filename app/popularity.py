@@ -0,0 +1,197 @@
+# app/popularity.py
+
+"""
+Рейтинг популярности фильмов для главной страницы и GET /movies/.
+
+Фильмы ранжируются по байесовскому среднему оценки с учетом количества
+голосов, поэтому фильм с единственной оценкой 10.0 не оказывается выше
+фильмов с тысячами высоких оценок:
+
+    score = v / (v + m) * R + m / (v + m) * C
+
+где R - оценка фильма, v - количество голосов, C - средняя оценка по
+каталогу, m - порог голосов (по умолчанию 90-й перцентиль количества голосов).
+
+Рейтинг пересчитывается периодически (и при загрузке каталога) и
+сохраняется в таблицу movie_popularity. Веб-процессы держат упорядоченный
+массив ID фильмов в памяти, поэтому страница списка - это срез массива.
+
+Пересчет из командной строки (например, по cron):
+
+    python -m app.popularity
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from . import catalog_feed, models_db
+from .cache import LRUCache
+
+# Сколько позиций рейтинга материализуется
+POPULARITY_SIZE = 10000
+# Перцентиль количества голосов, используемый как порог m
+MIN_VOTES_QUANTILE = 0.9
+# Как часто веб-процесс перечитывает рейтинг из БД (сек)
+RANKING_TTL = 300.0
+
+_ranking_cache = LRUCache("popularity", maxsize=1, ttl=RANKING_TTL)
+_RANKING_KEY = "ranking"
+
+
+def bayesian_average(rating: float, votes: int, prior_mean: float, min_votes: float) -> float:
+    """
+    Вычисляет байесовское среднее оценки фильма.
+
+    Args:
+        rating: Средняя оценка фильма.
+        votes: Количество голосов.
+        prior_mean: Средняя оценка по каталогу.
+        min_votes: Порог голосов, при котором вес оценки фильма равен весу среднего.
+
+    Returns:
+        Сглаженная оценка.
+    """
+    if votes + min_votes <= 0:
+        return prior_mean
+    return (votes * rating + min_votes * prior_mean) / (votes + min_votes)
+
+
+def compute_ranking(
+        rows: List[tuple], size: int = POPULARITY_SIZE, min_votes: Optional[float] = None
+) -> List[tuple]:
+    """
+    Ранжирует фильмы по байесовскому среднему.
+
+    Args:
+        rows: Кортежи (movie_id, rating, vote_count); учитываются фильмы с голосами.
+        size: Количество позиций в результате.
+        min_votes: Порог голосов m; по умолчанию - перцентиль MIN_VOTES_QUANTILE.
+
+    Returns:
+        Список (movie_id, score), упорядоченный по убыванию score.
+    """
+    rated = [(movie_id, rating or 0.0, votes) for movie_id, rating, votes in rows if votes]
+    if not rated:
+        return []
+
+    prior_mean = sum(rating for _, rating, _ in rated) / len(rated)
+    if min_votes is None:
+        votes_sorted = sorted(votes for _, _, votes in rated)
+        min_votes = votes_sorted[min(len(votes_sorted) - 1, int(len(votes_sorted) * MIN_VOTES_QUANTILE))]
+
+    scored = [
+        (movie_id, bayesian_average(rating, votes, prior_mean, min_votes))
+        for movie_id, rating, votes in rated
+    ]
+    # При равенстве score порядок детерминирован по ID
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:size]
+
+
+def recompute_popularity(db: Session, size: int = POPULARITY_SIZE) -> int:
+    """
+    Пересчитывает рейтинг и перезаписывает таблицу movie_popularity.
+
+    Args:
+        db: Сессия базы данных.
+        size: Количество позиций рейтинга.
+
+    Returns:
+        Количество записанных позиций.
+    """
+    rows = db.query(
+        models_db.Movie.id, models_db.Movie.rating_imdb, models_db.Movie.vote_count
+    ).all()
+    ranking = compute_ranking(rows, size=size)
+
+    db.query(models_db.MoviePopularity).delete(synchronize_session=False)
+    if ranking:
+        db.bulk_insert_mappings(models_db.MoviePopularity, [
+            {"rank": rank, "movie_id": movie_id, "score": score}
+            for rank, (movie_id, score) in enumerate(ranking, start=1)
+        ])
+    # Версия каталога не меняется: другие процессы перечитают только рейтинг
+    catalog_feed.record_popularity_change(db)
+    db.commit()
+    invalidate_ranking()
+    return len(ranking)
+
+
+def get_ranking(db: Session) -> tuple:
+    """
+    Возвращает ID фильмов в порядке рейтинга популярности.
+
+    Массив читается из movie_popularity по первичному ключу rank и хранится
+    в памяти процесса RANKING_TTL секунд.
+
+    Args:
+        db: Сессия базы данных.
+
+    Returns:
+        Кортеж ID фильмов; пустой, если рейтинг ещё не рассчитан.
+    """
+    def load() -> tuple:
+        rows = (
+            db.query(models_db.MoviePopularity.movie_id)
+            .order_by(models_db.MoviePopularity.rank)
+            .all()
+        )
+        return tuple(row.movie_id for row in rows)
+
+    return _ranking_cache.get_or_load(_RANKING_KEY, load)
+
+
+def get_popular_movie_ids(db: Session, skip: int = 0, limit: Optional[int] = 10) -> Optional[List[int]]:
+    """
+    Возвращает срез рейтинга популярности.
+
+    Args:
+        db: Сессия базы данных.
+        skip: Количество пропускаемых позиций.
+        limit: Количество позиций.
+
+    Returns:
+        Список ID фильмов или None, если рейтинг не рассчитан либо срез
+        выходит за материализованную часть рейтинга.
+    """
+    ranking = get_ranking(db)
+    if not ranking or limit is None or skip + limit > len(ranking):
+        return None
+    return list(ranking[skip:skip + limit])
+
+
+def invalidate_ranking() -> None:
+    """Сбрасывает рейтинг, закэшированный в памяти процесса."""
+    _ranking_cache.clear()
+
+
+def _apply_catalog_change(change: catalog_feed.CatalogChange) -> None:
+    """Сбрасывает рейтинг при его пересчете или полной перезагрузке каталога."""
+    if change.popularity or change.movie_ids is None:
+        invalidate_ranking()
+
+
+catalog_feed.feed.subscribe(_apply_catalog_change)
+
+
+def main():
+    from .database import get_db_session
+
+    parser = argparse.ArgumentParser(description="Пересчет рейтинга популярности фильмов")
+    parser.add_argument("--size", type=int, default=POPULARITY_SIZE, help="Количество позиций рейтинга")
+    args = parser.parse_args()
+
+    session = get_db_session()
+    try:
+        start_time = time.time()
+        count = recompute_popularity(session, size=args.size)
+        print(f"Popularity ranking recomputed: {count} movies in {time.time() - start_time:.2f} sec")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# app/pytest_query_audit.py
+
+"""
+Плагин pytest для ограничения количества SQL-запросов в тестах.
+
+Подключение: `pytest -p app.pytest_query_audit` или строка
+`pytest_plugins = ["app.pytest_query_audit"]` в conftest.py.
+
+Фикстура max_queries проверяет блок кода:
+
+    def test_library_page(client, max_queries):
+        with max_queries(3):
+            client.get("/users/1/interactions/")
+
+Маркер max_queries проверяет весь тест, включая повторы (N+1):
+
+    @pytest.mark.max_queries(2, allow_repeated=False)
+    def test_movie_list(client):
+        client.get("/movies/?limit=100")
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from .query_audit import QueryAudit
+
+
+@contextmanager
+def _assert_queries(limit: int, allow_repeated: bool = True):
+    with QueryAudit() as audit:
+        yield audit
+    if audit.count > limit:
+        pytest.fail(f"Expected at most {limit} queries, got {audit.count}\n{audit.report()}", pytrace=False)
+    if not allow_repeated and audit.repeated():
+        pytest.fail(f"Repeated queries (possible N+1)\n{audit.report()}", pytrace=False)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "max_queries(limit, allow_repeated=True): fail if the test executes more SQL statements than limit"
+    )
+
+
+@pytest.fixture
+def query_audit():
+    """Записывает SQL-команды, выполненные во время теста."""
+    with QueryAudit() as audit:
+        yield audit
+
+
+@pytest.fixture
+def max_queries():
+    """Возвращает контекстный менеджер max_queries(limit, allow_repeated=True)."""
+    return _assert_queries
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("max_queries")
+    if marker is None:
+        return (yield)
+    with _assert_queries(*marker.args, **marker.kwargs):
+        return (yield)
@@ -0,0 +1,227 @@
+# app/query_audit.py
+
+"""
+Аудит SQL-запросов: поиск N+1 и медленных запросов при разработке и в CI.
+
+QueryAudit записывает все SQL-команды, выполненные за время своего
+действия, нормализует их до "формы" (без значений параметров и с
+свернутыми списками IN) и сообщает о формах, повторенных много раз, -
+типичном признаке N+1 (запрос на каждую строку вместо одного запроса).
+
+Использование:
+
+    with QueryAudit() as audit:
+        client.get("/users/1/interactions/")
+    assert audit.count <= 3, audit.report()
+
+В приложении аудит каждого запроса включается переменной окружения
+RECOFILM_QUERY_AUDIT=1 (QueryAuditMiddleware): количество команд
+возвращается в заголовке X-Query-Count, повторы записываются в лог.
+
+Медленные запросы (дольше RECOFILM_SLOW_QUERY_MS, по умолчанию 100 мс)
+записываются в лог вместе с планом выполнения (EXPLAIN), пока включен
+хотя бы один аудит.
+
+Фикстуры pytest находятся в модуле app.pytest_query_audit.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ENABLED = os.getenv("RECOFILM_QUERY_AUDIT", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("RECOFILM_SLOW_QUERY_MS", "100"))
+# Сколько одинаковых по форме команд считается признаком N+1
+REPEAT_THRESHOLD = 3
+
+_WHITESPACE = re.compile(r"\s+")
+# Раскрытые списки IN (...) разной длины приводятся к одной форме
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+|[\d.]+|'[^']*')\s*,?)+\)", re.IGNORECASE)
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Приводит SQL-команду к форме без значений для сравнения команд между собой.
+
+    Args:
+        statement: Текст SQL-команды.
+
+    Returns:
+        Нормализованная форма команды.
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _NUMBER.sub("?", shape)
+
+
+class QueryRecord(NamedTuple):
+    """Выполненная SQL-команда."""
+    statement: str
+    shape: str
+    duration: float
+
+
+class QueryAudit:
+    """
+    Записывает SQL-команды, выполненные во время действия контекста.
+
+    Args:
+        repeat_threshold: Сколько одинаковых по форме команд считается повтором (N+1).
+    """
+
+    def __init__(self, repeat_threshold: int = REPEAT_THRESHOLD):
+        self.repeat_threshold = repeat_threshold
+        self.queries: List[QueryRecord] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "QueryAudit":
+        install_hooks()
+        with _global_lock:
+            _global_audits.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        with _global_lock:
+            _global_audits.remove(self)
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.queries.append(QueryRecord(statement, statement_shape(statement), duration))
+
+    @property
+    def count(self) -> int:
+        """Количество выполненных команд."""
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        """Суммарная длительность команд (сек)."""
+        return sum(query.duration for query in self.queries)
+
+    def repeated(self) -> Dict[str, int]:
+        """Возвращает формы команд, повторенные не менее repeat_threshold раз, с количеством."""
+        counts = Counter(query.shape for query in self.queries)
+        return {shape: count for shape, count in counts.most_common() if count >= self.repeat_threshold}
+
+    def report(self) -> str:
+        """Возвращает текстовый отчет: количество команд, повторы и сами команды."""
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f} ms"]
+        for shape, count in self.repeated().items():
+            lines.append(f"  repeated x{count}: {shape}")
+        for i, query in enumerate(self.queries, start=1):
+            lines.append(f"  {i:>3}. {query.duration * 1000:7.2f} ms  {query.shape}")
+        return "\n".join(lines)
+
+
+_global_lock = threading.Lock()
+# Аудиты, включенные контекстным менеджером: получают команды всех потоков
+_global_audits: List[QueryAudit] = []
+# Аудит текущего HTTP-запроса (QueryAuditMiddleware)
+_request_audit: ContextVar[Optional[QueryAudit]] = ContextVar("recofilm_request_audit", default=None)
+
+
+def _explain(conn, cursor, statement: str, parameters) -> Optional[str]:
+    """Возвращает план выполнения SELECT-команды или None, если его нельзя получить."""
+    dialect = conn.dialect.name
+    prefix = {"mysql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}.get(dialect, "EXPLAIN ")
+    try:
+        # Отдельный курсор DBAPI: события SQLAlchemy для него не вызываются
+        explain_cursor = conn.connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            return "\n".join(" | ".join(str(value) for value in row) for row in explain_cursor.fetchall())
+        finally:
+            explain_cursor.close()
+    except Exception as e:  # план - вспомогательная информация, ошибка не должна ломать запрос
+        return f"EXPLAIN failed: {e}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("recofilm_audit_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("recofilm_audit_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    request_audit = _request_audit.get()
+    audits = list(_global_audits)
+    if request_audit is not None:
+        audits.append(request_audit)
+    if not audits:
+        return
+    for audit in audits:
+        audit.record(statement, duration)
+
+    if duration * 1000 >= SLOW_QUERY_MS:
+        plan = None
+        # Для потокового курсора результат ещё не прочитан - второй запрос в соединении невозможен
+        streaming = context is not None and context.execution_options.get("stream_results")
+        if not executemany and not streaming and statement.lstrip().upper().startswith("SELECT"):
+            plan = _explain(conn, cursor, statement, parameters)
+        logger.warning(
+            "Slow query",
+            extra={"duration_ms": round(duration * 1000, 1), "statement": statement_shape(statement), "plan": plan}
+        )
+
+
+def install_hooks() -> None:
+    """Подключает аудит ко всем движкам SQLAlchemy (повторный вызов безопасен)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryAuditMiddleware:
+    """
+    ASGI-middleware, проверяющее SQL-команды каждого HTTP-запроса.
+
+    Добавляет заголовок X-Query-Count и пишет предупреждение в лог, если
+    одна и та же команда повторяется repeat_threshold и более раз.
+    """
+
+    def __init__(self, app, repeat_threshold: int = REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        install_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        audit = QueryAudit(self.repeat_threshold)
+        token = _request_audit.set(audit)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Команды, выполненные при потоковой отдаче тела, сюда уже не попадут
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-query-count", str(audit.count).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_audit.reset(token)
+            repeated = audit.repeated()
+            if repeated:
+                logger.warning(
+                    "Repeated queries (possible N+1)",
+                    extra={"path": scope["path"], "queries": audit.count, "repeated": repeated}
+                )
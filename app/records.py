@@ -0,0 +1,50 @@
+# app/records.py
+
+"""
+Неизменяемые записи для данных, которые только читаются.
+
+В отличие от ORM-объектов, записи не привязаны к сессии, не попадают в
+identity map и могут безопасно храниться в кэше и передаваться между
+потоками и процессами (сериализуются pickle).
+"""
+
+from typing import NamedTuple, Optional
+
+
+class MovieRecord(NamedTuple):
+    """Запись фильма для отображения и ответов API."""
+    id: int
+    title: str
+    year: Optional[int]
+    genres_str: Optional[str]
+    description: Optional[str]
+    rating_imdb: Optional[float]
+
+    @property
+    def genres(self) -> list[str]:
+        if self.genres_str:
+            return [genre.strip() for genre in self.genres_str.split(',') if genre.strip()]
+        return []
+
+    def to_api_dict(self) -> dict:
+        """Возвращает словарь с полями и порядком ключей models_api.MovieAPI."""
+        return {
+            "title": self.title,
+            "year": self.year,
+            "genres": self.genres,
+            "description": self.description,
+            "rating_imdb": self.rating_imdb,
+            "id": self.id,
+        }
+
+    @classmethod
+    def from_orm(cls, movie) -> "MovieRecord":
+        """Создает запись из ORM-объекта Movie (или строки запроса с теми же полями)."""
+        return cls(
+            id=movie.id,
+            title=movie.title,
+            year=movie.year,
+            genres_str=movie.genres_str,
+            description=movie.description,
+            rating_imdb=movie.rating_imdb
+        )
@@ -78,3 +78,35 @@ class UserMovieCore(UserMovieBase):
 
     class Config:
         from_attributes = True
+
+
+class UserMovieImport(UserMovieBase):
+    """Схема одной строки массового импорта взаимодействий (с оценкой)."""
+    rate: Optional[float] = None
+
+
+class LibraryItem(BaseModel):
+    """Фильм в библиотеке пользователя: только поля для отображения."""
+    interaction_id: int
+    movie_id: int
+    title: str
+    year: Optional[int] = None
+    genres: List[str] = Field(default_factory=list)
+    rating_imdb: Optional[float] = None
+    rate: Optional[float] = None
+    description: Optional[str] = None
+
+
+class LibraryGroup(BaseModel):
+    """Страница фильмов одного статуса библиотеки."""
+    count: int = 0
+    items: List[LibraryItem] = Field(default_factory=list)
+    # interaction_id последнего фильма страницы, если есть следующая страница
+    next_after: Optional[int] = None
+
+
+class InteractionsImportResult(BaseModel):
+    """Итог массового импорта взаимодействий пользователя."""
+    imported: int = 0
+    skipped: int = 0
+    errors: List[str] = Field(default_factory=list)
@@ -1,28 +1,114 @@
-from typing import Optional
+import functools
+import hashlib
+import logging
+from typing import Callable, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
-from . import crud, models_api, schemas_db
+from . import cold_start, crud, interactions_import, models_api, schemas_db
 from .crud import get_user_recommendations_movies
-from .database import get_db_dependency
+from .database import get_db_dependency, get_read_db_dependency
 from .models_db import InteractionStatusEnum
+from .page_cache import etag_matches, render_page, static_url
 
-try:
-    from film_advisor_lib.main import get_movie_recommendations_by_user_id
-except ImportError:
-    print("Warning: film_advisor_lib not found. Recommendations will not work.")
+logger = logging.getLogger(__name__)
 
 
-    def get_movie_recommendations_by_user_id(user_id, count) -> list[int]:
-        return []  # Заглушка, если библиотека отсутствует
+@functools.lru_cache(maxsize=None)
+def load_recommender() -> Callable[..., list[int]]:
+    """
+    Импортирует рекомендательную систему film_advisor_lib при первом обращении.
+
+    Библиотека тянет за собой pandas, поэтому импорт откладывается до первого
+    запроса рекомендаций (или до хука запуска приложения), а не выполняется
+    при импорте модуля.
+
+    Returns:
+        Функция получения ID рекомендованных фильмов по ID пользователя.
+    """
+    try:
+        from film_advisor_lib.main import get_movie_recommendations_by_user_id as recommender
+    except ImportError:
+        logger.warning("film_advisor_lib not found, recommendations will not work")
+
+        def recommender(user_id, count) -> list[int]:
+            return []  # Заглушка, если библиотека отсутствует
+
+    return recommender
+
+
+def get_movie_recommendations_by_user_id(user_id: int, count: int) -> list[int]:
+    """Возвращает ID рекомендованных фильмов для пользователя."""
+    return load_recommender()(user_id=user_id, count=count)
+
+
+def recommend_movie_ids(
+        db: Session, user_id: int, user_version: int, count: Optional[int], genres: Optional[str] = None
+) -> Tuple[list[int], bool]:
+    """
+    Возвращает ID рекомендаций и признак холодного старта.
+
+    Пользователь без взаимодействий (проверка по количеству, кэшированному
+    по версии библиотеки) сразу получает готовый список холодного старта
+    без запуска рекомендательной системы. Этот же список возвращается, если
+    рекомендательной системе не хватило данных. Список, предрассчитанный
+    фоновой задачей для текущих версий библиотеки и каталога, возвращается
+    без расчета.
+
+    Args:
+        db: Сессия базы данных.
+        user_id: ID пользователя.
+        user_version: Версия библиотеки пользователя.
+        count: Количество рекомендаций.
+        genres: Жанры, выбранные пользователем при знакомстве ('Drama,Comedy').
+
+    Returns:
+        Кортеж (ID фильмов, True - список холодного старта).
+    """
+    if not cold_start.is_cold_start(db, user_id, user_version):
+        movies_ids = crud.get_precomputed_recommendations(db, user_id, user_version, count)
+        if movies_ids is None:
+            movies_ids = get_movie_recommendations_by_user_id(user_id=user_id, count=count)
+        if movies_ids:
+            return movies_ids, False
+    return cold_start.get_cold_start_movie_ids(db, count, cold_start.parse_genres(genres)), True
+
 
 # Создаем роутер и настраиваем шаблоны
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
+
+# Клиент может хранить ответ, но обязан проверять его актуальность через If-None-Match
+RECOMMENDATIONS_CACHE_CONTROL = "private, no-cache"
+# Наибольшее количество рекомендаций в одном ответе (параметр limit)
+MAX_RECOMMENDATIONS = 100
+
+
+def _recommendations_data_version(db: Session) -> str:
+    """
+    Версия данных рекомендаций: версии каталога и рейтинга популярности.
+
+    Версия рейтинга входит в ключ для всех пользователей, а не только новых:
+    пользователь с историей тоже получает список холодного старта, если
+    рекомендательной системе не хватило данных, а до расчета неизвестно,
+    какой список будет отдан. Рейтинг пересчитывается фоновой задачей,
+    поэтому лишняя смена ETag для остальных пользователей редка.
+    """
+    return f"{crud.get_catalog_version(db)}:{crud.get_popularity_version(db)}"
+
+
+def _make_recommendations_etag(
+        user_id: int, user_version: int, catalog_version: str, limit: Optional[int], genres: Optional[str] = None
+) -> str:
+    """Строит ETag рекомендаций из версии библиотеки пользователя и версии каталога."""
+    key = f"{user_id}:{user_version}:{catalog_version}:{limit}:{genres or ''}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
 
 
 @router.post("/", response_model=models_api.UserAPI, summary="Создать пользователя")
@@ -52,7 +138,7 @@ def api_create_user(
 
 
 @router.get("/{user_id}", response_model=models_api.UserAPI, summary="Получить пользователя по ID")
-def api_read_user(user_id: int, db: Session = Depends(get_db_dependency)):
+def api_read_user(user_id: int, db: Session = Depends(get_read_db_dependency)):
     """
     API-эндпоинт для получения информации о пользователе по ID.
 
@@ -109,6 +195,50 @@ def api_create_or_update_user_movie_interaction(
     )
 
 
+@router.post("/{user_id}/interactions/bulk", response_model=models_api.InteractionsImportResultAPI,
+             summary="Массовый импорт взаимодействий")
+async def api_bulk_import_user_interactions(
+        request: Request,
+        user_id: int,
+        format: Optional[str] = Query(None, pattern="^(jsonl|csv)$"),
+        batch_size: int = Query(interactions_import.DEFAULT_BATCH_SIZE, ge=1, le=10000),
+        db: Session = Depends(get_db_dependency)
+):
+    """
+    Импортирует взаимодействия пользователя из тела запроса.
+
+    Тело - JSON Lines (по объекту {"movie_id", "status", "rate"} на строку)
+    или CSV с заголовком movie_id,status,rate. Формат берется из параметра
+    format, а при его отсутствии - из заголовка Content-Type.
+
+    Args:
+        request: Объект запроса.
+        user_id: ID пользователя.
+        format: Формат тела запроса ('jsonl' или 'csv').
+        batch_size: Количество взаимодействий в одной пачке.
+        db: Сессия базы данных.
+
+    Raises:
+        HTTPException: Если пользователь не найден или тело не в UTF-8.
+
+    Returns:
+        Итог импорта.
+    """
+    try:
+        text = (await request.body()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Request body must be UTF-8 encoded")
+
+    if not await run_in_threadpool(crud.get_user, db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    fmt = format or interactions_import.detect_format(request.headers.get("content-type"))
+    result = await run_in_threadpool(
+        interactions_import.import_user_interactions, db, user_id, text, fmt, batch_size
+    )
+    return models_api.InteractionsImportResultAPI(**result.model_dump())
+
+
 @router.delete("/{user_id}/interactions/{movie_id}", status_code=status.HTTP_200_OK,
                summary="Удалить взаимодействие")
 def api_delete_user_movie_interaction(
@@ -139,13 +269,57 @@ def api_delete_user_movie_interaction(
     return {"detail": "Interaction deleted successfully"}
 
 
+@router.get("/{user_id}/library", response_model=models_api.UserLibraryAPI,
+            summary="Библиотека пользователя по статусам")
+def api_get_user_library(
+        user_id: int,
+        status: Optional[InteractionStatusEnum] = None,
+        after: Optional[int] = Query(None, description="next_after предыдущей страницы статуса"),
+        limit: int = Query(crud.LIBRARY_PAGE_SIZE, ge=1, le=500),
+        include_description: bool = False,
+        db: Session = Depends(get_read_db_dependency)
+):
+    """
+    API-эндпоинт библиотеки пользователя, сгруппированной по статусам.
+
+    Возвращает для каждого статуса количество фильмов и первую страницу;
+    следующая страница статуса запрашивается параметрами status и after.
+
+    Args:
+        user_id: ID пользователя.
+        status: Вернуть только этот статус.
+        after: Курсор страницы (next_after из предыдущего ответа).
+        limit: Количество фильмов каждого статуса на странице.
+        include_description: Включить описания фильмов.
+        db: Сессия базы данных.
+
+    Raises:
+        HTTPException: Если пользователь не найден или after передан без status.
+
+    Returns:
+        Библиотека пользователя.
+    """
+    if after is not None and status is None:
+        raise HTTPException(status_code=422, detail="Parameter 'after' requires 'status'")
+    if crud.get_user_interactions_version(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    groups = crud.get_user_library(
+        db, user_id, limit=limit, status=status.value if status else None, after=after,
+        include_description=include_description
+    )
+    return models_api.UserLibraryAPI(
+        user_id=user_id, groups={name: group.model_dump() for name, group in groups.items()}
+    )
+
+
 @router.get(
     "/{user_id}/interactions/",
     response_class=HTMLResponse,
     summary="Страница со всеми взаимодействиями пользователя"
 )
 def page_get_all_user_interactions(
-        request: Request, user_id: int, db: Session = Depends(get_db_dependency)
+        request: Request, user_id: int, db: Session = Depends(get_read_db_dependency)
 ):
     """
     Отображает HTML-страницу со всеми взаимодействиями пользователя.
@@ -158,9 +332,10 @@ def page_get_all_user_interactions(
     Returns:
         HTML-ответ со страницей "Библиотека".
     """
-    interactions = crud.get_user_interactions(db=db, user_id=user_id)
-    return templates.TemplateResponse(
-        "library.html", {"request": request, "interactions": interactions}
+    return render_page(
+        request, templates, "library.html",
+        lambda: {"interactions": crud.get_user_interactions(db=db, user_id=user_id)},
+        version=(crud.get_user_interactions_version(db, user_id), crud.get_catalog_version(db))
     )
 
 
@@ -170,7 +345,7 @@ def page_get_all_user_interactions(
     summary="Страница с взаимодействиями по статусу"
 )
 def page_get_user_interactions_by_status(
-        request: Request, user_id: int, status: str, db: Session = Depends(get_db_dependency)
+        request: Request, user_id: int, status: str, db: Session = Depends(get_read_db_dependency)
 ):
     """
     Отображает HTML-страницу с взаимодействиями пользователя, отфильтрованными по статусу.
@@ -184,55 +359,124 @@ def page_get_user_interactions_by_status(
     Returns:
         HTML-ответ со страницей "Библиотека".
     """
-    interactions = crud.get_user_interactions(db=db, user_id=user_id, status=status)
-    return templates.TemplateResponse(
-        "library.html", {"request": request, "interactions": interactions}
+    return render_page(
+        request, templates, "library.html",
+        lambda: {"interactions": crud.get_user_interactions(db=db, user_id=user_id, status=status)},
+        version=(crud.get_user_interactions_version(db, user_id), crud.get_catalog_version(db))
     )
 
 
-@router.get("/{user_id}/recommendations/", response_class=HTMLResponse,
-            summary="Получить и отобразить рекомендации")
-async def page_get_recommendations_for_user(
+@router.get("/{user_id}/recommendations", response_model=models_api.RecommendationsAPI,
+            summary="Получить рекомендации в формате JSON")
+def api_get_recommendations_for_user(
         request: Request,
+        response: Response,
         user_id: int,
-        limit: Optional[int] = 10,
-        db: Session = Depends(get_db_dependency)
+        limit: int = Query(10, ge=1, le=MAX_RECOMMENDATIONS),
+        genres: Optional[str] = Query(None, description="Любимые жанры нового пользователя через запятую"),
+        db: Session = Depends(get_read_db_dependency)
 ):
     """
-    Генерирует и отображает HTML-страницу с рекомендациями для пользователя.
+    API-эндпоинт для получения рекомендаций пользователя в формате JSON.
+
+    Ответ снабжается ETag, построенным из версии библиотеки пользователя и
+    версий каталога и рейтинга популярности. Если клиент присылает
+    совпадающий If-None-Match, возвращается 304 без запуска рекомендательной
+    системы. Пользователь без взаимодействий получает список холодного старта
+    (cold_start=true).
 
     Args:
         request: Объект запроса.
+        response: Объект ответа (для установки заголовков).
         user_id: ID пользователя.
         limit: Количество рекомендаций.
+        genres: Жанры, выбранные пользователем, для списка холодного старта.
         db: Сессия базы данных.
 
     Raises:
-        HTTPException: Если пользователь не найден или произошла ошибка генерации.
+        HTTPException: Если пользователь не найден или рекомендаций нет.
 
     Returns:
-        HTML-ответ со страницей рекомендаций.
+        Список рекомендованных фильмов или пустой ответ 304.
     """
-    if not crud.get_user(db, user_id=user_id):
+    user_version = crud.get_user_interactions_version(db, user_id=user_id)
+    if user_version is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    movies_ids = get_movie_recommendations_by_user_id(user_id=user_id, count=limit)
+    etag = _make_recommendations_etag(
+        user_id, user_version, _recommendations_data_version(db), limit, genres
+    )
+    cache_headers = {"ETag": etag, "Cache-Control": RECOMMENDATIONS_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    movies_ids, is_cold_start = recommend_movie_ids(db, user_id, user_version, limit, genres)
     if not movies_ids:
         raise HTTPException(
             status_code=404,
             detail="No recommendations available: insufficient user data or movies."
         )
-    try:
-        recommendations = get_user_recommendations_movies(db, movies_ids)
-    except Exception as e:
-        # Отлавливаем любые ошибки от рекомендательной системы
-        raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
-    if not recommendations:
-        raise HTTPException(
-            status_code=404,
-            detail="No recommendations available: insufficient user data or movies."
-        )
-    return templates.TemplateResponse(
-        "recommendations.html",
-        {"request": request, "recommendations": recommendations}
+
+    items = get_user_recommendations_movies(db, movies_ids)
+
+    response.headers.update(cache_headers)
+    return models_api.RecommendationsAPI(
+        user_id=user_id,
+        items=[models_api.MovieAPI.model_validate(movie) for movie in items],
+        cold_start=is_cold_start
+    )
+
+
+@router.get("/{user_id}/recommendations/", response_class=HTMLResponse,
+            summary="Получить и отобразить рекомендации")
+def page_get_recommendations_for_user(
+        request: Request,
+        user_id: int,
+        limit: int = Query(10, ge=1, le=MAX_RECOMMENDATIONS),
+        genres: Optional[str] = Query(None, description="Любимые жанры нового пользователя через запятую"),
+        db: Session = Depends(get_read_db_dependency)
+):
+    """
+    Генерирует и отображает HTML-страницу с рекомендациями для пользователя.
+
+    Args:
+        request: Объект запроса.
+        user_id: ID пользователя.
+        limit: Количество рекомендаций.
+        genres: Жанры, выбранные пользователем, для списка холодного старта.
+        db: Сессия базы данных.
+
+    Raises:
+        HTTPException: Если пользователь не найден или произошла ошибка генерации.
+
+    Returns:
+        HTML-ответ со страницей рекомендаций.
+    """
+    user_version = crud.get_user_interactions_version(db, user_id)
+    if user_version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    def build_context() -> dict:
+        movies_ids, is_cold_start = recommend_movie_ids(db, user_id, user_version, limit, genres)
+        if not movies_ids:
+            raise HTTPException(
+                status_code=404,
+                detail="No recommendations available: insufficient user data or movies."
+            )
+        try:
+            recommendations = get_user_recommendations_movies(db, movies_ids)
+        except Exception as e:
+            # Отлавливаем любые ошибки от рекомендательной системы
+            raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
+        if not recommendations:
+            raise HTTPException(
+                status_code=404,
+                detail="No recommendations available: insufficient user data or movies."
+            )
+        return {"recommendations": recommendations, "cold_start": is_cold_start}
+
+    # Рекомендации пересчитываются только при изменении библиотеки пользователя, каталога или рейтинга
+    return render_page(
+        request, templates, "recommendations.html", build_context,
+        version=(user_version, _recommendations_data_version(db))
     )
@@ -0,0 +1,115 @@
+"""
+Бенчмарк памяти записей только для чтения (tracemalloc).
+
+Сравнивает ORM-объекты и словари, которые раньше создавались на горячих
+путях, с неизменяемыми записями (app.records.MovieRecord) и запросами
+столбцов. Для каждого случая выводятся:
+
+    - blocks   - количество блоков памяти, занятых результатом;
+    - KB       - объем памяти результата;
+    - peak KB  - пиковый прирост памяти во время вызова.
+
+Каждый замер выполняется в новой сессии, чтобы identity map не переносилась
+между случаями:
+
+    python benchmarks/allocations.py --scale small --movies 1000
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tracemalloc
+from typing import Callable
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_dir not in sys.path:
+    sys.path.insert(0, benchmarks_dir)
+
+import pandas as pd
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import crud, models_db
+from app.cache import movie_cache
+from film_advisor_lib import recommendation_service
+from synthetic import SCALES, create_sqlite_engine, populate
+
+
+def measure_allocations(make_session: Callable[[], Session], func: Callable[[Session], object]) -> dict:
+    """Вызывает func в новой сессии и возвращает память, занятую результатом, и пик."""
+    session = make_session()
+    try:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_size = tracemalloc.get_traced_memory()[0]
+        result = func(session)
+        peak = tracemalloc.get_traced_memory()[1] - start_size
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        del result
+    finally:
+        session.close()
+    return {
+        "blocks": sum(stat.count_diff for stat in stats if stat.count_diff > 0),
+        "kb": sum(stat.size_diff for stat in stats if stat.size_diff > 0) / 1024,
+        "peak_kb": peak / 1024,
+    }
+
+
+def movies_data_from_dicts(session: Session) -> pd.DataFrame:
+    """Прежняя загрузка каталога: словарь на каждый фильм, затем DataFrame."""
+    movie = models_db.Movie
+    rows = session.query(movie.id, movie.title, movie.genres_str, movie.rating_imdb).all()
+    return pd.DataFrame([
+        {"movieId": row.id, "title": row.title, "genres": row.genres_str or "",
+         "mean_rating": row.rating_imdb or 0.0, "rating_count": 1}
+        for row in rows
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память записей только для чтения")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Масштаб данных")
+    parser.add_argument("--movies", type=int, default=1000, help="Фильмов в запросе по списку ID")
+    args = parser.parse_args()
+
+    engine = create_sqlite_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate(engine, SCALES[args.scale], verbose=False)
+    make_session = sessionmaker(bind=engine)
+    movie_ids = list(range(1, args.movies + 1))
+
+    def records_by_ids(session):
+        movie_cache.clear()
+        return crud.get_movie_records(session, movie_ids)
+
+    cases = [
+        ("movies by id: ORM objects",
+         lambda session: session.query(models_db.Movie).filter(models_db.Movie.id.in_(movie_ids)).all()),
+        ("movies by id: records", records_by_ids),
+        ("search: ORM objects",
+         lambda session: session.query(models_db.Movie).filter(models_db.Movie.title.contains("Love")).all()),
+        ("search: records", lambda session: crud.search_movies(session, limit=None, name="Love")),
+        ("catalog: dicts -> DataFrame", movies_data_from_dicts),
+        ("catalog: rows -> DataFrame", recommendation_service.get_movies_data),
+    ]
+
+    print(f"{'case':<30} {'blocks':>10} {'KB':>10} {'peak KB':>10}")
+    try:
+        for name, func in cases:
+            result = measure_allocations(make_session, func)
+            print(f"{name:<30} {result['blocks']:>10} {result['kb']:>10.1f} {result['peak_kb']:>10.1f}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
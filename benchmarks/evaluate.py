@@ -0,0 +1,293 @@
+"""
+Офлайн-оценка качества и скорости рекомендательных движков.
+
+Взаимодействия user_movie делятся на обучающие и тестовые: по времени
+(последние --test-fraction взаимодействий пользователя по updated_at и id)
+или случайно. Каждый движок строит top-k для всех пользователей только по
+обучающим данным; рекомендации сравниваются с тестовыми фильмами (кроме
+брошенных - DROPPED). В одном отчете выводятся:
+
+    - precision@k, recall@k, NDCG@k - средние по пользователям;
+    - coverage - доля фильмов каталога, попавших хотя бы в один список;
+    - задержка движка на пользователя (p50, p95, p99).
+
+Пользователи обрабатываются пулом процессов (fork: каталог и разбиение
+загружаются один раз и разделяются рабочими процессами). Движки - функции
+из ENGINES поверх film_advisor_lib; новый движок достаточно добавить туда.
+
+Синтетическая база (benchmarks/synthetic.py) или существующая:
+
+    python benchmarks/evaluate.py --scale small --k 10 --output eval.json
+    python benchmarks/evaluate.py --database-url sqlite:///data/recofilm.db --split random
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_dir not in sys.path:
+    sys.path.insert(0, benchmarks_dir)
+
+import numpy as np
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import popularity
+from app.models_db import InteractionStatusEnum, Movie, UserMovie
+from film_advisor_lib.catalog import CatalogIndex
+from film_advisor_lib.recommendation_service import RECOMMENDATION_DIVERSITY, build_genre_profile
+from synthetic import SCALES, create_sqlite_engine, populate
+
+# Минимальная оценка фильма в рекомендациях (как в get_recommended_movies)
+MIN_AVG_RATING = 3.0
+# Пользователей в одной задаче пула процессов
+CHUNK_SIZE = 200
+
+
+class UserSplit(NamedTuple):
+    """Обучающие и тестовые данные одного пользователя."""
+    user_id: int
+    # Профиль жанров по обучающим взаимодействиям
+    profile: Dict[str, float]
+    # Отсортированные ID фильмов обучающих взаимодействий (исключаются из рекомендаций)
+    train_ids: np.ndarray
+    # Фильмы тестовых взаимодействий, кроме брошенных
+    test_ids: FrozenSet[int]
+
+
+class EvaluationContext(NamedTuple):
+    """Данные, общие для всех движков и пользователей."""
+    index: CatalogIndex
+    # ID фильмов в порядке рейтинга популярности (движок popularity)
+    popular_ids: np.ndarray
+    users: List[UserSplit]
+
+
+def split_interactions(session: Session, split: str, test_fraction: float, seed: int) -> List[UserSplit]:
+    """
+    Делит взаимодействия каждого пользователя на обучающие и тестовые.
+
+    Args:
+        session: Сессия базы данных.
+        split: 'time' - последние взаимодействия в тест, 'random' - случайные.
+        test_fraction: Доля взаимодействий пользователя в тесте.
+        seed: Начальное значение генератора для случайного разбиения.
+
+    Returns:
+        Разбиения пользователей, у которых есть и обучающие, и тестовые фильмы.
+    """
+    genres_by_movie = dict(session.query(Movie.id, Movie.genres_str).all())
+    rows = (
+        session.query(UserMovie.user_id, UserMovie.movie_id, UserMovie.status)
+        .order_by(UserMovie.user_id, UserMovie.updated_at, UserMovie.id)
+        .all()
+    )
+    by_user: Dict[int, list] = {}
+    for row in rows:
+        by_user.setdefault(row.user_id, []).append(row)
+
+    rng = random.Random(seed)
+    users = []
+    for user_id, interactions in by_user.items():
+        if len(interactions) < 2:
+            continue
+        test_count = min(len(interactions) - 1, max(1, round(len(interactions) * test_fraction)))
+        if split == "random":
+            interactions = interactions[:]
+            rng.shuffle(interactions)
+        train, test = interactions[:-test_count], interactions[-test_count:]
+        test_ids = frozenset(row.movie_id for row in test if row.status != InteractionStatusEnum.DROPPED)
+        profile = build_genre_profile((row.status, genres_by_movie.get(row.movie_id)) for row in train)
+        if not test_ids:
+            continue
+        users.append(UserSplit(
+            user_id, profile, np.unique(np.array([row.movie_id for row in train], dtype=np.int64)), test_ids
+        ))
+    return users
+
+
+# --- Движки ---
+
+def genre_engine(diversity: float) -> Callable[[EvaluationContext, UserSplit, int], List[int]]:
+    """Скор по жанрам профиля (CatalogIndex.top_n) с заданной силой разнообразия."""
+    def recommend(context: EvaluationContext, user: UserSplit, k: int) -> List[int]:
+        genres = [genre for genre, weight in user.profile.items() if weight > 0]
+        return context.index.top_n(
+            user.profile, genres, user.train_ids, n=k, min_avg_rating=MIN_AVG_RATING, diversity=diversity
+        )
+    return recommend
+
+
+def popularity_engine(context: EvaluationContext, user: UserSplit, k: int) -> List[int]:
+    """Базовая линия: рейтинг популярности (байесовское среднее), кроме уже отмеченных пользователем."""
+    candidates = context.popular_ids[:k + len(user.train_ids)]
+    positions = np.minimum(np.searchsorted(user.train_ids, candidates), max(len(user.train_ids) - 1, 0))
+    keep = user.train_ids[positions] != candidates if len(user.train_ids) else np.ones(len(candidates), bool)
+    return [int(movie_id) for movie_id in candidates[keep][:k]]
+
+
+ENGINES: Dict[str, Callable[[EvaluationContext, UserSplit, int], List[int]]] = {
+    "genre": genre_engine(0.0),
+    "genre_diverse": genre_engine(RECOMMENDATION_DIVERSITY),
+    "popularity": popularity_engine,
+}
+
+
+# --- Оценка ---
+
+# Контекст рабочих процессов: задается до создания пула и наследуется при fork
+_context: Optional[EvaluationContext] = None
+
+
+def evaluate_users(engine_name: str, start: int, stop: int, k: int) -> dict:
+    """Оценивает движок на пользователях [start, stop) контекста; выполняется в рабочем процессе."""
+    engine = ENGINES[engine_name]
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    precision, recall, ndcg, latency_ms, recommended = [], [], [], [], set()
+    for user in _context.users[start:stop]:
+        begin = time.perf_counter()
+        movie_ids = engine(_context, user, k)
+        latency_ms.append((time.perf_counter() - begin) * 1000)
+
+        hits = np.array([movie_id in user.test_ids for movie_id in movie_ids[:k]], dtype=bool)
+        hit_count = int(hits.sum())
+        precision.append(hit_count / k)
+        recall.append(hit_count / len(user.test_ids))
+        ideal = discounts[:min(k, len(user.test_ids))].sum()
+        ndcg.append(float(discounts[:len(hits)][hits].sum() / ideal))
+        recommended.update(movie_ids)
+    return {
+        "precision": precision, "recall": recall, "ndcg": ndcg,
+        "latency_ms": latency_ms, "recommended": recommended,
+    }
+
+
+def run_engine(engine_name: str, k: int, workers: int) -> dict:
+    """Оценивает движок на всех пользователях контекста и сводит метрики."""
+    ranges = [(start, min(start + CHUNK_SIZE, len(_context.users)))
+              for start in range(0, len(_context.users), CHUNK_SIZE)]
+    if workers > 1:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            parts = list(pool.map(evaluate_users, *zip(*[(engine_name, start, stop, k) for start, stop in ranges])))
+    else:
+        parts = [evaluate_users(engine_name, start, stop, k) for start, stop in ranges]
+
+    def collect(name: str) -> np.ndarray:
+        return np.array([value for part in parts for value in part[name]])
+
+    latency = collect("latency_ms")
+    recommended = set().union(*(part["recommended"] for part in parts)) if parts else set()
+    return {
+        "users": len(latency),
+        f"precision@{k}": round(float(collect("precision").mean()), 5) if len(latency) else 0.0,
+        f"recall@{k}": round(float(collect("recall").mean()), 5) if len(latency) else 0.0,
+        f"ndcg@{k}": round(float(collect("ndcg").mean()), 5) if len(latency) else 0.0,
+        "coverage": round(len(recommended) / max(len(_context.index), 1), 5),
+        "latency_ms": {
+            name: round(float(np.percentile(latency, q)), 4) if len(latency) else 0.0
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99))
+        },
+    }
+
+
+def load_popular_ids(session: Session) -> np.ndarray:
+    """
+    Возвращает рейтинг популярности, как в production (app.popularity).
+
+    Читается таблица movie_popularity; если рейтинг в базе не рассчитан
+    (синтетическая база), он строится тем же байесовским средним в памяти.
+    """
+    ranking = popularity.get_ranking(session)
+    if not ranking:
+        rows = session.query(Movie.id, Movie.rating_imdb, Movie.vote_count).all()
+        ranking = [movie_id for movie_id, _ in popularity.compute_ranking(rows, size=len(rows))]
+    return np.array(ranking, dtype=np.int64)
+
+
+def load_context(session: Session, split: str, test_fraction: float, seed: int) -> EvaluationContext:
+    """Загружает каталог, рейтинг популярности и разбиение взаимодействий."""
+    index = CatalogIndex.load(session)
+    return EvaluationContext(index, load_popular_ids(session), split_interactions(session, split, test_fraction, seed))
+
+
+def main():
+    global _context
+
+    parser = argparse.ArgumentParser(description="Офлайн-оценка рекомендательных движков")
+    parser.add_argument("--database-url", default=None, help="Оценивать на существующей базе")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small",
+                        help="Масштаб синтетической базы (без --database-url)")
+    parser.add_argument("--split", choices=("time", "random"), default="time", help="Способ разбиения")
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="Доля взаимодействий в тесте")
+    parser.add_argument("--k", type=int, default=10, help="Длина списка рекомендаций")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES),
+                        help="Оцениваемые движки")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Рабочих процессов")
+    parser.add_argument("--seed", type=int, default=42, help="Начальное значение генератора")
+    parser.add_argument("--output", default=None, help="Файл для отчета в JSON")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from app.database import create_db_engine
+        engine = create_db_engine(args.database_url, echo=False)
+        source = engine.url.render_as_string(hide_password=True)
+    else:
+        engine = create_sqlite_engine()
+        with contextlib.redirect_stdout(io.StringIO()):
+            populate(engine, SCALES[args.scale], seed=args.seed, verbose=False)
+        source = f"synthetic:{args.scale}"
+
+    session = sessionmaker(bind=engine)()
+    try:
+        _context = load_context(session, args.split, args.test_fraction, args.seed)
+    finally:
+        session.close()
+        engine.dispose()
+    if "fork" not in multiprocessing.get_all_start_methods():
+        args.workers = 1
+
+    print(f"{source}: {len(_context.index)} movies, {len(_context.users)} users, "
+          f"split {args.split} ({args.test_fraction:.0%} test), k={args.k}, {args.workers} workers")
+    print(f"{'engine':<16} {'precision':>10} {'recall':>10} {'ndcg':>10} {'coverage':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    results = {}
+    for name in args.engines:
+        result = run_engine(name, args.k, args.workers)
+        results[name] = result
+        latency = result["latency_ms"]
+        print(f"{name:<16} {result[f'precision@{args.k}']:>10.4f} {result[f'recall@{args.k}']:>10.4f} "
+              f"{result[f'ndcg@{args.k}']:>10.4f} {result['coverage']:>9.3f} "
+              f"{latency['p50']:>8.3f} {latency['p95']:>8.3f} {latency['p99']:>8.3f}")
+
+    if args.output:
+        report = {
+            "source": source,
+            "params": {
+                "split": args.split, "test_fraction": args.test_fraction, "k": args.k,
+                "workers": args.workers, "seed": args.seed, "diversity": RECOMMENDATION_DIVERSITY,
+            },
+            "data": {"movies": len(_context.index), "users": len(_context.users)},
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "engines": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
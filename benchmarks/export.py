@@ -0,0 +1,94 @@
+"""
+Бенчмарк полной выгрузки каталога и взаимодействий (app.export).
+
+Для каждой таблицы и формата выгрузка кодируется целиком (как CLI и
+GET /export/{table}) и измеряются:
+
+    - rows/sec и MB/sec - пропускная способность (без tracemalloc);
+    - peak MB - пиковая память, отслеживаемая tracemalloc, во втором проходе:
+      при потоковой выгрузке она не зависит от количества строк.
+
+Parquet измеряется, только если установлен pyarrow:
+
+    python benchmarks/export.py --scale medium
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_dir not in sys.path:
+    sys.path.insert(0, benchmarks_dir)
+
+from sqlalchemy.orm import sessionmaker
+
+from app.export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_TABLES, iter_export
+from synthetic import SCALES, create_sqlite_engine, populate
+
+
+def run_export(make_session, table: str, fmt: str, batch_size: int) -> tuple:
+    """Выполняет выгрузку и возвращает (строк, байт); строки считаются по ID в первом столбце."""
+    session = make_session()
+    try:
+        size = 0
+        for chunk in iter_export(session, table, fmt=fmt, batch_size=batch_size):
+            size += len(chunk)
+        rows = session.query(EXPORT_TABLES[table][0].column).count()
+    finally:
+        session.close()
+    return rows, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность полной выгрузки")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Масштаб данных")
+    parser.add_argument("--formats", nargs="+", choices=EXPORT_FORMATS, default=list(EXPORT_FORMATS),
+                        help="Форматы выгрузки")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Размер пакета чтения")
+    parser.add_argument("--path", default=None, help="Файл базы SQLite (по умолчанию - в памяти)")
+    args = parser.parse_args()
+
+    formats = list(args.formats)
+    if "parquet" in formats:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("pyarrow is not installed, skipping parquet")
+            formats.remove("parquet")
+
+    engine = create_sqlite_engine(args.path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate(engine, SCALES[args.scale], verbose=False)
+    make_session = sessionmaker(bind=engine)
+
+    print(f"{'table':<14} {'format':<8} {'rows':>10} {'MB':>8} {'sec':>7} {'rows/sec':>10} "
+          f"{'MB/sec':>8} {'peak MB':>8}")
+    try:
+        for table in EXPORT_TABLES:
+            for fmt in formats:
+                start = time.perf_counter()
+                rows, size = run_export(make_session, table, fmt, args.batch_size)
+                elapsed = max(time.perf_counter() - start, 1e-9)
+
+                tracemalloc.start()
+                run_export(make_session, table, fmt, args.batch_size)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                megabytes = size / 1024 / 1024
+                print(f"{table:<14} {fmt:<8} {rows:>10} {megabytes:>8.1f} {elapsed:>7.2f} "
+                      f"{rows / elapsed:>10.0f} {megabytes / elapsed:>8.1f} {peak / 1024 / 1024:>8.1f}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Нагрузочный сценарий HTTP для основных маршрутов приложения.
+
+Несколько потоков в течение заданного времени запрашивают маршруты
+сценария (главная страница, поиск, список и карточка фильма, библиотека
+и рекомендации пользователя) у запущенного сервера и считают запросы в
+секунду и перцентили задержки по каждому маршруту:
+
+    uvicorn app.main:app --workers 4
+    python benchmarks/http_load.py --url http://127.0.0.1:8000 --concurrency 16 --duration 30
+"""
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import requests
+
+# Маршрут сценария: имя для отчета, шаблон пути и вес (доля запросов)
+SCENARIO = [
+    ("index", "/", 3),
+    ("search", "/search?name={word}", 2),
+    ("movie_list", "/movies/?limit=50", 2),
+    ("movie", "/movies/{movie_id}", 3),
+    ("library", "/users/{user_id}/interactions/", 1),
+    ("recommendations", "/users/{user_id}/recommendations?limit=10", 1),
+]
+SEARCH_WORDS = ["Star", "Night", "Love", "City", "Dark", "King"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def worker(base_url: str, deadline: float, args, timings: Dict[str, List[float]], errors: Dict[str, int],
+           lock: threading.Lock, seed: int):
+    rng = random.Random(seed)
+    names = [name for name, _, _ in SCENARIO]
+    paths = {name: path for name, path, _ in SCENARIO}
+    weights = [weight for _, _, weight in SCENARIO]
+    session = requests.Session()
+    local_timings = defaultdict(list)
+    local_errors = defaultdict(int)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        path = paths[name].format(
+            word=rng.choice(SEARCH_WORDS),
+            movie_id=rng.randint(1, args.max_movie_id),
+            user_id=rng.randint(1, args.max_user_id),
+        )
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=30)
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        local_timings[name].append((time.perf_counter() - start) * 1000)
+        if not ok:
+            local_errors[name] += 1
+    with lock:
+        for name, values in local_timings.items():
+            timings[name].extend(values)
+        for name, count in local_errors.items():
+            errors[name] += count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест основных маршрутов")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Адрес сервера")
+    parser.add_argument("--concurrency", type=int, default=8, help="Количество параллельных клиентов")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность теста (сек)")
+    parser.add_argument("--max-movie-id", type=int, default=10000, help="Диапазон ID фильмов")
+    parser.add_argument("--max-user-id", type=int, default=1000, help="Диапазон ID пользователей")
+    parser.add_argument("--output", default=None, help="Файл для результатов в JSON")
+    args = parser.parse_args()
+
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.url.rstrip("/"), deadline, args, timings, errors, lock, i))
+        for i in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = {}
+    print(f"{'route':<16} {'requests':>9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, _, _ in SCENARIO:
+        values = timings.get(name, [])
+        results[name] = {
+            "requests": len(values),
+            "rps": round(len(values) / args.duration, 1),
+            "p50_ms": round(statistics.median(values), 2) if values else 0.0,
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "errors": errors.get(name, 0),
+        }
+        r = results[name]
+        print(f"{name:<16} {r['requests']:>9} {r['rps']:>8.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>7}")
+    total = sum(len(values) for values in timings.values())
+    print(f"total: {total} requests, {total / args.duration:.1f} rps")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"concurrency": args.concurrency, "duration": args.duration, "routes": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Проверка бюджета времени импорта веб-приложения.
+
+Запускает `python -X importtime -c "import app.main"` в отдельном процессе,
+суммирует накопленное время импорта модуля app.main и сравнивает его с
+бюджетом. Также проверяет, что при импорте не загружаются тяжелые модули
+(pandas, рекомендательная система). Код возврата 1 означает нарушение
+бюджета, поэтому скрипт можно запускать в CI:
+
+    python benchmarks/import_time.py --budget-ms 1000
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_MODULE = "app.main"
+DEFAULT_BUDGET_MS = 1000.0
+# Модули, которые не должны импортироваться при запуске веб-процесса
+FORBIDDEN_MODULES = ("pandas", "film_advisor_lib.recommendation_service")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_import(module: str) -> dict:
+    """
+    Импортирует модуль в отдельном процессе с -X importtime.
+
+    Args:
+        module: Имя импортируемого модуля.
+
+    Returns:
+        Словарь {имя модуля: накопленное время импорта в микросекундах}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import of {module} failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка бюджета времени импорта")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("RECOFILM_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых медленных модулей показать")
+    args = parser.parse_args()
+
+    timings = profile_import(args.module)
+    total_ms = timings[args.module] / 1000
+
+    print(f"Slowest imports under {args.module}:")
+    for name, cumulative in sorted(timings.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    print(f"{args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+
+    failures = [f"forbidden module imported: {name}" for name in FORBIDDEN_MODULES if name in timings]
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
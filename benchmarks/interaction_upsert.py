@@ -0,0 +1,94 @@
+"""
+Бенчмарк записи взаимодействия пользователя с фильмом.
+
+Сравнивает прежнюю схему (SELECT + commit + refresh + commit + refresh) с
+одной командой INSERT ... ON DUPLICATE KEY UPDATE из crud.update_user_movie_interaction.
+Запускается против БД из .env:
+
+    python benchmarks/interaction_upsert.py --iterations 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app import crud, models_db, schemas_db
+from app.database import get_db_session
+from app.models_db import InteractionStatusEnum
+
+BENCH_USERNAME = "bench_upsert_user"
+
+
+def legacy_update_user_movie_interaction(db, user_id, interaction):
+    """Прежняя реализация: поиск записи, затем два commit и два refresh."""
+    db_interaction = crud.get_user_movie_interaction(db, user_id=user_id, movie_id=interaction.movie_id)
+    if db_interaction:
+        db_interaction.status = interaction.status.value
+        db.commit()
+        db.refresh(db_interaction)
+    else:
+        db_interaction = models_db.UserMovie(
+            user_id=user_id, movie_id=interaction.movie_id, status=interaction.status.value
+        )
+        db.add(db_interaction)
+    db.commit()
+    db.refresh(db_interaction)
+    return db_interaction
+
+
+def run(db, func, user_id, movie_ids, iterations):
+    """Выполняет iterations записей (половина - вставки, половина - обновления) и возвращает задержки в мс."""
+    statuses = list(InteractionStatusEnum)
+    timings = []
+    for i in range(iterations):
+        interaction = schemas_db.UserMovieCreate(
+            movie_id=movie_ids[i % len(movie_ids)], status=statuses[i % len(statuses)]
+        )
+        start = time.perf_counter()
+        func(db, user_id, interaction)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<10} mean={statistics.mean(timings):7.3f} ms  "
+          f"p50={statistics.median(timings):7.3f} ms  p95={p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк записи взаимодействий")
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = get_db_session()
+    try:
+        user = crud.get_user_by_username(db, BENCH_USERNAME) or crud.create_user(
+            db, schemas_db.UserCreate(username=BENCH_USERNAME)
+        )
+        # Каждый фильм записывается дважды: сначала вставка, затем обновление
+        movie_ids = [row.id for row in db.query(models_db.Movie.id).limit(max(1, args.iterations // 2)).all()]
+        if not movie_ids:
+            raise SystemExit("No movies in database: load the catalog first")
+
+        for name, func in (("legacy", legacy_update_user_movie_interaction),
+                           ("upsert", crud.update_user_movie_interaction)):
+            db.query(models_db.UserMovie).filter(models_db.UserMovie.user_id == user.id).delete()
+            db.commit()
+            report(name, run(db, func, user.id, movie_ids, args.iterations))
+
+        db.query(models_db.UserMovie).filter(models_db.UserMovie.user_id == user.id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Бенчмарк сериализации списка фильмов для GET /movies/.
+
+Сравнивает прежний путь FastAPI (валидация List[MovieAPI] из атрибутов и
+кодирование ответа) с быстрым путем app.json_stream (словари записей и
+orjson) и с потоковым JSON-массивом. Данные синтетические, БД не нужна:
+
+    python benchmarks/movie_list_json.py --sizes 1000 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app import json_stream, models_api
+from app.records import MovieRecord
+
+
+def make_records(count):
+    """Создает count синтетических записей фильмов."""
+    return [
+        MovieRecord(
+            id=i,
+            title=f"Movie {i}",
+            year=1950 + i % 75,
+            genres_str="Drama, Comedy, Thriller",
+            description="A synthetic description of the movie plot. " * 5,
+            rating_imdb=round(5 + (i % 50) / 10, 1)
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def legacy_path(records, adapter):
+    """Как FastAPI с response_model: валидация, jsonable_encoder, JSONResponse."""
+    movies = adapter.validate_python(records, from_attributes=True)
+    return JSONResponse(jsonable_encoder(movies)).body
+
+
+def fast_path(records):
+    return json_stream.FastJSONResponse([record.to_api_dict() for record in records]).body
+
+
+def stream_path(records):
+    return b"".join(json_stream.iter_json_array(record.to_api_dict() for record in records))
+
+
+def bench(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации списка фильмов")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Размеры списков")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов на замер")
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[models_api.MovieAPI])
+    print(f"encoder: {'orjson' if json_stream.orjson is not None else 'json'}")
+    print(f"{'rows':>8} {'pydantic ms':>12} {'fast ms':>10} {'stream ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        records = make_records(size)
+        legacy = bench(lambda: legacy_path(records, adapter), args.repeat)
+        fast = bench(lambda: fast_path(records), args.repeat)
+        stream = bench(lambda: stream_path(records), args.repeat)
+        print(f"{size:>8} {legacy:>12.2f} {fast:>10.2f} {stream:>10.2f} {legacy / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
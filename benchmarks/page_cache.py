@@ -0,0 +1,64 @@
+"""
+Бенчмарк HTML-страниц с кэшем отрендеренных страниц и без него.
+
+Запросы выполняются в процессе через TestClient (без сети), поэтому
+результат показывает стоимость рендеринга и запросов к БД. Для каждой
+страницы измеряются: промах кэша (кэш выключен), попадание в кэш и
+условный запрос с If-None-Match (304). Запускается против БД из .env:
+
+    python benchmarks/page_cache.py --requests 500 --user-id 1
+"""
+
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from fastapi.testclient import TestClient
+
+from app import page_cache
+from app.main import create_app
+
+
+def measure(client, url, requests, headers=None):
+    """Выполняет requests запросов и возвращает (запросов в секунду, код последнего ответа)."""
+    status_code = None
+    start = time.perf_counter()
+    for _ in range(requests):
+        status_code = client.get(url, headers=headers).status_code
+    return requests / (time.perf_counter() - start), status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк кэша HTML-страниц")
+    parser.add_argument("--requests", type=int, default=500, help="Количество запросов на сценарий")
+    parser.add_argument("--user-id", type=int, default=1, help="ID пользователя для страницы библиотеки")
+    args = parser.parse_args()
+
+    urls = ["/", "/search?name=the", f"/users/{args.user_id}/interactions/"]
+    encoding = {"Accept-Encoding": "gzip"}
+
+    with TestClient(create_app(startup_hooks=[])) as client:
+        print(f"{'page':<28} {'no cache':>12} {'cached':>12} {'304':>12}  rps")
+        for url in urls:
+            page_cache.PAGE_CACHE_ENABLED = False
+            uncached, status_code = measure(client, url, args.requests, encoding)
+            if status_code != 200:
+                print(f"{url:<28} skipped: HTTP {status_code}")
+                continue
+
+            page_cache.PAGE_CACHE_ENABLED = True
+            page_cache.clear_page_cache()
+            etag = client.get(url, headers=encoding).headers["etag"]
+            cached, _ = measure(client, url, args.requests, encoding)
+            not_modified, _ = measure(client, url, args.requests, {**encoding, "If-None-Match": etag})
+            print(f"{url:<28} {uncached:>12.0f} {cached:>12.0f} {not_modified:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
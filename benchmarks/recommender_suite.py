@@ -0,0 +1,267 @@
+"""
+Воспроизводимый набор бенчмарков рекомендательной системы и запросов каталога.
+
+Строит синтетическую базу SQLite (benchmarks/synthetic.py) заданного
+масштаба и измеряет:
+
+    - get_user_genre_profile  - профили жанров SAMPLE_USERS пользователей;
+    - get_movies_data         - загрузка каталога в DataFrame;
+    - get_top_n_by_genres     - отбор top-N по жанрам в DataFrame;
+    - catalog_load            - загрузка каталога рекомендаций (CatalogIndex);
+    - catalog_refresh         - дочитывание CHANGED_MOVIES измененных фильмов в каталог;
+    - catalog_top_n           - отбор top-N по жанрам в каталоге;
+    - catalog_top_n_diverse   - то же с переранжированием по разнообразию жанров (MMR);
+    - get_recommended_movies  - рекомендации целиком;
+    - search_movies           - SAMPLE_USERS поисков по подстроке названия;
+    - loader                  - загрузка каталога в пустую базу (ingest_movies).
+
+Результаты записываются в JSON и сравниваются с сохраненным базовым
+результатом: время (по умолчанию лучшее из замеров, оно меньше всего
+зависит от фоновой нагрузки), выросшее больше чем на --tolerance,
+считается регрессией (код возврата 1).
+
+    python benchmarks/recommender_suite.py --scale small --output results.json
+    python benchmarks/recommender_suite.py --scale small --save-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_dir not in sys.path:
+    sys.path.insert(0, benchmarks_dir)
+
+import pandas as pd
+from sqlalchemy import func, update
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.models_db import Movie
+from film_advisor_lib import catalog, load_all_movies, recommendation_service
+from synthetic import SCALES, create_sqlite_engine, movie_rows, populate
+
+BASELINE_DIR = os.path.join(benchmarks_dir, "baselines")
+DEFAULT_TOLERANCE = 0.25
+# Пользователей (и поисковых запросов) в одном замере профиля и поиска
+SAMPLE_USERS = 20
+# Измененных фильмов в одном обновлении каталога
+CHANGED_MOVIES = 20
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    """Выполняет func repeat раз (после warmup прогревочных) и возвращает статистику в мс."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)], 3),
+        "min_ms": round(timings[0], 3),
+        "runs": repeat,
+    }
+
+
+def run_suite(scale_name: str, repeat: int, loader_movies: int, seed: int = 42) -> dict:
+    """
+    Генерирует данные и выполняет все бенчмарки.
+
+    Args:
+        scale_name: Имя масштаба из SCALES.
+        repeat: Количество замеров каждого бенчмарка.
+        loader_movies: Количество фильмов для бенчмарка загрузчика.
+        seed: Начальное значение генератора случайных чисел.
+
+    Returns:
+        Результаты в формате, сохраняемом в JSON.
+    """
+    scale = SCALES[scale_name]
+    engine = create_sqlite_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_stats = populate(engine, scale, seed=seed, verbose=False)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(seed)
+    # Каждый замер обрабатывает одних и тех же пользователей, поэтому замеры сравнимы между собой
+    user_ids = [rng.randint(1, scale.users) for _ in range(SAMPLE_USERS)]
+    search_names = [f"Star {rng.randint(1, scale.movies)}" for _ in range(SAMPLE_USERS)]
+
+    results: Dict[str, dict] = {}
+    try:
+        results["get_user_genre_profile"] = measure(
+            lambda: [recommendation_service.get_user_genre_profile(session, user_id) for user_id in user_ids],
+            repeat
+        )
+
+        results["get_movies_data"] = measure(
+            lambda: recommendation_service.get_movies_data(session), repeat
+        )
+
+        movies_df = recommendation_service.get_movies_data(session)
+        profile = recommendation_service.get_user_genre_profile(session, user_ids[0])
+        genres = [genre for genre, weight in profile.items() if weight > 0]
+        exclude = crud.get_user_interacted_movie_ids(session, user_ids[0])
+        results["get_top_n_by_genres"] = measure(
+            lambda: recommendation_service.get_top_n_by_genres(movies_df, genres, profile, exclude, n=10),
+            repeat
+        )
+
+        results["catalog_load"] = measure(lambda: catalog.CatalogIndex.load(session), repeat)
+
+        # Синтетические фильмы записаны только что и попали бы в окно перекрытия обновления
+        # (catalog.REFRESH_OVERLAP): в рабочей базе каталог изменен давно
+        written_at = session.query(func.now()).scalar() - timedelta(hours=1)
+        session.execute(update(Movie).values(updated_at=written_at))
+        session.commit()
+        index = catalog.CatalogIndex.load(session)
+        changed_ids = rng.sample(range(1, scale.movies + 1), CHANGED_MOVIES)
+        results["catalog_refresh"] = measure(lambda: index.refresh(session, changed_ids), repeat)
+        results["catalog_top_n"] = measure(lambda: index.top_n(profile, genres, exclude, n=10), repeat)
+        results["catalog_top_n_diverse"] = measure(
+            lambda: index.top_n(profile, genres, exclude, n=10,
+                                diversity=recommendation_service.RECOMMENDATION_DIVERSITY),
+            repeat
+        )
+
+        results["get_recommended_movies"] = measure(
+            lambda: recommendation_service.get_recommended_movies(session, user_ids[0], n=10), repeat
+        )
+
+        results["search_movies"] = measure(
+            lambda: [crud.search_movies(session, limit=10, name=name) for name in search_names], repeat
+        )
+    finally:
+        session.close()
+        engine.dispose()
+
+    results["loader"] = run_loader_benchmark(loader_movies, seed)
+
+    return {
+        "scale": scale_name,
+        "params": {**scale._asdict(), "repeat": repeat, "loader_movies": loader_movies, "seed": seed},
+        "data": data_stats,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+        },
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def run_loader_benchmark(count: int, seed: int, runs: int = 3) -> dict:
+    """Измеряет загрузку count фильмов в пустую базу через ingest_movies (runs прогонов)."""
+    from app.migrations import upgrade
+
+    rng = random.Random(seed)
+    movies_df = pd.DataFrame(list(movie_rows(count, rng)))
+    timings = []
+    for _ in range(runs):
+        engine = create_sqlite_engine()
+        with contextlib.redirect_stdout(io.StringIO()):
+            upgrade(engine)
+            prepared = load_all_movies.clean_movies(movies_df)
+            session = sessionmaker(bind=engine)()
+            try:
+                start = time.perf_counter()
+                load_all_movies.ingest_movies(session, prepared)
+                timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                session.close()
+                engine.dispose()
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[-1], 3),
+        "min_ms": round(timings[0], 3),
+        "runs": runs,
+        "rows_per_sec": round(count / (timings[0] / 1000), 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, metric: str = "min_ms") -> List[str]:
+    """
+    Сравнивает результаты с базовыми и печатает таблицу.
+
+    Args:
+        results: Текущие результаты.
+        baseline: Базовые результаты.
+        tolerance: Допустимый относительный рост времени.
+        metric: Сравниваемое значение: min_ms или median_ms.
+
+    Returns:
+        Имена бенчмарков с регрессией.
+    """
+    regressions = []
+    print(f"{'benchmark':<26} {'baseline ms':>12} {'current ms':>12} {'change':>8}   ({metric})")
+    for name, current in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or not base[metric]:
+            print(f"{name:<26} {'-':>12} {current[metric]:>12.3f} {'new':>8}")
+            continue
+        change = current[metric] / base[metric] - 1
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"{name:<26} {base[metric]:>12.3f} {current[metric]:>12.3f} {change:>+7.0%}{flag}")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Набор бенчмарков рекомендательной системы")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Масштаб данных")
+    parser.add_argument("--repeat", type=int, default=20, help="Замеров на бенчмарк")
+    parser.add_argument("--loader-movies", type=int, default=2000, help="Фильмов в бенчмарке загрузчика")
+    parser.add_argument("--output", default=None, help="Файл для результатов в JSON")
+    parser.add_argument("--baseline", default=None,
+                        help="Базовый результат (по умолчанию benchmarks/baselines/<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результат как базовый")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Допустимый рост времени (0.25 = 25%%)")
+    parser.add_argument("--metric", choices=("min_ms", "median_ms"), default="min_ms",
+                        help="Какое значение сравнивать с базовым")
+    args = parser.parse_args()
+
+    results = run_suite(args.scale, args.repeat, args.loader_movies)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.scale}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Baseline saved to {baseline_path}")
+
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.metric)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, result in results["results"].items():
+            print(f"{name:<26} median={result['median_ms']:.3f} ms  p95={result['p95_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
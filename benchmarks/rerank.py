@@ -0,0 +1,129 @@
+"""
+Бенчмарк переранжирования рекомендаций по разнообразию (film_advisor_lib.rerank).
+
+На синтетической базе для SAMPLE_USERS пользователей строятся рекомендации
+без разнообразия и с ним (CatalogIndex.top_n с diversity) и сравниваются:
+
+    - время MMR на пуле POOL_FACTOR * n кандидатов (медиана и p95 по пользователям);
+    - разнообразие списка: среднее косинусное сходство жанров пар фильмов
+      (меньше - разнообразнее) и количество жанров, представленных в списке;
+    - доля скора, сохраненная после переранжирования.
+
+Код возврата 1, если медиана MMR при наибольшем n больше бюджета:
+
+    python benchmarks/rerank.py --sizes 10 50 100 --budget-ms 1.0
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_dir not in sys.path:
+    sys.path.insert(0, benchmarks_dir)
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from film_advisor_lib import recommendation_service
+from film_advisor_lib.catalog import CatalogIndex
+from film_advisor_lib.rerank import POOL_FACTOR, mmr_rerank
+from synthetic import SCALES, create_sqlite_engine, populate
+
+SAMPLE_USERS = 30
+DEFAULT_BUDGET_MS = 1.0
+
+
+def list_similarity(features: np.ndarray) -> float:
+    """Среднее косинусное сходство жанров по всем парам фильмов списка."""
+    norms = np.linalg.norm(features, axis=1)
+    norms[norms == 0] = 1.0
+    unit = features / norms[:, None]
+    similarity = unit @ unit.T
+    count = len(features)
+    return float((similarity.sum() - np.trace(similarity)) / (count * (count - 1))) if count > 1 else 0.0
+
+
+def score_pool(index: CatalogIndex, profile: dict, excluded: np.ndarray, pool_size: int):
+    """Возвращает позиции и скоры пула лучших кандидатов в порядке (скор, ID), как top_n."""
+    arrays = index.arrays
+    genres = [genre for genre, weight in profile.items() if weight > 0]
+    ids = index.top_n(profile, genres, excluded, n=pool_size)
+    positions = np.array([arrays.id_to_index[movie_id] for movie_id in ids], dtype=np.intp)
+    weights = np.zeros(arrays.genre_matrix.shape[1])
+    for genre, weight in profile.items():
+        if genre in arrays.genre_columns:
+            weights[arrays.genre_columns[genre]] = weight
+    scores = (arrays.genre_matrix[positions] @ weights) * (arrays.ratings[positions] / 10.0)
+    return positions, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк переранжирования по разнообразию")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Масштаб данных")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100], help="Длины списков n")
+    parser.add_argument("--diversity", type=float, default=recommendation_service.RECOMMENDATION_DIVERSITY,
+                        help="Сила разнообразия")
+    parser.add_argument("--repeat", type=int, default=20, help="Замеров MMR на пользователя")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Бюджет медианы MMR при наибольшем n")
+    args = parser.parse_args()
+
+    engine = create_sqlite_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate(engine, SCALES[args.scale], verbose=False)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(42)
+    try:
+        index = CatalogIndex.load(session)
+        profiles = []
+        for user_id in rng.sample(range(1, SCALES[args.scale].users + 1), SAMPLE_USERS):
+            profile = recommendation_service.get_user_profile(session, user_id)
+            if profile.genres:
+                profiles.append(profile)
+    finally:
+        session.close()
+        engine.dispose()
+
+    matrix = index.arrays.genre_matrix
+    print(f"diversity {args.diversity}, pool {POOL_FACTOR}n, {len(profiles)} users")
+    print(f"{'n':>5} {'mmr median ms':>14} {'p95 ms':>8} {'similarity':>18} {'genres':>14} {'score kept':>11}")
+    median_ms = 0.0
+    for n in args.sizes:
+        timings, similarity, genres_covered, score_kept = [], [], [], []
+        for profile in profiles:
+            positions, scores = score_pool(index, profile.genres, profile.movie_ids, n * POOL_FACTOR)
+            features = matrix[positions]
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                selected = mmr_rerank(scores, features, n, args.diversity)
+                timings.append((time.perf_counter() - start) * 1000)
+            plain = np.arange(min(n, len(scores)))
+            similarity.append((list_similarity(features[plain]), list_similarity(features[selected])))
+            genres_covered.append(tuple(
+                int((features[chosen] > 0).any(axis=0).sum()) for chosen in (plain, selected)
+            ))
+            score_kept.append(scores[selected].sum() / scores[plain].sum() if scores[plain].sum() else 1.0)
+        timings.sort()
+        median_ms = statistics.median(timings)
+        before, after = (statistics.mean(values) for values in zip(*similarity))
+        genres_before, genres_after = (statistics.mean(values) for values in zip(*genres_covered))
+        print(f"{n:>5} {median_ms:>14.3f} {timings[int(len(timings) * 0.95) - 1]:>8.3f} "
+              f"{before:>8.3f} -> {after:<7.3f} {genres_before:>5.1f} -> {genres_after:<5.1f} "
+              f"{statistics.mean(score_kept):>10.1%}")
+
+    if median_ms > args.budget_ms:
+        print(f"MMR median {median_ms:.3f} ms exceeds budget {args.budget_ms:.3f} ms at n={args.sizes[-1]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Генератор синтетических каталогов и взаимодействий для бенчмарков.
+
+База создается в SQLite (в памяти или в файле) миграциями приложения,
+поэтому бенчмаркам не нужен сервер MySQL. Данные детерминированы: при
+одинаковых параметрах и seed получается одна и та же база.
+
+    python benchmarks/synthetic.py --scale small --db data/bench_small.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import NamedTuple, Optional
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+from app import models_db
+from app.database import create_db_engine
+from app.migrations import upgrade
+
+GENRES = [
+    "Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama", "Family",
+    "Fantasy", "History", "Horror", "Music", "Mystery", "Romance", "Science Fiction",
+    "Thriller", "TV Movie", "War", "Western", "Foreign",
+]
+TITLE_WORDS = [
+    "Night", "City", "Love", "Last", "Star", "Dark", "River", "Time", "Girl", "King",
+    "Road", "Fire", "Dream", "Secret", "Winter", "House", "Man", "Blood", "Sky", "Storm",
+]
+STATUSES = list(models_db.InteractionStatusEnum)
+INSERT_CHUNK = 20000
+
+
+class Scale(NamedTuple):
+    """Размер синтетического набора данных."""
+    movies: int
+    users: int
+    interactions_per_user: int
+
+
+SCALES = {
+    "tiny": Scale(movies=2_000, users=200, interactions_per_user=20),
+    "small": Scale(movies=10_000, users=1_000, interactions_per_user=30),
+    "medium": Scale(movies=100_000, users=100_000, interactions_per_user=20),
+    "large": Scale(movies=1_000_000, users=1_000_000, interactions_per_user=10),
+}
+
+
+def create_sqlite_engine(path: Optional[str] = None) -> Engine:
+    """
+    Создает движок SQLite для бенчмарков.
+
+    Движок строится как в приложении (app.database.create_db_engine), но
+    без fsync: данные бенчмарков не нужно сохранять при сбое.
+
+    Args:
+        path: Путь к файлу базы; None - база в памяти (одно общее соединение).
+    """
+    engine = create_db_engine(f"sqlite:///{path}" if path else "sqlite://", echo=False)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-200000")
+        cursor.close()
+
+    return engine
+
+
+def movie_rows(count: int, rng: random.Random, start_id: int = 1):
+    """Выдает строки фильмов для вставки в таблицу movies."""
+    for movie_id in range(start_id, start_id + count):
+        genres = rng.sample(GENRES, rng.randint(1, 3))
+        yield {
+            "id": movie_id,
+            "title": f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {movie_id}",
+            "year": rng.randint(1920, 2025),
+            "genres_str": ",".join(genres),
+            "description": "Synthetic movie " + " ".join(rng.choices(TITLE_WORDS, k=12)),
+            "rating_imdb": round(rng.uniform(1.0, 10.0), 1),
+            "vote_count": int(rng.paretovariate(1.2) * 10),
+        }
+
+
+def _insert_chunks(conn, table, rows) -> int:
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK:
+            conn.execute(insert(table), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(insert(table), chunk)
+        total += len(chunk)
+    return total
+
+
+def populate(engine: Engine, scale: Scale, seed: int = 42, verbose: bool = True) -> dict:
+    """
+    Создает схему и заполняет базу синтетическими данными.
+
+    Args:
+        engine: Движок базы данных (пустой).
+        scale: Размер набора данных.
+        seed: Начальное значение генератора случайных чисел.
+        verbose: Печатать ход генерации.
+
+    Returns:
+        Словарь с количеством созданных строк и временем генерации.
+    """
+    rng = random.Random(seed)
+    start_time = time.time()
+    upgrade(engine)
+
+    movie_table = models_db.Movie.__table__
+    user_table = models_db.User.__table__
+    user_movie_table = models_db.UserMovie.__table__
+
+    with engine.begin() as conn:
+        movies = _insert_chunks(conn, movie_table, (
+            {**row, "genres": row.pop("genres_str")} for row in movie_rows(scale.movies, rng)
+        ))
+        users = _insert_chunks(conn, user_table, (
+            {"id": user_id, "username": f"user_{user_id}", "interactions_version": 0}
+            for user_id in range(1, scale.users + 1)
+        ))
+
+        def interaction_rows():
+            for user_id in range(1, scale.users + 1):
+                count = min(scale.movies, rng.randint(1, 2 * scale.interactions_per_user))
+                for movie_id in rng.sample(range(1, scale.movies + 1), count):
+                    yield {
+                        "user_id": user_id,
+                        "movie_id": movie_id,
+                        "status": rng.choice(STATUSES),
+                        "rate": round(rng.uniform(1.0, 10.0), 1) if rng.random() < 0.3 else None,
+                    }
+
+        interactions = _insert_chunks(conn, user_movie_table, interaction_rows())
+
+    stats = {
+        "movies": movies,
+        "users": users,
+        "interactions": interactions,
+        "seconds": round(time.time() - start_time, 2),
+    }
+    if verbose:
+        print(f"Synthetic data: {movies} movies, {users} users, {interactions} interactions "
+              f"in {stats['seconds']:.1f} sec")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетической базы для бенчмарков")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Размер набора данных")
+    parser.add_argument("--db", required=True, help="Путь к файлу SQLite (будет перезаписан)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    populate(create_sqlite_engine(args.db), SCALES[args.scale], seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Измерение памяти рабочих процессов сервера.
+
+Для каждого процесса читается /proc/<pid>/smaps_rollup (Linux):
+
+    - RSS     - вся отображенная память процесса, включая разделяемую;
+    - PSS     - RSS, в которой разделяемые страницы поделены между процессами;
+    - Private - страницы, принадлежащие только этому процессу (USS).
+
+Private рабочего процесса - это память, которую добавляет каждый
+следующий рабочий; сумма PSS - память всего сервера.
+
+Запущенный сервер (PID главного процесса gunicorn):
+
+    gunicorn -c gunicorn.conf.py app.main:app
+    python benchmarks/worker_memory.py --pid <PID> --url http://127.0.0.1:8000 --users 50
+
+Без сервера: синтетическая база SQLite, рабочие процессы создаются fork
+после загрузки общего состояния (--preload, как gunicorn.conf.py) или
+загружают каталог каждый сам (без --preload):
+
+    python benchmarks/worker_memory.py --simulate 4 --scale small --preload
+    python benchmarks/worker_memory.py --simulate 4 --scale small
+
+С --refresh N после первого измерения N фильмов изменяются через ленту
+изменений каталога, рабочие дочитывают их в свой каталог (refresh), и
+память измеряется повторно: так видно, сколько общих страниц копирует
+обновление каталога.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+if benchmarks_dir not in sys.path:
+    sys.path.insert(0, benchmarks_dir)
+
+
+def read_memory(pid: int) -> Dict[str, int]:
+    """Возвращает RSS, PSS и Private процесса в килобайтах."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_kb": values.get("Rss", 0),
+        "pss_kb": values.get("Pss", 0),
+        "private_kb": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Возвращает PID дочерних процессов."""
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children", encoding="ascii") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def report(master_pid: int, worker_pids: List[int]) -> dict:
+    """Печатает таблицу памяти процессов и возвращает итоги."""
+    rows = [("master", master_pid)] + [(f"worker {i + 1}", pid) for i, pid in enumerate(worker_pids)]
+    print(f"{'process':<10} {'pid':>8} {'RSS MB':>9} {'PSS MB':>9} {'Private MB':>11}")
+    total_pss = 0
+    private = []
+    for name, pid in rows:
+        memory = read_memory(pid)
+        total_pss += memory["pss_kb"]
+        if pid != master_pid:
+            private.append(memory["private_kb"])
+        print(f"{name:<10} {pid:>8} {memory['rss_kb'] / 1024:>9.1f} {memory['pss_kb'] / 1024:>9.1f} "
+              f"{memory['private_kb'] / 1024:>11.1f}")
+    per_worker = sum(private) / len(private) / 1024 if private else 0.0
+    print(f"total PSS: {total_pss / 1024:.1f} MB, private per worker: {per_worker:.1f} MB")
+    return {"total_pss_mb": round(total_pss / 1024, 1), "private_per_worker_mb": round(per_worker, 1)}
+
+
+def warm_up(url: str, users: int) -> None:
+    """Запрашивает рекомендации users пользователей, чтобы рабочие загрузили каталог."""
+    import requests
+
+    session = requests.Session()
+    for user_id in range(1, users + 1):
+        session.get(f"{url.rstrip('/')}/users/{user_id}/recommendations?limit=10", timeout=60)
+
+
+def _wait(read_fd: int, pid: int) -> None:
+    """Ждет сигнала готовности рабочего процесса."""
+    if not os.read(read_fd, 1):
+        raise RuntimeError(f"Worker {pid} failed before measurement")
+
+
+def _recompute_users(app_main, users: int) -> None:
+    for user_id in range(1, users + 1):
+        app_main.users.get_movie_recommendations_by_user_id(user_id=user_id, count=10)
+
+
+def simulate(workers: int, scale_name: str, preload: bool, users: int, refresh: int = 0) -> dict:
+    """
+    Запускает workers процессов через fork на синтетической базе и измеряет их память.
+
+    Каждый процесс строит рекомендации для users пользователей (и при
+    необходимости загружает каталог), после чего процессы останавливаются
+    до окончания измерения. При refresh > 0 затем изменяются refresh фильмов,
+    рабочие дочитывают их в каталог, и память измеряется еще раз.
+    """
+    import contextlib
+    import io
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="recofilm-memory-"), "bench.db")
+    # Приложение импортируется после выбора базы: движок создается при импорте app.database
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["RECOFILM_SQL_ECHO"] = "0"
+    os.environ["RECOFILM_LOG_LEVEL"] = "OFF"
+    from synthetic import SCALES, create_sqlite_engine, populate
+    from app import catalog_feed, main as app_main
+    from app.database import SessionLocal, engine
+    from app.models_db import Movie
+    from film_advisor_lib.catalog import REFRESH_OVERLAP
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate(create_sqlite_engine(db_path), SCALES[scale_name], verbose=False)
+    if refresh:
+        # Каталог загружается после окна перекрытия: иначе обновление дочитает все фильмы
+        # синтетической базы, а не только измененные, как в работающем сервере
+        time.sleep(REFRESH_OVERLAP.total_seconds() + 1)
+    if preload:
+        app_main.preload_shared_state()
+
+    workers_state = []
+    for _ in range(workers):
+        ready_read, ready_write = os.pipe()
+        go_read, go_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Дочерний процесс не должен возвращаться в код родителя, даже при ошибке
+            try:
+                os.close(ready_read)
+                os.close(go_write)
+                engine.dispose(close=False)
+                _recompute_users(app_main, users)
+                os.write(ready_write, b"1")
+                if refresh and os.read(go_read, 1):
+                    # Версия каталога читается сразу, а не по интервалу опроса ленты
+                    catalog_feed.feed.mark_stale()
+                    _recompute_users(app_main, users)
+                    os.write(ready_write, b"1")
+                signal.pause()
+            finally:
+                os._exit(0)
+        os.close(ready_write)
+        os.close(go_read)
+        _wait(ready_read, pid)
+        workers_state.append((pid, ready_read, go_write))
+    pids = [pid for pid, _, _ in workers_state]
+
+    try:
+        print(f"{workers} workers, scale {scale_name}, {'preloaded' if preload else 'no preload'}")
+        result = report(os.getpid(), pids)
+        if refresh:
+            session = SessionLocal()
+            try:
+                movies = session.query(Movie).order_by(Movie.id).limit(refresh).all()
+                for movie in movies:
+                    movie.rating_imdb = (movie.rating_imdb or 0.0) + 0.1
+                session.flush()
+                catalog_feed.record_movie_changes(session, [movie.id for movie in movies])
+                session.commit()
+            finally:
+                session.close()
+            for pid, ready_read, go_write in workers_state:
+                os.write(go_write, b"1")
+                _wait(ready_read, pid)
+            print(f"after catalog refresh of {len(movies)} movies")
+            result = {"before": result, "after_refresh": report(os.getpid(), pids)}
+        return result
+    finally:
+        for pid, ready_read, go_write in workers_state:
+            os.close(ready_read)
+            os.close(go_write)
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память рабочих процессов сервера")
+    parser.add_argument("--pid", type=int, default=None, help="PID главного процесса gunicorn")
+    parser.add_argument("--url", default=None, help="Адрес сервера для прогрева перед измерением")
+    parser.add_argument("--users", type=int, default=20, help="Пользователей для прогрева")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                        help="Без сервера: N рабочих процессов на синтетической базе")
+    parser.add_argument("--scale", default="small", help="Масштаб синтетической базы (--simulate)")
+    parser.add_argument("--preload", action="store_true", help="Загрузить общее состояние до fork (--simulate)")
+    parser.add_argument("--refresh", type=int, default=0, metavar="N",
+                        help="Изменить N фильмов и измерить память после обновления каталога (--simulate)")
+    args = parser.parse_args()
+
+    if args.simulate:
+        simulate(args.simulate, args.scale, args.preload, args.users, args.refresh)
+        return
+    if args.pid is None:
+        parser.error("--pid or --simulate is required")
+    if args.url:
+        start = time.perf_counter()
+        warm_up(args.url, args.users)
+        print(f"Warm-up: {args.users} recommendation requests in {time.perf_counter() - start:.1f} sec")
+    report(args.pid, child_pids(args.pid))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""
+Каталог фильмов рекомендательной системы в массивах numpy с инкрементальным обновлением.
+
+CatalogIndex хранит для каждого фильма строку матрицы жанров (сколько раз
+жанр указан у фильма), оценку, ID и название, а также словарь
+ID фильма -> номер строки. Обновление (refresh) читает из базы только:
+
+    - фильмы с updated_at не раньше отметки high_water - времени базы
+      предыдущего обновления минус REFRESH_OVERLAP (на транзакции,
+      зафиксированные позже своего updated_at);
+    - фильмы из ленты изменений каталога (app.catalog_feed), в том числе
+      удаленные: их строки скрываются.
+
+Базовый набор массивов (CatalogArrays) после построения не изменяется.
+Измененные фильмы попадают в небольшой overlay (CatalogOverlay): их новые
+строки и номера строк базы, которые они заменяют или удаляют. Обновление
+строит новый overlay из прежнего и изменений, поэтому его стоимость
+пропорциональна размеру overlay, а не каталога, и страницы памяти базы,
+общие для процессов после fork, не копируются. top_n оценивает строки базы
+без скрытых и строки overlay вместе. Когда overlay превышает COMPACT_RATIO
+базы, база перестраивается вместе с ним (как и при появлении нового жанра
+сверх резерва столбцов), и overlay становится пустым.
+
+Пара (база, overlay) публикуется одним присваиванием, поэтому запрос,
+начатый раньше, дочитывает прежний согласованный набор.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.metrics import stage
+from .models import Movie
+from .rerank import POOL_FACTOR, mmr_rerank
+
+logger = logging.getLogger(__name__)
+
+# Перекрытие окна обновления: фильмы, измененные незадолго до обновления, читаются повторно
+REFRESH_OVERLAP = timedelta(seconds=5)
+# Доля строк overlay (измененных и скрытых) от базы, после которой база перестраивается
+COMPACT_RATIO = 0.2
+# Резерв столбцов жанров при построении массивов
+GENRE_RESERVE = 8
+# Фильмов в одном запросе IN (...) при чтении изменений по ID
+CHANGED_MOVIES_CHUNK = 1000
+
+
+def parse_genres(genres_str: Optional[str]) -> List[str]:
+    """Разбирает строку жанров 'Action,Drama' в список."""
+    if not genres_str:
+        return []
+    return [genre.strip() for genre in genres_str.split(",") if genre.strip()]
+
+
+class CatalogArrays(NamedTuple):
+    """Базовый набор массивов каталога; после построения не изменяется."""
+    size: int
+    ids: np.ndarray
+    ratings: np.ndarray
+    active: np.ndarray
+    genre_matrix: np.ndarray
+    genre_columns: Dict[str, int]
+    id_to_index: Dict[int, int]
+    titles: List[str]
+
+
+class CatalogOverlay(NamedTuple):
+    """Фильмы, измененные после построения базового набора, и скрытые ими строки базы."""
+    ids: np.ndarray
+    ratings: np.ndarray
+    genre_matrix: np.ndarray
+    titles: List[str]
+    # ID фильма -> строка набора
+    id_to_row: Dict[int, int]
+    # Отсортированные номера строк базы, замененных или удаленных
+    hidden: np.ndarray
+    # Столбцы жанров базы и жанров, появившихся после ее построения
+    genre_columns: Dict[str, int]
+
+
+def _empty_overlay(arrays: CatalogArrays) -> CatalogOverlay:
+    return CatalogOverlay(
+        np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64),
+        np.zeros((0, arrays.genre_matrix.shape[1]), dtype=np.float32), [], {},
+        np.zeros(0, dtype=np.intp), arrays.genre_columns
+    )
+
+
+def _row_genres(row: np.ndarray, genre_columns: Dict[str, int]) -> str:
+    """Восстанавливает строку жанров по строке матрицы жанров."""
+    return ",".join(genre for genre, column in genre_columns.items() for _ in range(int(row[column])))
+
+
+def _score_rows(
+        matrix: np.ndarray,
+        ratings: np.ndarray,
+        columns: List[int],
+        weights: np.ndarray,
+        min_avg_rating: float,
+        hidden: Optional[np.ndarray] = None
+) -> tuple:
+    """Возвращает строки, подходящие по жанрам и оценке, и их скоры."""
+    mask = (ratings >= min_avg_rating) & matrix[:, columns].any(axis=1)
+    if hidden is not None and len(hidden):
+        mask[hidden] = False
+    rows = np.flatnonzero(mask)
+    return rows, (matrix[rows] @ weights) * (ratings[rows] / 10.0)
+
+
+class CatalogIndex:
+    """
+    Каталог фильмов для рекомендаций с обновлением по изменениям.
+
+    Attributes:
+        high_water: Фильмы с updated_at не раньше этой отметки читаются при обновлении.
+    """
+
+    def __init__(self):
+        self.high_water: Optional[datetime] = None
+        arrays = self._build([])
+        self._published = (arrays, _empty_overlay(arrays))
+        self._lock = threading.Lock()
+
+    @property
+    def arrays(self) -> CatalogArrays:
+        """Базовый набор массивов (без изменений из overlay)."""
+        return self._published[0]
+
+    @property
+    def overlay(self) -> CatalogOverlay:
+        """Изменения после построения базового набора."""
+        return self._published[1]
+
+    def __len__(self) -> int:
+        """Количество активных фильмов."""
+        arrays, overlay = self._published
+        return arrays.size - len(overlay.hidden) + len(overlay.ids)
+
+    @classmethod
+    def load(cls, session: Session) -> "CatalogIndex":
+        """Строит каталог из всех фильмов базы."""
+        index = cls()
+        index.high_water = index._next_high_water(session)
+        rows = session.query(Movie.id, Movie.title, Movie.genres_str, Movie.rating_imdb).all()
+        index._publish(index._build(rows))
+        logger.info("Catalog index loaded", extra={"movies": len(rows)})
+        return index
+
+    def _publish(self, arrays: CatalogArrays, overlay: Optional[CatalogOverlay] = None) -> None:
+        """Подменяет опубликованный набор одним присваиванием."""
+        self._published = (arrays, overlay if overlay is not None else _empty_overlay(arrays))
+
+    @staticmethod
+    def _build(rows) -> CatalogArrays:
+        """Строит массивы с резервом столбцов жанров из строк (id, title, genres, rating, ...)."""
+        rows = [row for row in rows if parse_genres(row[2])]
+        genre_columns: Dict[str, int] = {}
+        for row in rows:
+            for genre in parse_genres(row[2]):
+                genre_columns.setdefault(genre, len(genre_columns))
+
+        ids = np.zeros(len(rows), dtype=np.int64)
+        ratings = np.zeros(len(rows), dtype=np.float64)
+        active = np.ones(len(rows), dtype=bool)
+        genre_matrix = np.zeros((len(rows), len(genre_columns) + GENRE_RESERVE), dtype=np.float32)
+        titles: List[str] = [""] * len(rows)
+        id_to_index: Dict[int, int] = {}
+        for position, (movie_id, title, genres_str, rating) in enumerate(row[:4] for row in rows):
+            ids[position] = movie_id
+            ratings[position] = rating or 0.0
+            titles[position] = title
+            for genre in parse_genres(genres_str):
+                genre_matrix[position, genre_columns[genre]] += 1.0
+            id_to_index[movie_id] = position
+        return CatalogArrays(len(rows), ids, ratings, active, genre_matrix, genre_columns, id_to_index, titles)
+
+    @staticmethod
+    def _next_high_water(session: Session) -> Optional[datetime]:
+        """Отметка следующего обновления: время базы (в нем пишется updated_at) минус перекрытие."""
+        now = session.query(func.now()).scalar()
+        return now - REFRESH_OVERLAP if now is not None else None
+
+    def refresh(self, session: Session, changed_ids: Iterable[int] = ()) -> int:
+        """
+        Дочитывает изменения каталога из базы.
+
+        Args:
+            session: Сессия базы данных.
+            changed_ids: ID фильмов, измененных по ленте изменений (включая удаленные).
+
+        Returns:
+            Количество обработанных фильмов.
+        """
+        with self._lock:
+            high_water = self._next_high_water(session)
+            query = session.query(Movie.id, Movie.title, Movie.genres_str, Movie.rating_imdb)
+            rows = {}
+            if self.high_water is not None:
+                for row in query.filter(Movie.updated_at >= self.high_water):
+                    rows[row.id] = row
+            changed_ids = [movie_id for movie_id in set(changed_ids) if movie_id not in rows]
+            for start in range(0, len(changed_ids), CHANGED_MOVIES_CHUNK):
+                for row in query.filter(Movie.id.in_(changed_ids[start:start + CHANGED_MOVIES_CHUNK])):
+                    rows[row.id] = row
+            deleted_ids = [movie_id for movie_id in changed_ids if movie_id not in rows]
+
+            if rows or deleted_ids:
+                self._apply(list(rows.values()), deleted_ids)
+            self.high_water = high_water
+            return len(rows) + len(deleted_ids)
+
+    def _apply(self, rows, deleted_ids: List[int]) -> None:
+        """Заменяет overlay новым: прежние изменения без замененных фильмов и строки rows."""
+        arrays, overlay = self._published
+        new_genres = sorted({
+            genre for row in rows for genre in parse_genres(row.genres_str) if genre not in overlay.genre_columns
+        })
+        if len(overlay.genre_columns) + len(new_genres) > arrays.genre_matrix.shape[1]:
+            self._rebuild(extra_rows=rows, deleted_ids=deleted_ids)
+            return
+        genre_columns = overlay.genre_columns
+        if new_genres:
+            genre_columns = dict(genre_columns)
+            for genre in new_genres:
+                genre_columns[genre] = len(genre_columns)
+
+        replaced = {row.id for row in rows} | set(deleted_ids)
+        kept = [position for position, movie_id in enumerate(overlay.ids.tolist()) if movie_id not in replaced]
+        added = [row for row in rows if parse_genres(row.genres_str)]
+        genre_matrix = np.zeros((len(kept) + len(added), arrays.genre_matrix.shape[1]), dtype=np.float32)
+        genre_matrix[:len(kept)] = overlay.genre_matrix[kept]
+        for position, row in enumerate(added, start=len(kept)):
+            for genre in parse_genres(row.genres_str):
+                genre_matrix[position, genre_columns[genre]] += 1.0
+        ids = np.concatenate([overlay.ids[kept], np.array([row.id for row in added], dtype=np.int64)])
+        ratings = np.concatenate([
+            overlay.ratings[kept], np.array([row.rating_imdb or 0.0 for row in added], dtype=np.float64)
+        ])
+        titles = [overlay.titles[position] for position in kept] + [row.title for row in added]
+
+        hidden = overlay.hidden
+        positions = [arrays.id_to_index[movie_id] for movie_id in replaced if movie_id in arrays.id_to_index]
+        if positions:
+            hidden = np.union1d(hidden, np.array(positions, dtype=np.intp))
+        overlay = CatalogOverlay(
+            ids, ratings, genre_matrix, titles, {movie_id: row for row, movie_id in enumerate(ids.tolist())},
+            hidden, genre_columns
+        )
+        self._publish(arrays, overlay)
+
+        if len(overlay.hidden) + len(overlay.ids) > COMPACT_RATIO * max(arrays.size, 1):
+            self._rebuild()
+
+    def _rebuild(self, extra_rows=(), deleted_ids: Iterable[int] = ()) -> None:
+        """Строит новый базовый набор из базы, overlay и extra_rows; overlay становится пустым."""
+        arrays, overlay = self._published
+        replaced = {row.id for row in extra_rows} | set(deleted_ids)
+        hidden = set(overlay.hidden.tolist())
+        kept = [
+            (int(arrays.ids[position]), arrays.titles[position],
+             _row_genres(arrays.genre_matrix[position], overlay.genre_columns), float(arrays.ratings[position]))
+            for position in range(arrays.size)
+            if position not in hidden and int(arrays.ids[position]) not in replaced
+        ]
+        kept.extend(
+            (int(overlay.ids[row]), overlay.titles[row],
+             _row_genres(overlay.genre_matrix[row], overlay.genre_columns), float(overlay.ratings[row]))
+            for row in range(len(overlay.ids))
+            if int(overlay.ids[row]) not in replaced
+        )
+        kept.extend((row.id, row.title, row.genres_str, row.rating_imdb) for row in extra_rows)
+        self._publish(self._build(kept))
+        logger.info("Catalog index compacted", extra={"movies": self._published[0].size})
+
+    def top_n(
+            self,
+            genre_weights: Dict[str, float],
+            genres: List[str],
+            exclude_movie_ids: Iterable[int],
+            n: int = 10,
+            min_avg_rating: float = 0.0,
+            diversity: float = 0.0
+    ) -> List[int]:
+        """
+        Возвращает ID n фильмов с наибольшим скором по жанрам пользователя.
+
+        Скор фильма - сумма весов его жанров, умноженная на оценку / 10.
+        Учитываются фильмы базы (кроме скрытых overlay) и overlay хотя бы с
+        одним жанром из genres и оценкой не ниже min_avg_rating, кроме
+        exclude_movie_ids.
+
+        Исключения не проверяются по всему каталогу: отбирается n + len(exclude_movie_ids)
+        лучших кандидатов (исключенные не могут вытеснить больше) вместе со
+        всеми, чей скор равен скору последнего из них, и только их ID ищутся в
+        отсортированном массиве исключений (np.searchsorted). При равных скорах
+        выше фильм с меньшим ID, независимо от порядка строк в массивах.
+
+        При diversity > 0 отбирается пул из POOL_FACTOR * n лучших фильмов, и
+        итоговые n выбираются из него с учетом разнообразия жанров (rerank.mmr_rerank).
+        """
+        arrays, overlay = self._published
+        columns = [overlay.genre_columns[genre] for genre in genres if genre in overlay.genre_columns]
+        if not len(self) or not columns or n <= 0:
+            return []
+        if not isinstance(exclude_movie_ids, np.ndarray):
+            exclude_movie_ids = np.fromiter(exclude_movie_ids, dtype=np.int64)
+        excluded = np.unique(exclude_movie_ids)
+
+        with stage("score"):
+            weights = np.zeros(arrays.genre_matrix.shape[1], dtype=np.float64)
+            for genre, weight in genre_weights.items():
+                column = overlay.genre_columns.get(genre)
+                if column is not None:
+                    weights[column] = weight
+            base_rows, base_scores = _score_rows(
+                arrays.genre_matrix, arrays.ratings, columns, weights, min_avg_rating, overlay.hidden
+            )
+            overlay_rows, overlay_scores = _score_rows(
+                overlay.genre_matrix, overlay.ratings, columns, weights, min_avg_rating
+            )
+            # Кандидаты базы, затем overlay: номер кандидата >= len(base_rows) - строка overlay
+            rows = np.concatenate([base_rows, overlay_rows])
+            movie_ids = np.concatenate([arrays.ids[base_rows], overlay.ids[overlay_rows]])
+            scores = np.concatenate([base_scores, overlay_scores])
+            from_overlay = np.arange(len(rows)) >= len(base_rows)
+
+        pool_size = n * POOL_FACTOR if diversity > 0 else n
+        with stage("select"):
+            limit = pool_size + len(excluded)
+            if len(scores) > limit:
+                # Все кандидаты со скором граничного, а не произвольная часть равных:
+                # порядок (скор, ID) не должен зависеть от расположения строк
+                cutoff = -np.partition(-scores, limit - 1)[limit - 1]
+                best = np.flatnonzero(scores >= cutoff)
+                rows, movie_ids, scores, from_overlay = rows[best], movie_ids[best], scores[best], from_overlay[best]
+            if len(excluded):
+                positions = np.minimum(np.searchsorted(excluded, movie_ids), len(excluded) - 1)
+                keep = excluded[positions] != movie_ids
+                rows, movie_ids, scores, from_overlay = rows[keep], movie_ids[keep], scores[keep], from_overlay[keep]
+            order = np.lexsort((movie_ids, -scores))[:pool_size]
+
+        if diversity > 0:
+            with stage("rerank"):
+                pool_rows, pool_overlay = rows[order], from_overlay[order]
+                features = np.empty((len(order), arrays.genre_matrix.shape[1]), dtype=np.float32)
+                features[~pool_overlay] = arrays.genre_matrix[pool_rows[~pool_overlay]]
+                features[pool_overlay] = overlay.genre_matrix[pool_rows[pool_overlay]]
+                order = order[mmr_rerank(scores[order], features, n, diversity)]
+        return [int(movie_id) for movie_id in movie_ids[order]]
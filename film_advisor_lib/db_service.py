@@ -1,6 +1,7 @@
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.catalog_feed import record_movie_changes
 from app.models_db import InteractionStatusEnum
 from .models import User, Movie, UserMovie
 
@@ -23,6 +24,8 @@ def add_movie(session: Session, movie_id: int, title: str, genres: str) -> Movie
         movie = Movie(id=movie_id, title=title, genres_str=genres)
         session.add(movie)
     try:
+        session.flush()
+        record_movie_changes(session, [movie_id])
         session.commit()
     except IntegrityError:
         session.rollback()
@@ -1,11 +1,11 @@
 import json
 import os
 import sys
+from typing import Callable, Optional
 
 import pandas as pd
-from sqlalchemy import create_engine
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 # Add project root to sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -13,105 +13,200 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from app.models_db import Movie, User
-from app.database import DATABASE_URL, Base
-import kagglehub
+from app.cache import invalidate_movie_caches
+from app.catalog_feed import record_movie_changes
+from app.database import DATABASE_URL, create_db_engine
+from app.popularity import recompute_popularity
+from app.migrations import upgrade as upgrade_schema
 
 
-def load_movies():
+def read_movies_dataset() -> pd.DataFrame:
+    """Скачивает датасет и приводит фильмы к столбцам таблицы movies."""
+    import kagglehub
+
     dataset_path = kagglehub.dataset_download("rounakbanik/the-movies-dataset")
     movies_file = os.path.join(dataset_path, "movies_metadata.csv")
 
+    print(f"Reading {movies_file}...")
+    movies_df = pd.read_csv(movies_file, low_memory=False)
+    print(f"Movies loaded: {len(movies_df)}")
+
+    def parse_genres(genres_str):
+        if pd.isna(genres_str) or genres_str == '':
+            return ""
+        try:
+            genres_list = json.loads(genres_str.replace("'", "\""))
+            genres = ",".join([g['name'] for g in genres_list if 'name' in g])
+            return genres
+        except Exception as e:
+            print(f"Error parsing genres {genres_str}: {e}")
+            return ""
+
+    movies_df['genres_str'] = movies_df['genres'].apply(parse_genres)
+    movies_df['year'] = pd.to_datetime(movies_df['release_date'], errors='coerce').dt.year
+
+    movies_to_load = movies_df[['id', 'title', 'year', 'genres_str', 'overview', 'vote_average', 'vote_count']]
+    movies_to_load = movies_to_load.rename(columns={
+        'id': 'id',
+        'title': 'title',
+        'year': 'year',
+        'genres_str': 'genres_str',
+        'overview': 'description',
+        'vote_average': 'rating_imdb',
+        'vote_count': 'vote_count'
+    })
+    return clean_movies(movies_to_load)
+
+
+def clean_movies(movies_to_load: pd.DataFrame) -> pd.DataFrame:
+    """Приводит типы столбцов, удаляет строки без ID или названия и дубликаты ID."""
+    movies_to_load = movies_to_load.copy()
+    movies_to_load['id'] = pd.to_numeric(movies_to_load['id'], errors='coerce').astype('Int64')
+    movies_to_load['year'] = movies_to_load['year'].fillna(0).astype('Int64')
+    movies_to_load['rating_imdb'] = pd.to_numeric(movies_to_load['rating_imdb'], errors='coerce').fillna(0.0)
+    movies_to_load['vote_count'] = pd.to_numeric(movies_to_load['vote_count'], errors='coerce').fillna(0).astype('Int64')
+    movies_to_load['description'] = movies_to_load['description'].fillna('')
+    movies_to_load = movies_to_load.dropna(subset=['id', 'title'])
+
+    print(f"Cleaned movies to load: {len(movies_to_load)}")
+
+    duplicate_ids = movies_to_load['id'].duplicated().sum()
+    if duplicate_ids > 0:
+        print(f"Warning: Found {duplicate_ids} duplicate ids. Removing duplicates...")
+        movies_to_load = movies_to_load.drop_duplicates(subset=['id'], keep='first')
+    return movies_to_load
+
+
+# Сколько фильмов добавляется одной транзакцией; после каждой загрузка сообщает о прогрессе
+PROGRESS_EVERY = 1000
+
+
+def insert_movies_batch(session: Session, movies: list) -> list:
+    """
+    Добавляет фильмы и записывает их в ленту изменений одной транзакцией.
+
+    Если пакет нарушает ограничение базы, он откатывается и добавляется по
+    одному фильму (тоже вместе с записью в ленте); фильмы с ошибкой
+    пропускаются.
+
+    Returns:
+        ID добавленных фильмов.
+    """
+    try:
+        for movie in movies:
+            session.merge(Movie(**movie))
+        session.flush()
+        inserted_ids = [movie['id'] for movie in movies]
+        record_movie_changes(session, inserted_ids)
+        session.commit()
+        return inserted_ids
+    except IntegrityError:
+        session.rollback()
+
+    inserted_ids = []
+    for movie in movies:
+        try:
+            session.merge(Movie(**movie))
+            session.flush()
+            record_movie_changes(session, [movie['id']])
+            session.commit()
+            inserted_ids.append(movie['id'])
+        except IntegrityError as e:
+            session.rollback()
+            print(f"Skipping movie ID {movie['id']} due to error: {e}")
+    return inserted_ids
+
+
+def ingest_movies(
+        session: Session,
+        movies_to_load: pd.DataFrame,
+        progress: Optional[Callable[[float, str], None]] = None
+) -> None:
+    """
+    Записывает подготовленные фильмы в базу данных.
+
+    Новые фильмы добавляются, у существующих обновляется количество голосов,
+    затем пересчитывается рейтинг популярности.
+
+    Args:
+        session: Сессия базы данных (схема уже должна быть создана).
+        movies_to_load: Фильмы со столбцами id, title, year, genres_str,
+            description, rating_imdb и vote_count (см. clean_movies).
+        progress: Функция (доля, сообщение), вызываемая после каждых
+            PROGRESS_EVERY фильмов (фоновая задача app.jobs). Исключение из
+            нее прерывает загрузку; уже добавленные фильмы остаются в базе
+            вместе с записями в ленте изменений и пропускаются при следующем
+            запуске.
+    """
+    # Create default user with ID 1 if not exists
+    default_user = session.query(User).filter(User.id == 1).first()
+    if not default_user:
+        default_user = User(username="default_user")
+        session.add(default_user)
+        session.commit()
+        print("Created default user with ID 1 and username 'default_user'")
+    else:
+        print("Default user with ID 1 already exists")
+
+    # Update existing movies instead of dropping table
+    existing_ids = {row[0] for row in session.query(Movie.id).all()}
+    new_movies = movies_to_load[~movies_to_load['id'].isin(existing_ids)]
+    print(f"Movies to load: {len(new_movies)}")
+
+    movies_to_insert = new_movies.to_dict(orient='records')
+
+    if movies_to_insert:
+        try:
+            # Фильмы и их записи в ленте изменений фиксируются вместе, пакетами:
+            # версия каталога на пакет, а не на каждый фильм
+            for start in range(0, len(movies_to_insert), PROGRESS_EVERY):
+                insert_movies_batch(session, movies_to_insert[start:start + PROGRESS_EVERY])
+                position = min(start + PROGRESS_EVERY, len(movies_to_insert))
+                if progress is not None:
+                    progress(position / len(movies_to_insert), f"Movies loaded: {position}")
+            print("Movies successfully loaded.")
+            invalidate_movie_caches()
+        except Exception as e:
+            session.rollback()
+            with open('error.log', 'w', encoding='utf-8') as f:
+                f.write(f"Error during insertion: {str(e)}\n")
+                import traceback
+                f.write(f"Traceback: {traceback.format_exc()}\n")
+            print("Error during insertion. Check 'error.log'")
+    else:
+        print("No new movies to load.")
+
+    # Обновляем количество голосов у уже загруженных фильмов
+    existing_votes = movies_to_load[movies_to_load['id'].isin(existing_ids)][['id', 'vote_count']]
+    if not existing_votes.empty:
+        session.bulk_update_mappings(Movie, [
+            {'id': int(row.id), 'vote_count': int(row.vote_count)}
+            for row in existing_votes.itertuples(index=False)
+        ])
+        record_movie_changes(session, existing_votes['id'])
+        session.commit()
+        print(f"Vote counts updated: {len(existing_votes)}")
+
+    ranked = recompute_popularity(session)
+    print(f"Popularity ranking recomputed: {ranked} movies")
+
+    total_movies = session.query(Movie).count()
+    print(f"Total movies in database: {total_movies}")
+
+
+def load_movies():
     try:
-        print(f"Reading {movies_file}...")
-        movies_df = pd.read_csv(movies_file, low_memory=False)
-        print(f"Movies loaded: {len(movies_df)}")
-
-        def parse_genres(genres_str):
-            if pd.isna(genres_str) or genres_str == '':
-                return ""
-            try:
-                genres_list = json.loads(genres_str.replace("'", "\""))
-                genres = ",".join([g['name'] for g in genres_list if 'name' in g])
-                return genres
-            except Exception as e:
-                print(f"Error parsing genres {genres_str}: {e}")
-                return ""
-
-        movies_df['genres_str'] = movies_df['genres'].apply(parse_genres)
-        movies_df['year'] = pd.to_datetime(movies_df['release_date'], errors='coerce').dt.year
-
-        movies_to_load = movies_df[['id', 'title', 'year', 'genres_str', 'overview', 'vote_average']]
-        movies_to_load = movies_to_load.rename(columns={
-            'id': 'id',
-            'title': 'title',
-            'year': 'year',
-            'genres_str': 'genres_str',
-            'overview': 'description',
-            'vote_average': 'rating_imdb'
-        })
-
-        # Clean data
-        movies_to_load['id'] = pd.to_numeric(movies_to_load['id'], errors='coerce').astype('Int64')
-        movies_to_load['year'] = movies_to_load['year'].fillna(0).astype('Int64')
-        movies_to_load['rating_imdb'] = pd.to_numeric(movies_to_load['rating_imdb'], errors='coerce').fillna(0.0)
-        movies_to_load['description'] = movies_to_load['description'].fillna('')
-        movies_to_load = movies_to_load.dropna(subset=['id', 'title'])
-
-        print(f"Cleaned movies to load: {len(movies_to_load)}")
-
-        duplicate_ids = movies_to_load['id'].duplicated().sum()
-        if duplicate_ids > 0:
-            print(f"Warning: Found {duplicate_ids} duplicate ids. Removing duplicates...")
-            movies_to_load = movies_to_load.drop_duplicates(subset=['id'], keep='first')
+        movies_to_load = read_movies_dataset()
 
         # Initialize database
-        engine = create_engine(DATABASE_URL)
-        Base.metadata.create_all(engine)
+        engine = create_db_engine(DATABASE_URL, echo=False)
+        upgrade_schema(engine)
         Session = sessionmaker(bind=engine)
         session = Session()
 
-        # Create default user with ID 1 if not exists
-        default_user = session.query(User).filter(User.id == 1).first()
-        if not default_user:
-            default_user = User(username="default_user")
-            session.add(default_user)
-            session.commit()
-            print("Created default user with ID 1 and username 'default_user'")
-        else:
-            print("Default user with ID 1 already exists")
-
-        # Update existing movies instead of dropping table
-        existing_ids = {row[0] for row in session.query(Movie.id).all()}
-        new_movies = movies_to_load[~movies_to_load['id'].isin(existing_ids)]
-        print(f"Movies to load: {len(new_movies)}")
-
-        movies_to_insert = new_movies.to_dict(orient='records')
-
-        if movies_to_insert:
-            try:
-                for movie in movies_to_insert:
-                    try:
-                        session.merge(Movie(**movie))
-                        session.commit()
-                    except IntegrityError as e:
-                        session.rollback()
-                        print(f"Skipping movie ID {movie['id']} due to error: {e}")
-                print("Movies successfully loaded.")
-            except Exception as e:
-                session.rollback()
-                with open('error.log', 'w', encoding='utf-8') as f:
-                    f.write(f"Error during insertion: {str(e)}\n")
-                    import traceback
-                    f.write(f"Traceback: {traceback.format_exc()}\n")
-                print("Error during insertion. Check 'error.log'")
-        else:
-            print("No new movies to load.")
-
-        total_movies = session.query(Movie).count()
-        print(f"Total movies in database: {total_movies}")
-
-    except FileNotFoundError:
-        print(f"Error: File {movies_file} not found.")
+        ingest_movies(session, movies_to_load)
+    except FileNotFoundError as e:
+        print(f"Error: File {e.filename} not found.")
     except Exception as e:
         with open('error.log', 'w', encoding='utf-8') as f:
             f.write(f"Error: {str(e)}\n")
@@ -4,13 +4,11 @@ from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
 from app.models_db import InteractionStatusEnum
-from .database import SessionLocal, engine, Base
+from .database import SessionLocal, engine, get_read_session
 from .db_service import add_user, add_movie, add_user_movie_relation, get_user_movies_grouped_by_status
 from .models import Movie, UserMovie
 from .recommendation_service import get_recommended_movies, get_user_genre_profile
 
-Base.metadata.create_all(bind=engine)
-
 
 def print_user_movies(session: Session, user_id: int, username: str):
     print(f"\nФильмы пользователя {username}:")
@@ -25,7 +23,9 @@ def print_user_movies(session: Session, user_id: int, username: str):
 
 
 def get_movie_recommendations_by_user_id(user_id: int, count: int) -> list[int]:
-    session = SessionLocal()
+    # Профиль и каталог читаются с реплики, если пользователь недавно не менял библиотеку;
+    # при ошибке соединения с репликой запросы сессии повторяются в основной базе
+    session = get_read_session(user_id)
     try:
         recommendations = get_recommended_movies(session, user_id, n=count)
         return recommendations
@@ -40,7 +40,7 @@ def main():
         tables = inspector.get_table_names()
         print("Таблицы в базе данных:", tables)
         if 'movies' not in tables or 'users' not in tables or 'user_movie' not in tables:
-            raise Exception("Не все таблицы созданы. Проверьте models.py и Base.metadata.create_all")
+            raise Exception("Не все таблицы созданы. Выполните миграции: python -m app.migrations upgrade")
 
         print("\nЗагружаем фильмы...")
         from load_all_movies import load_movies
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Enum as SQLAlchemyEnum, ForeignKey
+from sqlalchemy import (
+    Column, DateTime, Integer, String, Float, Text, Enum as SQLAlchemyEnum, ForeignKey, Index, UniqueConstraint, func
+)
 from sqlalchemy.orm import relationship
 
 from app.models_db import InteractionStatusEnum
@@ -20,6 +22,7 @@ class Movie(Base):
     genres_str = Column("genres", String, nullable=True)
     description = Column(Text, nullable=True)
     rating_imdb = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     interactions = relationship("UserMovie", back_populates="movie")
 
     @property
@@ -35,6 +38,10 @@ class Movie(Base):
 
 class UserMovie(Base):
     __tablename__ = "user_movie"
+    __table_args__ = (
+        UniqueConstraint("user_id", "movie_id", name="uq_user_movie_user_movie"),
+        Index("ix_user_movie_user_status", "user_id", "status"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     movie_id = Column(Integer, ForeignKey("movies.id"))
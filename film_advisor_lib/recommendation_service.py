@@ -1,40 +1,79 @@
+import logging
+import os
+import threading
 import time
-from typing import List, Dict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
 
+from app.catalog_feed import CatalogChange, feed as catalog_feed
+from app.crud import get_catalog_version
+from app.metrics import stage
 from app.models_db import InteractionStatusEnum
+from .catalog import CatalogIndex
 from .models import UserMovie, Movie
 
+logger = logging.getLogger(__name__)
 
-def get_movies_data(session: Session, min_avg_rating: float = 3.0, min_ratings: int = 1) -> pd.DataFrame:
+
+class CatalogSnapshot(NamedTuple):
+    """Каталог фильмов для рекомендаций, обновленный до определенной версии каталога."""
+    version: str
+    index: CatalogIndex
+
+
+class UserProfile(NamedTuple):
+    """Профиль пользователя для рекомендаций, собранный одним запросом."""
+    # Жанр -> доля в весе взаимодействий пользователя
+    genres: Dict[str, float]
+    # Отсортированные ID фильмов, с которыми пользователь взаимодействовал (исключаются из рекомендаций)
+    movie_ids: np.ndarray
+
+
+# Каталог общий для всех запросов процесса: загруженный до fork (gunicorn preload_app)
+# он разделяется рабочими процессами; обновление не изменяет базовые массивы, а пишет
+# изменения в небольшой overlay (catalog.CatalogOverlay), поэтому их страницы остаются общими
+_catalog_snapshot: Optional[CatalogSnapshot] = None
+# ID фильмов, измененных после обновления каталога; None - каталог нужно перезагрузить целиком
+_pending_movie_ids: Optional[Set[int]] = set()
+# Повторно входимая: опрос версии под блокировкой вызывает _on_catalog_change
+_catalog_lock = threading.RLock()
+# Не реже чем раз в столько секунд каталог дочитывает фильмы по updated_at,
+# даже если версия не менялась (изменения в обход ленты изменений)
+CATALOG_REFRESH_SECONDS = float(os.getenv("RECOFILM_CATALOG_REFRESH_SECONDS", "60"))
+_next_refresh = 0.0
+# Сила разнообразия жанров в рекомендациях: 0 - только скор, 1 - только разнообразие (rerank.py)
+RECOMMENDATION_DIVERSITY = float(os.getenv("RECOFILM_RECOMMENDATION_DIVERSITY", "0.3"))
+
+
+def get_movies_data(
+        session: Session,
+        min_avg_rating: float = 3.0,
+        min_ratings: int = 1
+) -> pd.DataFrame:
     """Получает данные о фильмах из базы с фильтрацией по рейтингу."""
     start_time = time.time()
     try:
         # Запрашиваем фильмы с количеством взаимодействий
-        movies = session.query(
+        query = session.query(
             Movie.id.label('movieId'),
             Movie.title,
             Movie.genres_str.label('genres'),
             Movie.rating_imdb.label('mean_rating')
-        ).all()
+        )
+        movies = query.all()
 
         if not movies:
-            print("No movies found in database.")
+            logger.info("No movies found in database")
             return pd.DataFrame()
 
-        # Преобразуем в DataFrame
-        movies_df = pd.DataFrame([
-            {
-                'movieId': movie.movieId,
-                'title': movie.title,
-                'genres': movie.genres or '',
-                'mean_rating': movie.mean_rating or 0.0,
-                'rating_count': 1
-            }
-            for movie in movies
-        ])
+        # Преобразуем в DataFrame прямо из кортежей строк, без промежуточного словаря на фильм
+        movies_df = pd.DataFrame.from_records(
+            movies, columns=['movieId', 'title', 'genres', 'mean_rating'], coerce_float=True
+        ).fillna({'genres': '', 'mean_rating': 0.0})
+        movies_df['rating_count'] = 1
 
         # Фильтруем по минимальному рейтингу
         movies_df = movies_df[
@@ -43,25 +82,95 @@ def get_movies_data(session: Session, min_avg_rating: float = 3.0, min_ratings:
             (movies_df['genres'].notna())
             ]
 
-        print(f"Loaded {len(movies_df)} movies from database in {time.time() - start_time:.2f} sec")
+        logger.debug(
+            "Loaded movies from database",
+            extra={"movies": len(movies_df), "elapsed_sec": round(time.time() - start_time, 4)}
+        )
         return movies_df
-    except Exception as e:
-        print(f"Error loading movies from database: {e}")
+    except Exception:
+        logger.exception("Error loading movies from database")
         raise
 
 
+def get_catalog(session: Session) -> CatalogIndex:
+    """
+    Возвращает каталог фильмов в памяти процесса (см. film_advisor_lib.catalog).
+
+    При изменении версии каталога в него дочитываются только фильмы из
+    ленты изменений (app.catalog_feed) и фильмы, измененные по updated_at;
+    целиком он перечитывается, только если изменений слишком много.
+    """
+    version = get_catalog_version(session)
+    snapshot = _catalog_snapshot
+    if snapshot is not None and snapshot.version == version and time.monotonic() < _next_refresh:
+        return snapshot.index
+    return load_catalog_snapshot(session).index
+
+
+def load_catalog_snapshot(session: Session) -> CatalogSnapshot:
+    """Обновляет каталог процесса до текущей версии и возвращает его."""
+    global _catalog_snapshot, _pending_movie_ids, _next_refresh
+    with _catalog_lock:
+        version = get_catalog_version(session)
+        snapshot = _catalog_snapshot
+        # Другой поток мог обновить каталог, пока этот ждал блокировку
+        if snapshot is not None and snapshot.version == version and time.monotonic() < _next_refresh:
+            return snapshot
+
+        changed_ids, _pending_movie_ids = _pending_movie_ids, set()
+        if snapshot is not None and changed_ids is not None:
+            index = snapshot.index
+            changed = index.refresh(session, changed_ids)
+            logger.info("Catalog index refreshed", extra={"version": version, "changed": changed})
+        else:
+            index = CatalogIndex.load(session)
+        snapshot = CatalogSnapshot(version, index)
+        _catalog_snapshot = snapshot
+        _next_refresh = time.monotonic() + CATALOG_REFRESH_SECONDS
+        return snapshot
+
+
+def _on_catalog_change(change: CatalogChange) -> None:
+    """Запоминает измененные фильмы; они дочитываются в каталог при следующем обращении."""
+    global _pending_movie_ids
+    with _catalog_lock:
+        if change.movie_ids is None or _pending_movie_ids is None:
+            _pending_movie_ids = None
+        else:
+            _pending_movie_ids |= change.movie_ids
+
+
+catalog_feed.subscribe(_on_catalog_change)
+
+
+def get_user_profile(session: Session, user_id: int) -> UserProfile:
+    """Читает взаимодействия пользователя один раз: профиль жанров и фильмы для исключения."""
+    user_ratings = (
+        session.query(UserMovie.movie_id, UserMovie.status, Movie.genres_str)
+        .join(Movie, UserMovie.movie_id == Movie.id)
+        .filter(UserMovie.user_id == user_id)
+        .all()
+    )
+    movie_ids = np.unique(
+        np.fromiter((row.movie_id for row in user_ratings), dtype=np.int64, count=len(user_ratings))
+    )
+    return UserProfile(build_genre_profile((row.status, row.genres_str) for row in user_ratings), movie_ids)
+
+
 def get_user_genre_profile(session: Session, user_id: int) -> dict:
     """Создаёт профиль жанров пользователя на основе его взаимодействий."""
+    # Только профиль: без ID фильмов, которые нужны для исключения в get_user_profile
     user_ratings = (
         session.query(UserMovie.status, Movie.genres_str)
         .join(Movie, UserMovie.movie_id == Movie.id)
         .filter(UserMovie.user_id == user_id)
         .all()
     )
+    return build_genre_profile(user_ratings)
 
-    if not user_ratings:
-        return {}
 
+def build_genre_profile(user_ratings: Iterable[Tuple[InteractionStatusEnum, Optional[str]]]) -> dict:
+    """Считает доли жанров по парам (статус, жанры) взаимодействий."""
     genre_counts = {}
     total_weight = 0.0
 
@@ -95,20 +204,20 @@ def get_top_n_by_genres(
         n: int = 10
 ) -> pd.DataFrame:
     """Возвращает топ-N фильмов по жанрам с учётом весов."""
-    start_time = time.time()
-    filtered_df = df[
-        ~df['movieId'].isin(exclude_movie_ids) &
-        df['genres'].apply(
-            lambda x: any(genre in x.split(',') for genre in genres) if pd.notna(x) else False
-        )
-        ].copy()
+    with stage("score"):
+        filtered_df = df[
+            ~df['movieId'].isin(exclude_movie_ids) &
+            df['genres'].apply(
+                lambda x: any(genre in x.split(',') for genre in genres) if pd.notna(x) else False
+            )
+            ].copy()
 
-    filtered_df['genre_score'] = filtered_df['genres'].apply(
-        lambda x: sum(genre_weights.get(genre.strip(), 0.0) for genre in x.split(','))
-    )
-    filtered_df['final_score'] = filtered_df['genre_score'] * (filtered_df['mean_rating'] / 10.0)
-    top_n = filtered_df.sort_values(by='final_score', ascending=False).head(n)
-    print(f"get_top_n_by_genres: {time.time() - start_time:.2f} sec")
+        filtered_df['genre_score'] = filtered_df['genres'].apply(
+            lambda x: sum(genre_weights.get(genre.strip(), 0.0) for genre in x.split(','))
+        )
+        filtered_df['final_score'] = filtered_df['genre_score'] * (filtered_df['mean_rating'] / 10.0)
+    with stage("select"):
+        top_n = filtered_df.sort_values(by='final_score', ascending=False).head(n)
     return top_n[['movieId', 'title', 'mean_rating', 'genres', 'final_score']]
 
 
@@ -117,31 +226,32 @@ def get_recommended_movies(
         user_id: int,
         n: int,
         min_avg_rating: float = 3.0,
-        min_ratings: int = 1
+        min_ratings: int = 1,
+        diversity: Optional[float] = None
 ) -> List[int]:
-    """Формирует список рекомендованных фильмов для пользователя."""
-    genre_profile = get_user_genre_profile(session, user_id)
+    """Формирует список рекомендованных фильмов для пользователя (diversity по умолчанию из настроек)."""
+    with stage("profile"):
+        genre_profile, user_movie_ids = get_user_profile(session, user_id)
     if not genre_profile:
-        print("No genre preferences found for user.")
+        logger.info("No genre preferences found for user", extra={"user_id": user_id})
         return []
 
     relevant_genres = [genre for genre, weight in genre_profile.items() if weight > 0]
     if not relevant_genres:
-        print("No relevant genres for recommendations.")
+        logger.info("No relevant genres for recommendations", extra={"user_id": user_id})
         return []
 
-    user_movie_ids = {row.movie_id for row in
-                      session.query(UserMovie.movie_id).filter(UserMovie.user_id == user_id).all()}
-
     try:
-        movies_df = get_movies_data(session, min_avg_rating=min_avg_rating, min_ratings=min_ratings)
-        if movies_df.empty:
-            print("No movies available for recommendations.")
+        with stage("catalog"):
+            catalog = get_catalog(session)
+        if not catalog.arrays.size:
+            logger.info("No movies available for recommendations")
             return []
 
-        top_n = get_top_n_by_genres(movies_df, relevant_genres, genre_profile, user_movie_ids, n=n)
-        result = [int(row['movieId'])  for _, row in top_n.iterrows()]
-        return result
-    except Exception as e:
-        print(f"Error generating recommendations: {e}")
+        return catalog.top_n(
+            genre_profile, relevant_genres, user_movie_ids, n=n, min_avg_rating=min_avg_rating,
+            diversity=RECOMMENDATION_DIVERSITY if diversity is None else diversity
+        )
+    except Exception:
+        logger.exception("Error generating recommendations", extra={"user_id": user_id})
         raise
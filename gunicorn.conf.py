@@ -0,0 +1,56 @@
+# gunicorn.conf.py
+
+"""
+Конфигурация gunicorn для production-запуска в несколько процессов.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Приложение, рекомендательная система и снимок каталога загружаются в
+главном процессе до запуска рабочих (preload_app и on_starting), поэтому
+их память разделяется рабочими процессами (copy-on-write), а не
+загружается каждым заново. Рабочий процесс перезапускается после
+max_requests запросов (с разбросом, чтобы процессы не перезапускались
+одновременно) и завершает начатые запросы в течение graceful_timeout.
+Память на процесс измеряется скриптом benchmarks/worker_memory.py.
+
+Переменные окружения:
+    RECOFILM_BIND              - адрес (по умолчанию 0.0.0.0:8000);
+    RECOFILM_WORKERS           - количество рабочих процессов (по умолчанию
+                                 WEB_CONCURRENCY или число ядер);
+    RECOFILM_MAX_REQUESTS      - запросов до перезапуска рабочего (0 - не перезапускать);
+    RECOFILM_GRACEFUL_TIMEOUT  - время на завершение запросов при остановке (сек).
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("RECOFILM_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("RECOFILM_WORKERS") or os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+preload_app = True
+
+max_requests = int(os.getenv("RECOFILM_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+graceful_timeout = int(os.getenv("RECOFILM_GRACEFUL_TIMEOUT", "30"))
+timeout = 60
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """Загружает общее состояние в главном процессе до запуска рабочих."""
+    from app.main import preload_shared_state
+
+    preload_shared_state()
+
+
+def post_fork(server, worker):
+    """Сбрасывает пулы соединений, унаследованные от главного процесса."""
+    from app.database import engine, replicas
+
+    engine.dispose(close=False)
+    for replica in replicas.engines:
+        replica.dispose(close=False)
@@ -5,4 +5,10 @@ if %ERRORLEVEL% neq 0 (
     exit /b 1
 )
 
+python -m app.migrations upgrade
+if %ERRORLEVEL% neq 0 (
+    echo Error: Failed to apply database migrations.
+    exit /b 1
+)
+
 uvicorn app.main:app --reload
\ No newline at end of file
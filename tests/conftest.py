@@ -0,0 +1,99 @@
+"""
+Общие фикстуры тестов.
+
+Тесты выполняются на базе SQLite в памяти (RECOFILM_TEST_DATABASE_URL
+переопределяет ее), поэтому не требуют внешних сервисов. Схема создается
+миграциями, данные - небольшим детерминированным набором фильмов и
+пользователей. Плагин app.pytest_query_audit дает фикстуру и маркер
+max_queries для ограничения количества SQL-запросов.
+"""
+
+import os
+
+# Переменные окружения должны быть заданы до импорта app.database
+os.environ["DATABASE_URL"] = os.getenv("RECOFILM_TEST_DATABASE_URL", "sqlite://")
+os.environ.setdefault("RECOFILM_SQL_ECHO", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest_plugins = ["app.pytest_query_audit"]
+
+GENRES = ("Drama", "Comedy", "Action", "Thriller", "Romance", "Sci-Fi", "Horror", "Family")
+MOVIES = 200
+# Пользователь с историей и пользователь без взаимодействий (холодный старт)
+ACTIVE_USER_ID = 1
+NEW_USER_ID = 2
+ACTIVE_USER_INTERACTIONS = 30
+
+
+def seed_database(db) -> None:
+    """Заполняет базу фильмами, пользователями и взаимодействиями."""
+    from app import models_db, popularity
+    from app.models_db import InteractionStatusEnum
+
+    statuses = list(InteractionStatusEnum)
+    db.add_all(
+        models_db.Movie(
+            id=movie_id,
+            title=f"Movie {movie_id}",
+            year=1970 + movie_id % 50,
+            genres_str=",".join(GENRES[(movie_id + shift) % len(GENRES)] for shift in range(1 + movie_id % 3)),
+            description=f"Description {movie_id}",
+            rating_imdb=3.0 + (movie_id * 7 % 70) / 10,
+            vote_count=10 + movie_id * 13 % 500,
+        )
+        for movie_id in range(1, MOVIES + 1)
+    )
+    db.add_all([
+        models_db.User(id=ACTIVE_USER_ID, username="active_user"),
+        models_db.User(id=NEW_USER_ID, username="new_user"),
+    ])
+    db.add_all(
+        models_db.UserMovie(
+            user_id=ACTIVE_USER_ID, movie_id=movie_id, status=statuses[movie_id % len(statuses)], rate=None
+        )
+        for movie_id in range(1, ACTIVE_USER_INTERACTIONS + 1)
+    )
+    db.commit()
+    popularity.recompute_popularity(db)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Создает схему и тестовые данные; возвращает фабрику сессий."""
+    from app.database import SessionLocal, engine
+    from app.migrations import upgrade
+
+    upgrade(engine)
+    db = SessionLocal()
+    try:
+        seed_database(db)
+    finally:
+        db.close()
+    return SessionLocal
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    """Клиент приложения без хуков запуска и без исполнителя фоновых задач."""
+    from app.main import create_app
+
+    with TestClient(create_app(startup_hooks=[], job_workers=0)) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Сбрасывает кэши процесса, чтобы количество запросов не зависело от порядка тестов."""
+    from app import catalog_feed, cold_start, popularity
+    from app.cache import invalidate_movie_caches
+    from app.page_cache import clear_page_cache
+
+    # Версия каталога проверяется в первом же запросе теста, а не раз в CATALOG_POLL_SECONDS
+    catalog_feed.feed.mark_stale()
+    invalidate_movie_caches()
+    clear_page_cache()
+    popularity.invalidate_ranking()
+    cold_start.invalidate_cold_start()
+    yield
@@ -0,0 +1,102 @@
+"""Каталог рекомендаций: обновление через overlay без изменения базы и отбор top-N при равных скорах."""
+
+import random
+from collections import namedtuple
+
+from film_advisor_lib.catalog import CatalogIndex
+from film_advisor_lib.models import Movie
+
+GENRE_MIXES = ("Drama", "Drama,Comedy", "Comedy,Action")
+RATINGS = (6.0, 7.5, 9.0)
+# Строка изменения, как ее читает CatalogIndex.refresh
+ChangedRow = namedtuple("ChangedRow", "id title genres_str rating_imdb")
+
+
+def tied_rows(count: int = 2000) -> list:
+    """Строки (id, title, genres, rating): много фильмов с одинаковыми жанрами и оценкой."""
+    return [
+        (movie_id, f"Movie {movie_id}", GENRE_MIXES[movie_id % 3], RATINGS[movie_id // 3 % 3])
+        for movie_id in range(1, count + 1)
+    ]
+
+
+def make_index(rows) -> CatalogIndex:
+    index = CatalogIndex()
+    index._publish(CatalogIndex._build(rows))
+    return index
+
+
+def expected_top_n(rows, weights: dict, excluded: set, n: int) -> list:
+    """Эталон: полный перебор, порядок (скор по убыванию, ID по возрастанию)."""
+    scored = []
+    for movie_id, _, genres, rating in rows:
+        genre_list = genres.split(",")
+        if movie_id in excluded or not any(genre in weights for genre in genre_list):
+            continue
+        scored.append((-sum(weights.get(genre, 0.0) for genre in genre_list) * rating / 10.0, movie_id))
+    return [movie_id for _, movie_id in sorted(scored)[:n]]
+
+
+def test_refresh_publishes_new_arrays(database):
+    session = database()
+    try:
+        index = CatalogIndex.load(session)
+        published = index.arrays
+        position = published.id_to_index[7]
+        rating = float(published.ratings[position])
+
+        movie = session.get(Movie, 7)
+        movie.rating_imdb = rating + 1.0
+        movie.genres_str = "Documentary"
+        session.flush()
+        # Только фильм из ленты изменений: фильмы фикстуры созданы внутри окна перекрытия
+        index.high_water = None
+        index.refresh(session, [7])
+
+        # База не копируется и не изменяется: изменение хранится в overlay
+        assert index.arrays is published
+        assert float(published.ratings[position]) == rating
+        assert "Documentary" not in published.genre_columns
+        overlay = index.overlay
+        assert position in overlay.hidden
+        assert float(overlay.ratings[overlay.id_to_row[7]]) == rating + 1.0
+        assert index.top_n({"Documentary": 1.0}, ["Documentary"], []) == [7]
+    finally:
+        session.rollback()
+        session.close()
+
+
+def test_top_n_breaks_ties_by_id_regardless_of_row_order():
+    rows = tied_rows()
+    weights = {"Drama": 0.6, "Comedy": 0.4}
+    excluded = {1, 4, 7}
+    # Группа равных скоров (Drama,Comedy с оценкой 9.0) шире n и пересекает границу отбора
+    expected = expected_top_n(rows, weights, excluded, 10)
+
+    shuffled = rows[:]
+    random.Random(7).shuffle(shuffled)
+    for index_rows in (rows, shuffled, rows[::-1]):
+        index = make_index(index_rows)
+        assert index.top_n(weights, ["Drama", "Comedy"], excluded, n=10) == expected
+
+
+def test_overlay_matches_fresh_build():
+    rows = tied_rows()
+    weights = {"Drama": 0.6, "Comedy": 0.4, "Western": 0.5}
+    changed = [ChangedRow(movie_id, f"Movie {movie_id}", "Comedy,Western", 9.0) for movie_id in (5, 50, 2001)]
+    deleted = [2, 3, 500]
+    index = make_index(rows)
+    index._apply(changed, deleted)
+    assert len(index.overlay.ids) == len(changed)
+
+    final_rows = [row for row in rows if row[0] not in {5, 50, 2, 3, 500}] + [tuple(row) for row in changed]
+    fresh = make_index(final_rows)
+    assert len(index) == len(fresh)
+    for diversity in (0.0, 0.5):
+        assert (index.top_n(weights, ["Drama", "Western"], [1], n=20, diversity=diversity)
+                == fresh.top_n(weights, ["Drama", "Western"], [1], n=20, diversity=diversity))
+
+    # После перестроения база содержит изменения, overlay пуст
+    index._rebuild()
+    assert len(index.overlay.ids) == 0 and len(index.overlay.hidden) == 0
+    assert index.top_n(weights, ["Drama", "Western"], [1], n=20) == fresh.top_n(weights, ["Drama", "Western"], [1], n=20)
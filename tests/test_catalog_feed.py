@@ -0,0 +1,63 @@
+"""Лента изменений каталога: признак пересчета рейтинга и записи, удаленные из журнала."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import catalog_feed, models_db, popularity
+
+
+@pytest.fixture
+def db(database):
+    session = database()
+    yield session
+    # Лента процесса догоняет изменения теста, чтобы не учитывать их в других тестах
+    catalog_feed.feed.mark_stale()
+    catalog_feed.feed.poll(session)
+    session.close()
+
+
+@pytest.fixture
+def feed(db):
+    """Отдельная лента с подписчиком, запоминающим изменения; первый опрос запоминает версию."""
+    test_feed = catalog_feed.CatalogChangeFeed(poll_interval=0)
+    changes = []
+    test_feed.subscribe(changes.append)
+    test_feed.poll(db)
+    return test_feed, changes
+
+
+def test_popularity_recompute_keeps_catalog_version(db, feed):
+    test_feed, changes = feed
+    version = test_feed.version
+
+    popularity.recompute_popularity(db)
+    assert test_feed.poll(db) == version
+    assert changes == [catalog_feed.CatalogChange(version, version, frozenset(), popularity=True)]
+
+
+def test_popularity_flag_survives_movie_change_in_same_window(db, feed):
+    test_feed, changes = feed
+    version = test_feed.version
+
+    popularity.recompute_popularity(db)
+    catalog_feed.record_movie_changes(db, [5])
+    db.commit()
+    test_feed.poll(db)
+
+    assert changes == [catalog_feed.CatalogChange(version, version + 1, frozenset({5}), popularity=True)]
+
+
+def test_pruned_changes_force_full_reload(db, feed):
+    test_feed, changes = feed
+    version = test_feed.version
+
+    catalog_feed.record_movie_changes(db, [5])
+    db.commit()
+    catalog_feed.prune_movie_changes(db, datetime.now() + timedelta(seconds=1))
+    catalog_feed.record_movie_changes(db, [6])
+    db.commit()
+    test_feed.poll(db)
+
+    assert changes == [catalog_feed.CatalogChange(version, version + 2, None)]
+    assert db.query(models_db.MovieChange.movie_id).all() == [(6,)]
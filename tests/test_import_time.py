@@ -0,0 +1,13 @@
+"""Бюджет времени импорта веб-приложения (benchmarks/import_time.py) в тестах."""
+
+import os
+
+from benchmarks.import_time import DEFAULT_BUDGET_MS, DEFAULT_MODULE, FORBIDDEN_MODULES, profile_import
+
+
+def test_app_import_within_budget_without_heavy_modules():
+    budget_ms = float(os.getenv("RECOFILM_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    timings = profile_import(DEFAULT_MODULE)
+
+    assert [name for name in FORBIDDEN_MODULES if name in timings] == []
+    assert timings[DEFAULT_MODULE] / 1000 <= budget_ms
@@ -0,0 +1,50 @@
+"""Фоновые задачи: предрасчет рекомендаций и его согласованность с пересчетом популярности."""
+
+import time
+
+import pytest
+
+from app import catalog_feed, crud, jobs, models_db
+from conftest import ACTIVE_USER_ID
+
+
+@pytest.fixture
+def db(database):
+    session = database()
+    yield session
+    catalog_feed.feed.mark_stale()
+    catalog_feed.feed.poll(session)
+    session.close()
+
+
+def run_job(db, name: str, timeout: float = 10.0) -> models_db.Job:
+    """Выполняет задачу в исполнителе и ждет ее завершения."""
+    job_id = jobs.enqueue_job(db, name).id
+    runner = jobs.JobRunner(workers=1, schedules={})
+    try:
+        assert runner.run_pending() == 1
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            db.expire_all()
+            job = jobs.get_job(db, job_id)
+            if job.finished_at is not None:
+                return job
+            time.sleep(0.01)
+        pytest.fail(f"Job {name} did not finish in {timeout} sec")
+    finally:
+        runner.stop(wait=True)
+
+
+def test_precomputed_recommendations_survive_popularity_recompute(db):
+    job = run_job(db, "precompute_recommendations")
+    assert job.status == jobs.JOB_SUCCEEDED
+
+    row = db.get(models_db.UserRecommendation, ACTIVE_USER_ID)
+    assert str(row.catalog_version) == crud.get_catalog_version(db)
+
+    # Пересчет популярности по расписанию не делает предрасчет устаревшим
+    assert run_job(db, "popularity").status == jobs.JOB_SUCCEEDED
+    catalog_feed.feed.mark_stale()
+    user_version = crud.get_user_interactions_version(db, ACTIVE_USER_ID)
+    precomputed = crud.get_precomputed_recommendations(db, ACTIVE_USER_ID, user_version, jobs.PRECOMPUTED_COUNT)
+    assert precomputed == [int(movie_id) for movie_id in row.movie_ids.split(",")]
@@ -0,0 +1,47 @@
+"""Библиотека пользователя: постраничный обход статуса по курсору next_after."""
+
+from app import models_db
+from app.models_db import InteractionStatusEnum
+from conftest import ACTIVE_USER_ID
+
+
+def test_cursor_walk_covers_status_without_overlap(client, database):
+    status = InteractionStatusEnum.WATCHED.value
+    session = database()
+    try:
+        expected = [
+            row.id for row in session.query(models_db.UserMovie.id)
+            .filter(models_db.UserMovie.user_id == ACTIVE_USER_ID, models_db.UserMovie.status == status)
+            .order_by(models_db.UserMovie.id.desc())
+        ]
+    finally:
+        session.close()
+    assert len(expected) > 2
+
+    seen, after, pages = [], None, 0
+    while True:
+        params = {"status": status, "limit": 2}
+        if after is not None:
+            params["after"] = after
+        response = client.get(f"/users/{ACTIVE_USER_ID}/library", params=params)
+        assert response.status_code == 200
+        group = response.json()["groups"][status]
+        assert group["count"] == len(expected)
+        assert len(group["items"]) <= 2
+        seen.extend(item["interaction_id"] for item in group["items"])
+        pages += 1
+        after = group["next_after"]
+        if after is None:
+            break
+        assert after == group["items"][-1]["interaction_id"]
+
+    # Каждая запись ровно один раз, в порядке от новых к старым
+    assert seen == expected
+    assert pages == (len(expected) + 1) // 2
+
+    # Страница за последней: записей нет, количество приходит отдельным запросом
+    response = client.get(
+        f"/users/{ACTIVE_USER_ID}/library", params={"status": status, "limit": 2, "after": expected[-1]}
+    )
+    group = response.json()["groups"][status]
+    assert group["items"] == [] and group["count"] == len(expected) and group["next_after"] is None
@@ -0,0 +1,34 @@
+"""Кэш страниц: выбор сжатия по Accept-Encoding с учетом q."""
+
+import pytest
+
+from app import page_cache
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", {"gzip": 1.0, "deflate": 1.0, "br": 1.0}),
+    ("GZIP;q=0.5, br;q=0", {"gzip": 0.5, "br": 0.0}),
+    ("gzip; q=bad", {"gzip": 1.0}),
+    ("", {}),
+])
+def test_accepted_encodings(header, expected):
+    assert page_cache._accepted_encodings(header) == expected
+
+
+@pytest.mark.parametrize("header, encoding", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=0, *", None),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("identity", None),
+    ("br;q=0, gzip;q=0.8", "gzip"),
+])
+def test_home_page_honours_accept_encoding(client, monkeypatch, header, encoding):
+    # Без brotli выбор только между gzip и несжатым телом
+    monkeypatch.setattr(page_cache, "brotli", None)
+    page_cache.clear_page_cache()
+    response = client.get("/", headers={"Accept-Encoding": header})
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == encoding
+    assert b"<html" in response.content.lower()
@@ -0,0 +1,85 @@
+"""
+Бюджеты SQL-запросов основных эндпоинтов.
+
+Каждый тест начинается с пустых кэшей процесса (фикстура clear_caches),
+поэтому бюджет первого запроса - худший случай: опрос версии каталога,
+загрузка рейтинга популярности и записей фильмов. Повторный запрос должен
+обслуживаться из кэшей. Рост бюджета означает новый запрос на горячем пути
+(чаще всего N+1) и должен быть осознанным.
+"""
+
+import pytest
+
+from conftest import ACTIVE_USER_ID, NEW_USER_ID
+
+
+def test_interaction_upsert(client, max_queries):
+    # Пользователь, фильм, upsert взаимодействия, версия взаимодействий пользователя
+    with max_queries(4, allow_repeated=False):
+        response = client.post(f"/users/{ACTIVE_USER_ID}/interactions/", json={"movie_id": 150, "status": "liked"})
+    assert response.status_code == 200
+
+    # Фильм уже в кэше
+    with max_queries(3, allow_repeated=False):
+        response = client.post(f"/users/{ACTIVE_USER_ID}/interactions/", json={"movie_id": 150, "status": "watched"})
+    assert response.status_code == 200
+
+
+def test_library(client, max_queries):
+    # Версия взаимодействий пользователя и одно оконное чтение всех статусов
+    with max_queries(2, allow_repeated=False):
+        response = client.get(f"/users/{ACTIVE_USER_ID}/library")
+    assert response.status_code == 200
+
+
+def test_library_next_page(client, max_queries):
+    with max_queries(2, allow_repeated=False):
+        response = client.get(f"/users/{ACTIVE_USER_ID}/library", params={"status": "liked", "after": 5})
+    assert response.status_code == 200
+
+
+def test_recommendations(client, max_queries):
+    # Холодный процесс: версия каталога, проверка истории, предрасчет, профиль,
+    # загрузка снимка каталога рекомендателя и записей рекомендованных фильмов
+    with max_queries(8, allow_repeated=False):
+        response = client.get(f"/users/{ACTIVE_USER_ID}/recommendations")
+    assert response.status_code == 200
+
+    with max_queries(3, allow_repeated=False):
+        response = client.get(f"/users/{ACTIVE_USER_ID}/recommendations")
+    assert response.status_code == 200
+
+
+def test_cold_start_recommendations(client, max_queries):
+    # Пользователь без истории получает популярные фильмы без расчета профиля
+    with max_queries(6, allow_repeated=False):
+        response = client.get(f"/users/{NEW_USER_ID}/recommendations")
+    assert response.status_code == 200
+
+    with max_queries(1):
+        response = client.get(f"/users/{NEW_USER_ID}/recommendations")
+    assert response.status_code == 200
+
+
+def test_home_page(client, max_queries):
+    # Версия каталога, рейтинг популярности и записи фильмов одним IN
+    with max_queries(3, allow_repeated=False):
+        response = client.get("/")
+    assert response.status_code == 200
+
+    # Страница из кэша страниц
+    with max_queries(0):
+        response = client.get("/")
+    assert response.status_code == 200
+
+
+@pytest.mark.max_queries(2, allow_repeated=False)
+def test_movie_list(client):
+    assert client.get("/movies/", params={"limit": 50}).status_code == 200
+    assert client.get("/movies/", params={"limit": 50}).status_code == 200
+
+
+@pytest.mark.max_queries(1)
+def test_movie_details(client):
+    assert client.get("/movies/7").status_code == 200
+    assert client.get("/movies/7").status_code == 200
@@ -0,0 +1,98 @@
+"""
+Маршрутизация чтений на реплики: две локальные базы SQLite в роли реплик.
+
+Исправная реплика - копия тестовой базы, в которой переименован
+пользователь, поэтому по ответу видно, где выполнено чтение. Неисправная
+реплика - пустой файл без схемы: любой запрос к ней завершается
+OperationalError, как при потере соединения.
+"""
+
+import pytest
+
+from app import database
+from app.database import ReplicaSet, create_db_engine
+from conftest import ACTIVE_USER_ID
+
+REPLICA_USERNAME = "replica_user"
+
+
+@pytest.fixture
+def healthy_replica(client, tmp_path):
+    replica = create_db_engine(f"sqlite:///{tmp_path / 'healthy.db'}", echo=False)
+    source = database.engine.raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+    with replica.begin() as connection:
+        connection.exec_driver_sql("UPDATE users SET username = ? WHERE id = ?", (REPLICA_USERNAME, ACTIVE_USER_ID))
+    yield replica
+    replica.dispose()
+
+
+@pytest.fixture
+def broken_replica(tmp_path):
+    replica = create_db_engine(f"sqlite:///{tmp_path / 'broken.db'}", echo=False)
+    yield replica
+    replica.dispose()
+
+
+@pytest.fixture
+def use_replicas(client, monkeypatch):
+    """Подменяет реплики процесса; клиент начинает без cookie чтения своих записей."""
+    monkeypatch.setattr(database, "_user_primary_until", {})
+    client.cookies.clear()
+
+    def configure(*engines):
+        replica_set = ReplicaSet(list(engines), retry_seconds=60)
+        monkeypatch.setattr(database, "replicas", replica_set)
+        return replica_set
+
+    yield configure
+    client.cookies.clear()
+
+
+def read_username(client) -> str:
+    response = client.get(f"/users/{ACTIVE_USER_ID}")
+    assert response.status_code == 200
+    return response.json()["username"]
+
+
+def test_reads_go_to_replica(client, use_replicas, healthy_replica):
+    use_replicas(healthy_replica)
+    assert read_username(client) == REPLICA_USERNAME
+
+
+def test_failed_replica_read_is_retried_on_primary(client, use_replicas, broken_replica, healthy_replica):
+    replica_set = use_replicas(broken_replica, healthy_replica)
+
+    # Первое чтение попадает на неисправную реплику и повторяется в основной базе
+    assert read_username(client) == "active_user"
+    assert replica_set.healthy() == [healthy_replica]
+    # Следующие чтения идут на оставшуюся реплику
+    assert read_username(client) == REPLICA_USERNAME
+    assert read_username(client) == REPLICA_USERNAME
+
+
+def test_recommender_session_fails_over_to_primary(use_replicas, broken_replica):
+    from film_advisor_lib.main import get_movie_recommendations_by_user_id
+
+    replica_set = use_replicas(broken_replica)
+    assert len(get_movie_recommendations_by_user_id(ACTIVE_USER_ID, 5)) == 5
+    assert replica_set.healthy() == []
+
+
+def test_writer_reads_own_writes_on_primary(client, use_replicas, healthy_replica):
+    use_replicas(healthy_replica)
+    response = client.post(f"/users/{ACTIVE_USER_ID}/interactions/", json={"movie_id": 120, "status": "liked"})
+    assert response.status_code == 200
+
+    # Cookie клиента и отметка пользователя после записи: оба ведут в основную базу
+    assert read_username(client) == "active_user"
+    client.cookies.clear()
+    assert read_username(client) == "active_user"
+
+    database._user_primary_until.clear()
+    assert read_username(client) == REPLICA_USERNAME
@@ -0,0 +1,35 @@
+"""Маршруты рекомендаций: ограничение limit и ETag при смене рейтинга популярности."""
+
+import pytest
+
+from app import catalog_feed
+from conftest import ACTIVE_USER_ID
+
+
+@pytest.fixture
+def db(database):
+    session = database()
+    yield session
+    catalog_feed.feed.mark_stale()
+    catalog_feed.feed.poll(session)
+    session.close()
+
+
+@pytest.mark.parametrize("path", ["/users/{}/recommendations", "/users/{}/recommendations/"])
+@pytest.mark.parametrize("limit", [0, 101])
+def test_recommendations_limit_is_bounded(client, path, limit):
+    response = client.get(path.format(ACTIVE_USER_ID), params={"limit": limit})
+    assert response.status_code == 422
+
+
+def test_recommendations_etag_follows_popularity_for_user_with_history(client, db):
+    # Пользователь с историей тоже может получить список холодного старта
+    etag = client.get(f"/users/{ACTIVE_USER_ID}/recommendations").headers["ETag"]
+
+    catalog_feed.record_popularity_change(db)
+    db.commit()
+    catalog_feed.feed.mark_stale()
+
+    response = client.get(f"/users/{ACTIVE_USER_ID}/recommendations", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
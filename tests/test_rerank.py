@@ -0,0 +1,37 @@
+"""Переранжирование с разнообразием: детерминированность MMR и top_n при diversity > 0."""
+
+import random
+
+import numpy as np
+
+from film_advisor_lib.rerank import mmr_rerank
+from test_catalog import make_index, tied_rows
+
+WEIGHTS = {"Drama": 0.6, "Comedy": 0.4, "Action": 0.3}
+GENRES = ["Drama", "Comedy", "Action"]
+
+
+def test_mmr_keeps_pool_order_on_equal_gains():
+    scores = np.full(6, 0.8)
+    # Одинаковые жанры: выигрыш всех невыбранных кандидатов на каждом шаге равен
+    same = np.ones((6, 3), dtype=np.float32)
+    assert mmr_rerank(scores, same, 6, 0.5).tolist() == [0, 1, 2, 3, 4, 5]
+    # Непересекающиеся жанры: сходство с выбранными нулевое, выигрыш тоже равен
+    disjoint = np.eye(6, dtype=np.float32)
+    assert mmr_rerank(scores, disjoint, 4, 0.5).tolist() == [0, 1, 2, 3]
+
+
+def test_diverse_top_n_is_deterministic():
+    rows = tied_rows()
+    excluded = [1, 4, 7]
+    expected = make_index(rows).top_n(WEIGHTS, GENRES, excluded, n=10, diversity=0.5)
+    assert len(expected) == 10
+
+    index = make_index(rows)
+    for _ in range(3):
+        assert index.top_n(WEIGHTS, GENRES, excluded, n=10, diversity=0.5) == expected
+
+    shuffled = rows[:]
+    random.Random(11).shuffle(shuffled)
+    for index_rows in (shuffled, rows[::-1]):
+        assert make_index(index_rows).top_n(WEIGHTS, GENRES, excluded, n=10, diversity=0.5) == expected